@@ -1,55 +1,82 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from database import get_db_connection
+from jsonStream import STREAM_CHUNK_ROWS, json_stream_response, wants_stream
+from orderBuffer import order_buffer
+from orderEvents import format_sse, order_events
+from orderHydration import hydrate_orders
+from orderTransitions import apply_transitions, EVENTS, MAX_BULK_TRANSITIONS
 
 order_bp_app = Blueprint('AcceptandReject', __name__)
 
+# Seconds between keep-alive comments on an idle kitchen stream
+STREAM_KEEPALIVE = 15
+
+
+def fetch_kitchen_orders(cursor):
+    # Orders still in the write-ahead buffer are read first, so one flushed in
+    # between shows up in the Orders query rather than in neither
+    buffered = order_buffer.pending_tickets()
+
+    # Query to fetch pending orders
+    query = """
+    SELECT order_id, table_number, order_status, version
+    FROM Orders
+    WHERE order_status = 'Pending' OR order_status = 'In Progress'
+    """
+    cursor.execute(query)
+    orders = cursor.fetchall()
+
+    # Fetch the items of every order in one batched query
+    feed = hydrate_orders(cursor, [order[:3] for order in orders], status_key='order_status') if orders else []
+    # Clients send the version back with a transition so a stale ticket is caught
+    for entry, order in zip(feed, orders):
+        entry['version'] = order[3]
+    if buffered:
+        seen = {order['order_id'] for order in feed}
+        feed.extend(ticket for ticket in buffered if ticket['order_id'] not in seen)
+    return feed
+
+
+def iter_kitchen_orders(chunk_size=STREAM_CHUNK_ROWS):
+    """The kitchen feed of fetch_kitchen_orders, read and hydrated one order_id range at a time.
+
+    Each chunk borrows a connection only while it is read, so a slow client
+    never holds one between chunks.
+    """
+    buffered = order_buffer.pending_tickets()
+    seen = set()
+    last_id = 0
+    while True:
+        with get_db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT order_id, table_number, order_status, version
+                FROM Orders
+                WHERE order_status IN ('Pending', 'In Progress') AND order_id > %s
+                ORDER BY order_id
+                LIMIT %s
+            """, (last_id, chunk_size))
+            orders = cursor.fetchall()
+            if not orders:
+                break
+            feed = hydrate_orders(cursor, [order[:3] for order in orders], status_key='order_status')
+        for entry, order in zip(feed, orders):
+            entry['version'] = order[3]
+            seen.add(order[0])
+            yield entry
+        last_id = orders[-1][0]
+    for ticket in buffered:
+        if ticket['order_id'] not in seen:
+            yield ticket
+
+
 @order_bp_app.route('/pending-orders', methods=['GET'])
 def get_pending_orders():
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            # Query to fetch pending orders
-            query = """
-            SELECT *
-            FROM Orders
-            WHERE order_status = 'Pending' OR order_status = 'In Progress'
-            """
-            cursor.execute(query)
-            orders = cursor.fetchall()
+        if wants_stream():
+            return json_stream_response(iter_kitchen_orders()), 200
 
-            if not orders:
-                return jsonify([]), 200  # Return empty list if no pending orders
-
-            # Fetch order items for each order
-            pending_orders = []
-            for order in orders:
-                order_id = order[0]  # order_id
-                table_number = order[1]  # table_number
-                order_status= order[3]
-                
-                # Query to fetch items for the current order, joining with Menu
-                items_query = """
-                SELECT m.name AS food_name, oi.quantity, oi.subtotal
-                FROM OrderItems oi
-                JOIN Menu m ON oi.menu_id = m.menu_id
-                WHERE oi.order_id = %s
-                """
-                cursor.execute(items_query, (order_id,))
-                items = cursor.fetchall()
-                order_data = {
-                    'order_id': order_id,
-                    'order_status': order_status,  # order_status
-                    'table_number': table_number,
-                    'items': [
-                        {
-                            'food_name': item[0],  
-                            'quantity': item[1],  
-                            'subtotal': float(item[2])  
-                        }
-                        for item in items
-                    ]
-                }
-                pending_orders.append(order_data)
+        with get_db_connection() as connection, connection.cursor() as cursor:
+            pending_orders = fetch_kitchen_orders(cursor)
 
         return jsonify(pending_orders), 200
 
@@ -57,7 +84,104 @@ def get_pending_orders():
         print(f"Error fetching pending orders: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-# Existing routes (unchanged)
+
+@order_bp_app.route('/pending-orders/stream', methods=['GET'])
+def stream_pending_orders():
+    """Server-Sent Events feed for kitchen screens.
+
+    Sends one ``snapshot`` event with the current pending-orders list, then
+    ``order_created`` / ``order_accepted`` / ``order_rejected`` /
+    ``order_ready`` / ``order_completed`` events as they happen. A client reconnecting with
+    Last-Event-ID gets the missed events replayed instead of a new snapshot
+    when they are still buffered; any other id gets a fresh snapshot.
+    """
+    last_event_id = request.headers.get('Last-Event-ID')
+    subscription = order_events.subscribe()
+    missed = order_events.events_since(last_event_id) if last_event_id is not None else None
+
+    snapshot = None
+    if missed is None:
+        try:
+            snapshot_id = order_events.last_id
+            with get_db_connection() as connection, connection.cursor() as cursor:
+                snapshot = fetch_kitchen_orders(cursor)
+        except Exception as e:
+            subscription.close()
+            print(f"Error fetching pending orders: {str(e)}")
+            return jsonify({"error": str(e)}), 500
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            if snapshot is not None:
+                yield format_sse('snapshot', snapshot, snapshot_id)
+            else:
+                for event in missed:
+                    yield format_sse(event['type'], event['data'], event['id'])
+
+            while not subscription.overflowed:
+                event = subscription.get(timeout=STREAM_KEEPALIVE)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event['type'], event['data'], event['id'])
+        finally:
+            subscription.close()
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(generate(), mimetype='text/event-stream', headers=headers)
+
+def parse_transition(entry):
+    """Validate one {order_id, status, version?, chef_id?} entry; raises ValueError."""
+    if not isinstance(entry, dict):
+        raise ValueError("Each transition must be an object")
+    try:
+        order_id = int(entry['order_id'])
+        version = entry.get('version')
+        version = int(version) if version is not None else None
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Each transition needs a numeric order_id")
+    status = entry.get('status')
+    if status not in EVENTS:
+        raise ValueError(f"Unknown status {status!r}")
+    return {'order_id': order_id, 'status': status, 'version': version, 'chef_id': entry.get('chef_id')}
+
+
+@order_bp_app.route('/orders/transitions', methods=['POST'])
+def bulk_transition():
+    """Apply many status changes at once: {"transitions": [{order_id, status, version?, chef_id?}, ...]}.
+
+    All of them run in one transaction; each result says whether it applied
+    or why not (not_found, invalid_transition, conflict).
+    """
+    data = request.get_json(silent=True) or {}
+    entries = data.get('transitions')
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "A non-empty 'transitions' list is required"}), 400
+    if len(entries) > MAX_BULK_TRANSITIONS:
+        return jsonify({"error": f"At most {MAX_BULK_TRANSITIONS} transitions per request"}), 413
+
+    try:
+        transitions = [parse_transition(entry) for entry in entries]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if len({t['order_id'] for t in transitions}) != len(transitions):
+        return jsonify({"error": "Each order may appear only once"}), 400
+
+    try:
+        results = apply_transitions(transitions)
+        return jsonify({"results": results}), 200
+
+    except Exception as e:
+        print(f"Error applying order transitions: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def single_transition(order_id, status, chef_id=None):
+    """True if the order moved to ``status``; the single-order endpoints below wrap this."""
+    return apply_transitions([{'order_id': int(order_id), 'status': status, 'chef_id': chef_id}])[0]['ok']
+
+
 @order_bp_app.route('/accept-order', methods=['POST'])
 def accept_order():
     data = request.json
@@ -68,19 +192,9 @@ def accept_order():
         return jsonify({"error": "Missing order_id or chef_id"}), 400
 
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            print(f"Accepting Order: order_id={order_id}, chef_id={chef_id}")
-
-            query = """
-            UPDATE Orders SET order_status = 'In Progress', chef_id = %s 
-            WHERE order_id = %s AND order_status = 'Pending'
-            """
-            cursor.execute(query, (chef_id, order_id))
-            connection.commit()
-
-            if cursor.rowcount == 0:
-                return jsonify({"error": "Order not found or already accepted"}), 404
+        print(f"Accepting Order: order_id={order_id}, chef_id={chef_id}")
+        if not single_transition(order_id, 'In Progress', chef_id):
+            return jsonify({"error": "Order not found or already accepted"}), 404
 
         return jsonify({"message": "Order accepted successfully"}), 200
 
@@ -97,18 +211,10 @@ def reject_order():
         return jsonify({"error": "Missing order_id"}), 400
 
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            print(f"Rejecting Order: order_id={order_id}")
-
-            query = """
-            DELETE FROM Orders WHERE order_id = %s AND order_status = 'Pending'
-            """
-            cursor.execute(query, (order_id,))
-            connection.commit()
-
-            if cursor.rowcount == 0:
-                return jsonify({"error": "Order not found or already processed"}), 404
+        # Kept as 'Rejected' rather than deleted, so its history and analytics stay intact
+        print(f"Rejecting Order: order_id={order_id}")
+        if not single_transition(order_id, 'Rejected'):
+            return jsonify({"error": "Order not found or already processed"}), 404
 
         return jsonify({"message": "Your order has been declined."}), 200
 
@@ -116,8 +222,8 @@ def reject_order():
         print(f"Error rejecting order: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@order_bp_app.route('/complete-order', methods=['POST'])
-def complete_order():
+@order_bp_app.route('/ready-order', methods=['POST'])
+def ready_order():
     data = request.json
     order_id = data.get('order_id')
 
@@ -125,27 +231,31 @@ def complete_order():
         return jsonify({"error": "Missing order_id"}), 400
 
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            print(f"Completing Order: order_id={order_id}")
+        print(f"Order ready: order_id={order_id}")
+        if not single_transition(order_id, 'Ready'):
+            return jsonify({"error": "Order not found or not in progress"}), 404
 
-            query = """
-            UPDATE Orders SET order_status = 'Completed' 
-            WHERE order_id = %s AND order_status = 'In Progress'
-            """
-            cursor.execute(query, (order_id,))
-            connection.commit()
+        return jsonify({"message": "Order marked as ready"}), 200
 
-            if cursor.rowcount == 0:
-                return jsonify({"error": "Order not found or not in progress"}), 404
+    except Exception as e:
+        print(f"Error marking order ready: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@order_bp_app.route('/complete-order', methods=['POST'])
+def complete_order():
+    data = request.json
+    order_id = data.get('order_id')
+
+    if not order_id:
+        return jsonify({"error": "Missing order_id"}), 400
+
+    try:
+        print(f"Completing Order: order_id={order_id}")
+        if not single_transition(order_id, 'Completed'):
+            return jsonify({"error": "Order not found or not in progress"}), 404
 
         return jsonify({"message": "Order marked as completed"}), 200
 
     except Exception as e:
         print(f"Error completing order: {str(e)}")
         return jsonify({"error": str(e)}), 500
-    
-    
-    
-
-
@@ -1,30 +1,14 @@
 from flask import Blueprint, jsonify, request
 from database import get_db_connection
-import random
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import datetime
-import bcrypt
-
-# Global variable to store OTP
-GLOBAL_OTP = None
-Global_email = None
+from mailQueue import mail_queue
+from otpStore import otp_store, generate_otp, VERIFIED, INVALID, EXPIRED, LOCKED
+from passwordHasher import hash_password
 
 # Define the Blueprint
 password_reset_bp = Blueprint('password_reset', __name__)
 
-# Gmail SMTP configuration
-GMAIL_USER = 'chysanjit13@gmail.com'  # Replace with your Gmail address
-GMAIL_PASSWORD = 'ucbi wijn fxeq khel'  # Replace with your Gmail App Password
-
 def send_otp_email(to_email, otp):
     try:
-        msg = MIMEMultipart()
-        msg['From'] = GMAIL_USER
-        msg['To'] = to_email
-        msg['Subject'] = 'Password Reset OTP'
-
         body = f"""
         Hello,
 
@@ -37,29 +21,16 @@ def send_otp_email(to_email, otp):
         Best regards,
         Your App Team
         """
-        msg.attach(MIMEText(body, 'plain'))
-
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(GMAIL_USER, GMAIL_PASSWORD)
-        server.sendmail(GMAIL_USER, to_email, msg.as_string())
-        server.quit()
-        print(f"OTP email sent successfully to {to_email}")
+        # Delivered by the background mail workers; SMTP settings live in mailQueue
+        mail_queue.enqueue(to_email, 'Password Reset OTP', body)
+        print(f"OTP email queued for {to_email}")
         return True
-    except smtplib.SMTPAuthenticationError:
-        print("SMTP Authentication Error: Check Gmail username and App Password")
-        return False
-    except smtplib.SMTPException as e:
-        print(f"SMTP Error: {str(e)}")
-        return False
     except Exception as e:
-        print(f"Failed to send OTP email: {str(e)}")
+        print(f"Failed to queue OTP email: {str(e)}")
         return False
 
 @password_reset_bp.route('/password_reset', methods=['POST'])
 def send_password_reset_otp():
-    global GLOBAL_OTP
-    global Global_email
     print("Entering /password_reset")
     try:
         email = request.form.get('email')
@@ -67,29 +38,24 @@ def send_password_reset_otp():
         if not email:
             return jsonify({"error": "Email is required"}), 400
         
-        connection = get_db_connection()
-        if not connection:
-            return jsonify({"message": "Database connection failed"}), 500
-
-        cursor = connection.cursor()
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
 
-        # Check if username already exists
-        # Check if username or email already exists
-        cursor.execute("SELECT * FROM Users WHERE email = %s", (email,))
+            # Check if username already exists
+            # Check if username or email already exists
+            cursor.execute("SELECT * FROM Users WHERE email = %s", (email,))
 
-        user = cursor.fetchone()
+            user = cursor.fetchone()
+            cursor.close()
         print(f"User found: {user}")
     
         if not user:
             # assuming email is in the 2nd column
             return jsonify({"error": "User with this email not foud"}),400
         
-        Global_email= email
-        
-        # Generate a 5-digit OTP
-        otp = ''.join([str(random.randint(0, 9)) for _ in range(5)])
-        GLOBAL_OTP = str(otp)
-        print(f"Generated OTP: {GLOBAL_OTP}")
+        # Generate a 5-digit OTP; any earlier reset for this email stops working
+        otp = generate_otp()
+        otp_store.issue(email, otp)
         
         # Send the OTP via email
         if not send_otp_email(email, otp):
@@ -102,23 +68,25 @@ def send_password_reset_otp():
 
 @password_reset_bp.route('/password_reset_OTP', methods=['POST'])
 def verify_password_reset_otp():
-    global GLOBAL_OTP
     print("Entering /password_reset_OTP")
-    print(f"Current GLOBAL_OTP: {GLOBAL_OTP}")
     try:
+        email = request.form.get('email')
         received_otp = request.form.get('value')
-        print(f"Received OTP: {received_otp}")
+        if not email:
+            return jsonify({"error": "Email is required"}), 400
         if not received_otp:
             return jsonify({"error": "OTP is required"}), 400
-        
-        if GLOBAL_OTP is None:
-            return jsonify({"error": "No OTP generated. Please request a new OTP"}), 400
 
-        if received_otp == GLOBAL_OTP:
-            GLOBAL_OTP = None  # Clear OTP after verification
-            return jsonify({"message": "OTP verified successfully"}), 200
-        else:
+        outcome, reset_token = otp_store.verify(email, received_otp)
+        if outcome == VERIFIED:
+            return jsonify({"message": "OTP verified successfully", "reset_token": reset_token}), 200
+        if outcome == INVALID:
             return jsonify({"error": "Invalid OTP"}), 400
+        if outcome == EXPIRED:
+            return jsonify({"error": "OTP has expired. Please request a new OTP"}), 400
+        if outcome == LOCKED:
+            return jsonify({"error": "Too many invalid attempts. Please request a new OTP"}), 429
+        return jsonify({"error": "No OTP generated. Please request a new OTP"}), 400
     except Exception as e:
         print(f"Error in /password_reset_OTP: {str(e)}")
         return jsonify({"error": "Internal Server Error"}), 500
@@ -126,36 +94,41 @@ def verify_password_reset_otp():
 
 @password_reset_bp.route('/update_password', methods=['POST'])
 def update_password():
-    global Global_email
-    print(f"Current updating user: {Global_email}")
     print("Entering /update_password")
     try:
+        reset_token = request.form.get('reset_token')
         new_password = request.form.get('password')
 
+        if not reset_token:
+            return jsonify({"error": "Reset token is required"}), 400
+
         if not new_password:
             return jsonify({"error": "password are required"}), 400
 
         if len(new_password) < 8:
             return jsonify({"error": "Password must be at least 8 characters long"}), 400
 
+        # Single use: a second request with the same token is rejected
+        email = otp_store.consume_token(reset_token)
+        if email is None:
+            return jsonify({"error": "Reset session expired. Please request a new OTP"}), 400
+
         # Hash the new password
-        hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
+        hashed_password = hash_password(new_password)
 
         # Update the password in the Users table
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        query = "UPDATE Users SET password = %s WHERE email = %s"
-        cursor.execute(query, (hashed_password, Global_email))
-        conn.commit()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            query = "UPDATE Users SET password = %s WHERE email = %s"
+            cursor.execute(query, (hashed_password, email))
+            conn.commit()
+            updated = cursor.rowcount
+            cursor.close()
 
         # Check if any rows were affected
-        if cursor.rowcount == 0:
-            cursor.close()
-            conn.close()
+        if updated == 0:
             return jsonify({"error": "User not found"}), 404
 
-        cursor.close()
-        conn.close()
 
         return jsonify({"message": "Password updated successfully"}), 200
     except Exception as e:
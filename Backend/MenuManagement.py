@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify,request
 from database import get_db_connection
+from httpCache import conditional
+from menuCache import MENU_FIELDS, menu_cache
 
 add_menu_bp = Blueprint('add_menu', __name__)
 Fetch_menu_bp = Blueprint('Fetch_menu', __name__)
@@ -19,14 +21,14 @@ def add_menu():
         if not name or not price:
             return jsonify({'error': 'Name and price are required'}), 400
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO Menu (name, description, price, category, image_url)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (name, description, price, category, image_url))
-        conn.commit()
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO Menu (name, description, price, category, image_url)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (name, description, price, category, image_url))
+            conn.commit()
+            menu_cache.refresh_item(conn, cursor.lastrowid)
 
         return jsonify({'message': 'Menu added successfully'}), 200
     except Exception as e:
@@ -36,20 +38,13 @@ def add_menu():
     
 # Fetch menu item by ID
 @Fetch_menu_bp.route('/get_menu/<int:menu_id>', methods=['GET'])
+@conditional(lambda menu_id: ('menu', menu_cache.current_version()))
 def get_menu(menu_id):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT menu_id, name, description, price, category, image_url 
-            FROM Menu 
-            WHERE menu_id = %s
-        """, (menu_id,))
-        menu = cursor.fetchone()
-        conn.close()
+        menu = menu_cache.get(menu_id)
 
         if menu:
-            return jsonify(menu), 200
+            return jsonify({key: menu[key] for key in MENU_FIELDS}), 200
         return jsonify({'error': 'Menu item not found'}), 404
     except Exception as e:
         print(f"Error: {e}")
@@ -69,20 +64,19 @@ def update_menu(menu_id):
         if not name or not price:
             return jsonify({'error': 'Name and price are required'}), 400
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE Menu 
-            SET name = %s, description = %s, price = %s, category = %s, image_url = %s
-            WHERE menu_id = %s
-        """, (name, description, price, category, image_url, menu_id))
-        
-        if cursor.rowcount == 0:
-            conn.close()
-            return jsonify({'error': 'Menu item not found'}), 404
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE Menu 
+                SET name = %s, description = %s, price = %s, category = %s, image_url = %s
+                WHERE menu_id = %s
+            """, (name, description, price, category, image_url, menu_id))
+            
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Menu item not found'}), 404
 
-        conn.commit()
-        conn.close()
+            conn.commit()
+            menu_cache.refresh_item(conn, menu_id)
         return jsonify({'message': 'Menu updated successfully'}), 200
     except Exception as e:
         print(f"Error: {e}")
@@ -92,16 +86,15 @@ def update_menu(menu_id):
 @delete_menu_bp.route('/delete_menu/<int:menu_id>', methods=['DELETE'])
 def delete_menu(menu_id):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM Menu WHERE menu_id = %s", (menu_id,))
-        
-        if cursor.rowcount == 0:
-            conn.close()
-            return jsonify({'error': 'Menu item not found'}), 404
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM Menu WHERE menu_id = %s", (menu_id,))
+            
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Menu item not found'}), 404
 
-        conn.commit()
-        conn.close()
+            conn.commit()
+        menu_cache.remove(menu_id)
         return jsonify({'message': 'Menu item deleted successfully'}), 200
     except Exception as e:
         print(f"Error: {e}")
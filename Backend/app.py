@@ -1,3 +1,6 @@
+import os
+import secrets
+
 from flask import Flask, request, jsonify,send_from_directory
 from flask_cors import CORS
 
@@ -13,9 +16,23 @@ from ChefOrderTracking import order_bp_app
 from userOrderTracking import userorder_bp_app
 from editprofile import edit_profile_bp
 from ForgotPassword import password_reset_bp
+from database import pool
+from dashboardStats import dashboard_stats
+from mailQueue import check_config as check_mail_config, mail_queue
+from idempotencyStore import idempotency_store
+from menuCache import menu_cache
+from reviewSummary import review_summaries
+from orderBuffer import order_buffer
+from orderWatch import order_watch
+from loyaltyTiers import tier_rules
+from passwordHasher import password_hasher
+from sentiment import sentiment_batcher
 # Initialize Flask app
 app = Flask(__name__)
-app.config['SECRET_KEY'] = '12345'
+# Signs session cookies; every worker must share the same value
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
+if not os.environ.get('SECRET_KEY'):
+    print("SECRET_KEY not set; using a random key, so sessions end on restart and are not shared between workers")
 CORS(app)  # Enable CORS
 
 
@@ -35,6 +52,9 @@ app.register_blueprint(userorder_bp_app)
 app.register_blueprint(edit_profile_bp)
 app.register_blueprint(password_reset_bp)
 
+# A half-configured SMTP login fails now rather than on the first OTP mail
+check_mail_config()
+
 
 
 # Serve the 'uploads' folder as a static directory
@@ -50,6 +70,54 @@ def serve_uploaded_file(filename):
     except Exception as e:
         return jsonify({"error": f"Failed to serve file: {str(e)}"}), 500
 
+# Connection pool health: open/idle/in-use connections, waits and timeouts
+@app.route('/health/db-pool', methods=['GET'])
+def db_pool_stats():
+    return jsonify(pool.stats()), 200
+
+@app.route('/health/menu-cache', methods=['GET'])
+def menu_cache_stats():
+    return jsonify(menu_cache.stats()), 200
+
+@app.route('/health/review-summaries', methods=['GET'])
+def review_summary_stats():
+    return jsonify(review_summaries.stats()), 200
+
+@app.route('/health/dashboard-stats', methods=['GET'])
+def dashboard_stats_state():
+    return jsonify(dashboard_stats.stats()), 200
+
+@app.route('/health/mail-queue', methods=['GET'])
+def mail_queue_stats():
+    return jsonify(mail_queue.stats()), 200
+
+@app.route('/health/idempotency', methods=['GET'])
+def idempotency_stats():
+    return jsonify(idempotency_store.stats()), 200
+
+# Buffered order ingestion: orders waiting for MySQL and how far behind the flusher is
+@app.route('/health/order-buffer', methods=['GET'])
+def order_buffer_stats():
+    return jsonify(order_buffer.stats()), 200
+
+# Customers long-polling /pendingorders/watch and how often they were woken by a change
+@app.route('/health/order-watch', methods=['GET'])
+def order_watch_stats():
+    return jsonify(order_watch.stats()), 200
+
+# Loyalty tier ladder this worker is using and when it was loaded
+@app.route('/health/loyalty-tiers', methods=['GET'])
+def loyalty_tier_stats():
+    return jsonify(tier_rules.stats()), 200
+
+@app.route('/health/password-hasher', methods=['GET'])
+def password_hasher_stats():
+    return jsonify(password_hasher.stats()), 200
+
+@app.route('/health/sentiment-batcher', methods=['GET'])
+def sentiment_batcher_stats():
+    return jsonify(sentiment_batcher.stats()), 200
+
 # Run the Flask app
 if __name__ == '__main__':
     app.run(host= '0.0.0.0', port=8082, debug=True)
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""Score stored reviews that have no sentiment yet.
+
+Walks Reviews with sentiment 'unknown' (or NULL) in review_id order, one
+chunk at a time, scores each chunk with a single vectorized predict call and
+writes the labels back with executemany, committing per chunk so the job can
+be stopped and resumed at any point.
+
+    python backfillSentiment.py [--chunk-size 5000] [--dry-run]
+"""
+import argparse
+import time
+from collections import Counter
+
+from database import get_db_connection
+from httpCache import data_versions
+from reviewSummary import record_sentiments
+import sentiment
+
+SELECT_CHUNK = """
+    SELECT review_id, menu_id, feedback
+    FROM Reviews
+    WHERE (sentiment = 'unknown' OR sentiment IS NULL) AND review_id > %s
+    ORDER BY review_id
+    LIMIT %s
+"""
+UPDATE_SENTIMENT = "UPDATE Reviews SET sentiment = %s WHERE review_id = %s"
+
+
+def backfill(chunk_size=5000, dry_run=False):
+    if not sentiment.sentiment_models.get():
+        raise RuntimeError("Sentiment model not loaded; nothing to backfill with")
+
+    last_id = 0
+    scored = 0
+    started = time.perf_counter()
+    while True:
+        with get_db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute(SELECT_CHUNK, (last_id, chunk_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            labels = sentiment.predict_sentiments([feedback or '' for _, _, feedback in rows])
+            if not dry_run:
+                cursor.executemany(UPDATE_SENTIMENT, [(label, row[0]) for label, row in zip(labels, rows)])
+                record_sentiments(cursor, Counter((row[1], label) for label, row in zip(labels, rows)))
+                connection.commit()
+                data_versions.bump(*{f'reviews:{menu_id}' for _, menu_id, _ in rows})
+
+        last_id = rows[-1][0]
+        scored += len(rows)
+        elapsed = time.perf_counter() - started
+        print(f"Scored {scored} reviews (up to review_id {last_id}), {scored / elapsed:.0f} reviews/s")
+
+    return scored
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backfill sentiment for reviews scored as 'unknown'")
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--dry-run', action='store_true', help="score but do not write back")
+    args = parser.parse_args()
+    total = backfill(args.chunk_size, args.dry_run)
+    print(f"Done: {total} reviews scored")
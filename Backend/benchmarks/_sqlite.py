@@ -0,0 +1,88 @@
+"""Helpers for running the Backend's MySQL-flavoured SQL against in-memory SQLite.
+
+The benchmarks only need the shape of each query path (how many statements,
+how many rows), so a local SQLite database plus a simulated network round-trip
+stands in for a real MySQL server.
+"""
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class CountingCursor:
+    """Wraps a sqlite3 cursor: translates %s placeholders, counts and delays each execute."""
+
+    def __init__(self, cursor, rtt=0.0):
+        self._cursor = cursor
+        self.rtt = rtt
+        self.round_trips = 0
+
+    def execute(self, query, params=()):
+        self.round_trips += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+        return self._cursor.execute(query.replace('%s', '?'), params)
+
+    def executemany(self, query, seq_of_params):
+        self.round_trips += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+        return self._cursor.executemany(query.replace('%s', '?'), seq_of_params)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+SCHEMA = """
+CREATE TABLE Menu (
+    menu_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    price REAL NOT NULL,
+    category TEXT,
+    image_url TEXT
+);
+CREATE TABLE Orders (
+    order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_number INTEGER,
+    customer_id INTEGER,
+    order_status TEXT,
+    total_price REAL,
+    chef_id INTEGER,
+    order_time TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE OrderItems (
+    order_item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INTEGER,
+    menu_id INTEGER,
+    quantity INTEGER,
+    subtotal REAL
+);
+CREATE INDEX idx_orderitems_order ON OrderItems (order_id);
+"""
+
+
+def create_database():
+    connection = sqlite3.connect(':memory:', check_same_thread=False)
+    connection.executescript(SCHEMA)
+    return connection
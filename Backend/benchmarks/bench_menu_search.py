@@ -0,0 +1,73 @@
+"""Type-ahead latency of the in-process menu search index on a synthetic catalog.
+
+    python benchmarks/bench_menu_search.py [--items 5000]
+"""
+import argparse
+import random
+import time
+
+import _sqlite  # noqa: F401  (puts the Backend on sys.path)
+from menuSearch import MenuSearchIndex
+
+WORDS = [
+    'chicken', 'paneer', 'momo', 'chowmein', 'thali', 'biryani', 'masala', 'tikka', 'butter', 'garlic',
+    'naan', 'sekuwa', 'thukpa', 'curry', 'dal', 'bhat', 'lassi', 'mango', 'spicy', 'fried', 'steamed',
+    'veg', 'mutton', 'buff', 'fish', 'prawn', 'sizzler', 'soup', 'salad', 'pizza', 'burger', 'sandwich',
+]
+CATEGORIES = ['Starters', 'Mains', 'Nepali', 'Indian', 'Chinese', 'Drinks', 'Desserts', 'Continental']
+QUERIES = ['c', 'ch', 'chi', 'chick', 'chicken mo', 'panner', 'biryni', 'momo', 'veg thali', 'spicy fr', 'desserts']
+
+
+def synthetic_menu(count):
+    rng = random.Random(11)
+    # Real menus mix a few common words with many dish-specific ones
+    rare = [''.join(rng.choices('abcdefghiklmnoprstuy', k=rng.randint(4, 9))) for _ in range(count)]
+    return [
+        {
+            'menu_id': menu_id,
+            'name': ' '.join(rng.sample(WORDS, 2) + [rng.choice(rare)]).title(),
+            'description': ' '.join(rng.choices(WORDS, k=2) + rng.choices(rare, k=6)),
+            'category': rng.choice(CATEGORIES),
+            'price': rng.randint(100, 1500),
+            'image_url': None,
+        }
+        for menu_id in range(1, count + 1)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--limit', type=int, default=10, help="results returned per keystroke")
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    rows = synthetic_menu(args.items)
+    index = MenuSearchIndex()
+    started = time.perf_counter()
+    index.rebuild(rows)
+    print(f"indexed {args.items} items in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    started = time.perf_counter()
+    for row in rows[:100]:
+        index.upsert(dict(row, name=row['name'] + ' Special'))
+    print(f"incremental upsert: {(time.perf_counter() - started) * 1000 / 100:.3f} ms/item")
+
+    print(f"{'query':<12} {'hits':>6} {'cold median ms':>15} {'cold p99 ms':>12} {'cached ms':>10}")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            index._results.clear()
+            started = time.perf_counter()
+            index.search(query, args.limit)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        started = time.perf_counter()
+        index.search(query, args.limit)
+        cached = time.perf_counter() - started
+        total = len(index.search(query))
+        print(f"{query:<12} {total:>6} {timings[len(timings) // 2] * 1000:>15.3f} "
+              f"{timings[int(len(timings) * 0.99)] * 1000:>12.3f} {cached * 1000:>10.4f}")
+
+if __name__ == '__main__':
+    main()
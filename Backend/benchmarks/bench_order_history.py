@@ -0,0 +1,92 @@
+"""Order history paging: LIMIT/OFFSET vs. the keyset cursor on (order_time, order_id).
+
+    python benchmarks/bench_order_history.py [--orders 500000] [--page-size 20]
+"""
+import argparse
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from _sqlite import SCHEMA
+
+OFFSET_QUERY = """
+SELECT order_id, table_number, order_status, order_time
+FROM Orders WHERE customer_id = ?
+ORDER BY order_time DESC, order_id DESC LIMIT ? OFFSET ?
+"""
+
+KEYSET_QUERY = """
+SELECT order_id, table_number, order_status, order_time
+FROM Orders WHERE customer_id = ? AND order_time <= ? AND (order_time < ? OR order_id < ?)
+ORDER BY order_time DESC, order_id DESC LIMIT ?
+"""
+
+
+def seed(connection, orders, customers):
+    started = datetime(2024, 1, 1)
+    connection.executemany(
+        "INSERT INTO Orders (table_number, customer_id, order_status, total_price, order_time) VALUES (?, ?, ?, ?, ?)",
+        ((random.randint(1, 30), random.randint(1, customers), 'Completed', 10.0,
+          (started + timedelta(seconds=i * 30)).isoformat(sep=' ')) for i in range(orders))
+    )
+    # Same shape as migrations/005_orders_history_indexes.sql
+    connection.execute("CREATE INDEX idx_orders_customer_time ON Orders (customer_id, order_time, order_id)")
+    connection.commit()
+
+
+def timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=500000)
+    parser.add_argument('--customers', type=int, default=5)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 1000, 4000])
+    args = parser.parse_args()
+
+    random.seed(7)
+    connection = sqlite3.connect(':memory:')
+    connection.executescript(SCHEMA)
+    seed(connection, args.orders, args.customers)
+    customer = 1
+    size = args.page_size
+
+    # Walk the keyset cursor once to learn where each measured page starts
+    cursors, position = {}, None
+    for page in range(1, max(args.pages) + 1):
+        if page in args.pages:
+            cursors[page] = position
+        if position is None:
+            rows = connection.execute(OFFSET_QUERY, (customer, size, 0)).fetchall()
+        else:
+            rows = connection.execute(KEYSET_QUERY, (customer, position[0], position[0], position[1], size)).fetchall()
+        if not rows:
+            break
+        position = (rows[-1][3], rows[-1][0])
+
+    print(f"{'page':>6} | {'offset ms':>10} | {'keyset ms':>10} | speedup")
+    for page in args.pages:
+        if page not in cursors:
+            continue
+        offset_rows, offset_ms = timed(lambda: connection.execute(OFFSET_QUERY, (customer, size, (page - 1) * size)).fetchall())
+        position = cursors[page]
+        if position is None:
+            keyset_rows, keyset_ms = timed(lambda: connection.execute(OFFSET_QUERY, (customer, size, 0)).fetchall())
+        else:
+            keyset_rows, keyset_ms = timed(lambda: connection.execute(
+                KEYSET_QUERY, (customer, position[0], position[0], position[1], size)).fetchall())
+        assert offset_rows == keyset_rows, "keyset page must match the offset page"
+        print(f"{page:>6} | {offset_ms:>10.3f} | {keyset_ms:>10.3f} | {offset_ms / keyset_ms:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
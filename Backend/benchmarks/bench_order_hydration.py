@@ -0,0 +1,104 @@
+"""Round-trips and latency of the order feeds: per-order item queries vs. one batched query.
+
+    python benchmarks/bench_order_hydration.py [--rtt-ms 0.5] [--items 3]
+"""
+import argparse
+import random
+import time
+
+from _sqlite import CountingCursor, create_database
+from orderHydration import hydrate_orders
+
+LEGACY_ITEMS_QUERY = """
+SELECT m.name AS food_name, oi.quantity, oi.subtotal
+FROM OrderItems oi
+JOIN Menu m ON oi.menu_id = m.menu_id
+WHERE oi.order_id = %s
+"""
+
+
+def seed(connection, open_orders, items_per_order):
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM OrderItems")
+    cursor.execute("DELETE FROM Orders")
+    cursor.execute("DELETE FROM Menu")
+    cursor.executemany(
+        "INSERT INTO Menu (name, price, category) VALUES (?, ?, ?)",
+        [(f"Dish {i}", 5.0 + i, "Main") for i in range(50)]
+    )
+    for order in range(open_orders):
+        cursor.execute(
+            "INSERT INTO Orders (table_number, customer_id, order_status, total_price) VALUES (?, ?, ?, ?)",
+            (order % 20 + 1, order + 1, random.choice(['Pending', 'In Progress']), 0)
+        )
+        order_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO OrderItems (order_id, menu_id, quantity, subtotal) VALUES (?, ?, ?, ?)",
+            [(order_id, random.randint(1, 50), 1, 9.5) for _ in range(items_per_order)]
+        )
+    connection.commit()
+
+
+def fetch_orders(cursor):
+    cursor.execute("""
+        SELECT order_id, table_number, order_status
+        FROM Orders
+        WHERE order_status = 'Pending' OR order_status = 'In Progress'
+    """)
+    return cursor.fetchall()
+
+
+def legacy_feed(cursor):
+    feed = []
+    for order_id, table_number, order_status in fetch_orders(cursor):
+        cursor.execute(LEGACY_ITEMS_QUERY, (order_id,))
+        feed.append({
+            'order_id': order_id,
+            'order_status': order_status,
+            'table_number': table_number,
+            'items': [
+                {'food_name': item[0], 'quantity': item[1], 'subtotal': float(item[2])}
+                for item in cursor.fetchall()
+            ]
+        })
+    return feed
+
+
+def batched_feed(cursor):
+    return hydrate_orders(cursor, fetch_orders(cursor), status_key='order_status')
+
+
+def measure(connection, feed, rtt, repeat=5):
+    best = None
+    for _ in range(repeat):
+        cursor = CountingCursor(connection.cursor(), rtt=rtt)
+        started = time.perf_counter()
+        result = feed(cursor)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, cursor.round_trips, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rtt-ms', type=float, default=0.5, help="simulated client/server round-trip")
+    parser.add_argument('--items', type=int, default=3, help="items per order")
+    parser.add_argument('--orders', type=int, nargs='+', default=[1, 10, 40, 80, 160, 320])
+    args = parser.parse_args()
+
+    random.seed(7)
+    connection = create_database()
+    rtt = args.rtt_ms / 1000
+
+    print(f"{'orders':>7} | {'N+1 trips':>9} {'N+1 ms':>9} | {'batched trips':>13} {'batched ms':>10} | speedup")
+    for open_orders in args.orders:
+        seed(connection, open_orders, args.items)
+        legacy, legacy_trips, legacy_time = measure(connection, legacy_feed, rtt)
+        batched, batched_trips, batched_time = measure(connection, batched_feed, rtt)
+        assert legacy == batched, "batched feed must match the legacy response shape"
+        print(f"{open_orders:>7} | {legacy_trips:>9} {legacy_time * 1000:>9.2f} | "
+              f"{batched_trips:>13} {batched_time * 1000:>10.2f} | {legacy_time / batched_time:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Login throughput: bcrypt on the request threads vs. the password hashing process pool.
+
+    python benchmarks/bench_password_hashing.py [--threads 32] [--logins 256] [--rounds 12]
+"""
+import argparse
+import threading
+import time
+
+import _sqlite  # noqa: F401  (puts the Backend on sys.path)
+from passwordHasher import PasswordHasher
+
+
+def run(threads, logins, verify):
+    per_thread = logins // threads
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            started = time.perf_counter()
+            verify()
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--logins', type=int, default=256)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--workers', type=int, default=None, help='pool size (default: CPU count)')
+    args = parser.parse_args()
+
+    inline = PasswordHasher(rounds=args.rounds, workers=0)
+    pooled = PasswordHasher(rounds=args.rounds, **({'workers': args.workers} if args.workers else {}))
+    stored_hash = inline.hash_password('opening-time')
+
+    print(f"{'mode':<8} {'logins/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, hasher in [('inline', inline), ('pool', pooled)]:
+        hasher.verify_password(stored_hash, 'opening-time')  # Starts the pool outside the timing
+        throughput, p50, p99 = run(args.threads, args.logins, lambda: hasher.verify_password(stored_hash, 'opening-time'))
+        print(f"{name:<8} {throughput:>9.1f} {p50:>8.1f} {p99:>8.1f}")
+    print(pooled.stats())
+    pooled.shutdown()
+
+
+if __name__ == '__main__':
+    main()
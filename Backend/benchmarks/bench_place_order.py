@@ -0,0 +1,98 @@
+"""Order write throughput: one INSERT per cart line vs. one transactional multi-row INSERT.
+
+    python benchmarks/bench_place_order.py [--rtt-ms 0.5] [--orders 200] [--lines 1 5 10 25 50]
+"""
+import argparse
+import random
+import time
+
+from _sqlite import CountingCursor, create_database
+import placeOrder
+from menuCache import MenuCache
+from placeOrder import INSERT_ORDER, INSERT_ORDER_ITEM, UPDATE_REWARDS, price_cart
+
+MENU_SIZE = 200
+
+
+def seed(connection):
+    cursor = connection.cursor()
+    cursor.executescript("CREATE TABLE UserRewards (user_id INTEGER PRIMARY KEY, orders INTEGER DEFAULT 0);")
+    cursor.executemany(
+        "INSERT INTO Menu (name, price, category) VALUES (?, ?, ?)",
+        [(f"Dish {i}", 5.0 + i % 40, "Main") for i in range(MENU_SIZE)]
+    )
+    cursor.executemany("INSERT INTO UserRewards (user_id) VALUES (?)", [(user,) for user in range(1, 101)])
+    connection.commit()
+    cursor.execute("SELECT menu_id, name, description, price, category, image_url FROM Menu")
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def legacy_order(connection, cursor, customer_id, cart):
+    total_price = sum(item['subtotal'] for item in cart)
+    cursor.execute(INSERT_ORDER, (customer_id % 20 + 1, customer_id, total_price))
+    order_id = cursor.lastrowid
+    cursor.execute(UPDATE_REWARDS, (customer_id,))
+    for item in cart:
+        cursor.execute(INSERT_ORDER_ITEM, (order_id, item['menu_id'], item['quantity'], item['subtotal']))
+    connection.commit()
+
+
+def batched_order(connection, cursor, customer_id, cart):
+    order_items, total_price = price_cart(cart)
+    try:
+        cursor.execute(INSERT_ORDER, (customer_id % 20 + 1, customer_id, total_price))
+        order_id = cursor.lastrowid
+        cursor.execute(UPDATE_REWARDS, (customer_id,))
+        cursor.executemany(INSERT_ORDER_ITEM, [
+            (order_id, menu_id, quantity, subtotal) for menu_id, _, quantity, subtotal in order_items
+        ])
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+
+def measure(connection, place, carts, rtt):
+    cursor = CountingCursor(connection.cursor(), rtt=rtt)
+    started = time.perf_counter()
+    for customer_id, cart in carts:
+        place(connection, cursor, customer_id, cart)
+        cursor.round_trips += 1  # COMMIT
+        if rtt:
+            time.sleep(rtt)
+    elapsed = time.perf_counter() - started
+    return len(carts) / elapsed, cursor.round_trips / len(carts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rtt-ms', type=float, default=0.5, help="simulated client/server round-trip")
+    parser.add_argument('--orders', type=int, default=200, help="orders per cart size")
+    parser.add_argument('--lines', type=int, nargs='+', default=[1, 5, 10, 25, 50])
+    args = parser.parse_args()
+
+    random.seed(7)
+    connection = create_database()
+    menu = seed(connection)
+    placeOrder.menu_cache = MenuCache(loader=lambda: menu)
+    rtt = args.rtt_ms / 1000
+
+    print(f"{'lines':>5} | {'per-line orders/s':>17} {'trips':>6} | {'batched orders/s':>16} {'trips':>6} | speedup")
+    for lines in args.lines:
+        carts = []
+        for order in range(args.orders):
+            cart = []
+            for menu_item in random.sample(menu, lines):
+                quantity = random.randint(1, 3)
+                cart.append({'menu_id': menu_item['menu_id'], 'quantity': quantity,
+                             'subtotal': menu_item['price'] * quantity})
+            carts.append((order % 100 + 1, cart))
+        legacy_rate, legacy_trips = measure(connection, legacy_order, carts, rtt)
+        batched_rate, batched_trips = measure(connection, batched_order, carts, rtt)
+        print(f"{lines:>5} | {legacy_rate:>17.0f} {legacy_trips:>6.0f} | "
+              f"{batched_rate:>16.0f} {batched_trips:>6.0f} | {batched_rate / legacy_rate:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
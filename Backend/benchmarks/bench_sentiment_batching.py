@@ -0,0 +1,64 @@
+"""Sentiment throughput: one predict per review vs. the micro-batching queue.
+
+    python benchmarks/bench_sentiment_batching.py [--threads 32] [--reviews 2000]
+"""
+import argparse
+import os
+import threading
+import time
+
+import joblib
+
+import _sqlite  # noqa: F401  (puts the Backend on sys.path)
+from inferenceQueue import MicroBatcher
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'model_nb.pkl')
+TEXTS = ['The momo was delicious', 'Cold food and slow service', 'It was okay', 'Loved the thali, will come again']
+
+
+def run(threads, reviews, score):
+    per_thread = reviews // threads
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for i in range(per_thread):
+            started = time.perf_counter()
+            score(TEXTS[i % len(TEXTS)])
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--reviews', type=int, default=2000)
+    parser.add_argument('--window-ms', type=float, default=3)
+    parser.add_argument('--max-batch', type=int, default=64)
+    args = parser.parse_args()
+
+    model = joblib.load(MODEL_PATH)
+    predict_batch = lambda texts: [str(label).lower() for label in model.predict(texts)]
+    batcher = MicroBatcher(predict_batch, window=args.window_ms / 1000, max_batch=args.max_batch)
+
+    print(f"{'mode':<14} {'reviews/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, score in [('inline', lambda text: predict_batch([text])[0]), ('micro-batched', batcher.submit)]:
+        throughput, p50, p99 = run(args.threads, args.reviews, score)
+        print(f"{name:<14} {throughput:>10.0f} {p50:>8.2f} {p99:>8.2f}")
+    print(batcher.stats())
+
+
+if __name__ == '__main__':
+    main()
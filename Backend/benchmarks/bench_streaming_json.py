@@ -0,0 +1,109 @@
+"""Peak memory of a large list response: fetchall + one json.dumps vs. streamed chunks.
+
+Builds a synthetic Menu and Reviews dataset in SQLite and serializes each
+table the way a list endpoint does, once materialized (every row fetched,
+turned into a dict and encoded as one string) and once through
+jsonStream (rows fetched and encoded a chunk at a time, each chunk dropped
+after it is "sent"). tracemalloc reports the peak Python allocation of
+each; time to first rows is how long before the client receives any data.
+
+    python benchmarks/bench_streaming_json.py [--rows 100000] [--chunk-size 500]
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from _sqlite import create_database
+from jsonStream import iter_rows, json_array_chunks
+
+WORDS = ('spicy', 'momo', 'thali', 'fresh', 'crispy', 'butter', 'paneer', 'garlic', 'sweet', 'tangy')
+
+REVIEWS_SCHEMA = """
+CREATE TABLE Reviews (
+    review_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    menu_id INTEGER,
+    user_id INTEGER,
+    rating INTEGER,
+    review_text TEXT,
+    sentiment TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+QUERIES = {
+    'Menu': "SELECT menu_id, name, description, price, category, image_url FROM Menu ORDER BY menu_id",
+    'Reviews': "SELECT review_id, user_id, rating, review_text, sentiment, created_at FROM Reviews ORDER BY review_id",
+}
+
+
+def seed(connection, rows):
+    rng = random.Random(7)
+    sentence = lambda n: ' '.join(rng.choice(WORDS) for _ in range(n))
+    connection.executescript(REVIEWS_SCHEMA)
+    connection.executemany(
+        "INSERT INTO Menu (name, description, price, category, image_url) VALUES (?, ?, ?, ?, ?)",
+        [(f"{sentence(2)} {i}", sentence(20), round(rng.uniform(80, 900), 2),
+          rng.choice(('Starters', 'Mains', 'Desserts', 'Drinks')), f"https://example.com/menu/{i}.jpg")
+         for i in range(rows)])
+    connection.executemany(
+        "INSERT INTO Reviews (menu_id, user_id, rating, review_text, sentiment) VALUES (?, ?, ?, ?, ?)",
+        [(rng.randint(1, rows), rng.randint(1, 5000), rng.randint(1, 5), sentence(30),
+          rng.choice(('Positive', 'Negative', 'Neutral')))
+         for _ in range(rows)])
+    connection.commit()
+
+
+def as_dicts(cursor, rows):
+    """What a dictionary=True cursor hands the endpoints."""
+    columns = [column[0] for column in cursor.description]
+    for row in rows:
+        yield dict(zip(columns, row))
+
+
+def materialized(connection, query, chunk_size):
+    cursor = connection.execute(query)
+    body = json.dumps(list(as_dicts(cursor, cursor.fetchall())), default=str)
+    yield body
+
+
+def streamed(connection, query, chunk_size):
+    cursor = connection.execute(query)
+    yield from json_array_chunks(as_dicts(cursor, iter_rows(cursor, chunk_size)), chunk_size=chunk_size)
+
+
+def measure(mode, connection, query, chunk_size):
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_rows = None
+    sent = 0
+    for chunk in mode(connection, query, chunk_size):
+        if first_rows is None and len(chunk) > 1:
+            first_rows = time.perf_counter() - started
+        sent += len(chunk)  # Written to the socket and dropped
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed, first_rows, sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help="rows in each of Menu and Reviews")
+    parser.add_argument('--chunk-size', type=int, default=500)
+    args = parser.parse_args()
+
+    connection = create_database()
+    seed(connection, args.rows)
+
+    print(f"{'table':<8} {'mode':<13} {'peak MiB':>9} {'total s':>8} {'first rows ms':>14} {'body MiB':>9}")
+    for table, query in QUERIES.items():
+        for name, mode in [('fetchall', materialized), ('streamed', streamed)]:
+            peak, elapsed, first_rows, sent = measure(mode, connection, query, args.chunk_size)
+            print(f"{table:<8} {name:<13} {peak / 2**20:>9.1f} {elapsed:>8.2f} "
+                  f"{first_rows * 1000:>14.1f} {sent / 2**20:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""Concurrent taps on the loyalty redeem endpoints: read-check-update vs. conditional UPDATE.
+
+Every customer is hit by several threads at the same instant, the way a
+double tap or a retrying client does. Each thread has its own connection to
+a file-backed SQLite database, so the transactions really interleave; a
+short simulated round-trip between statements widens the race window the
+old read-then-write code had. A customer redeemed more than once is a
+double redemption.
+
+    python benchmarks/stress_loyalty_redemption.py [--customers 200] [--taps 8] [--rtt-ms 1]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import Flask
+
+from _sqlite import CountingCursor
+import customerLoyality
+from loyaltyTiers import tier_rules, DEFAULT_TIERS
+
+SCHEMA = """
+CREATE TABLE Users (user_id INTEGER PRIMARY KEY, name TEXT, email TEXT, Image_URL TEXT);
+CREATE TABLE CustomerLoyalty (
+    user_id INTEGER PRIMARY KEY,
+    customer_name TEXT,
+    loyalty_points INTEGER,
+    discount_percentage REAL,
+    tier TEXT,
+    redeemed_discount BOOLEAN
+);
+CREATE TABLE LoyaltyActivities (
+    activity_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    description TEXT,
+    points_change INTEGER,
+    amount TEXT,
+    activity_time TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+class DictCursor(CountingCursor):
+    """CountingCursor returning rows as dicts, like mysql.connector's dictionary=True."""
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in self._cursor.description], row))
+
+
+class Connection:
+    def __init__(self, path, rtt):
+        self._connection = sqlite3.connect(path, timeout=30)
+        self.rtt = rtt
+
+    def cursor(self, dictionary=False):
+        return (DictCursor if dictionary else CountingCursor)(self._connection.cursor(), rtt=self.rtt)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+
+def seed(path, customers):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    connection.executemany("INSERT INTO Users (user_id, name) VALUES (?, ?)",
+                           [(user_id, f"Customer {user_id}") for user_id in range(1, customers + 1)])
+    # Odd customers hold an unused Silver discount, even ones a Platinum balance
+    connection.executemany("INSERT INTO CustomerLoyalty VALUES (?, ?, ?, ?, ?, 0)", [
+        (user_id, f"Customer {user_id}", 1500, 15.0, 'Silver') if user_id % 2 else
+        (user_id, f"Customer {user_id}", 3500, 50.0, 'Platinum')
+        for user_id in range(1, customers + 1)
+    ])
+    connection.commit()
+    connection.close()
+
+
+def legacy_redeem(connection, user_id):
+    """The previous handlers' shape: read, check in Python, then write."""
+    cursor = connection.cursor(dictionary=True)
+    loyalty = customerLoyality.read_loyalty(cursor, user_id)
+    if loyalty['tier'] == 'Silver':
+        if loyalty['redeemed_discount']:
+            return 403
+        cursor.execute("UPDATE CustomerLoyalty SET redeemed_discount = TRUE WHERE user_id = %s", (user_id,))
+        cursor.execute(customerLoyality.INSERT_ACTIVITY, (user_id, "You have used your redeem", 0, "15% discount"))
+    elif loyalty['tier'] == 'Platinum':
+        cursor.execute("""
+            UPDATE CustomerLoyalty
+            SET loyalty_points = 0, tier = 'Bronze', discount_percentage = 0.00, redeemed_discount = FALSE
+            WHERE user_id = %s
+        """, (user_id,))
+        cursor.execute(customerLoyality.INSERT_ACTIVITY, (
+            user_id, "Redeemed 50% Platinum discount", -loyalty['loyalty_points'], "50% discount"
+        ))
+    else:
+        return 403
+    connection.commit()
+    return 200
+
+
+def run(mode, customers, taps, rtt):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'loyalty.db')
+    seed(path, customers)
+
+    local = threading.local()
+
+    def connection():
+        if not hasattr(local, 'connection'):
+            local.connection = Connection(path, rtt)
+        return local.connection
+
+    @contextmanager
+    def get_db_connection():
+        yield connection()
+
+    customerLoyality.get_db_connection = get_db_connection
+    app = Flask(__name__)
+    app.secret_key = 'stress'
+    app.register_blueprint(customerLoyality.loyalty_bp)
+
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def tap(user_id, barrier):
+        barrier.wait()
+        if mode == 'legacy':
+            status = legacy_redeem(connection(), user_id)
+        else:
+            client = app.test_client()
+            with client.session_transaction() as session:
+                session['user_id'] = user_id
+            url = '/loyalty/redeem/silver' if user_id % 2 else '/loyalty/redeem'
+            status = client.post(url).status_code
+        with lock:
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    for user_id in range(1, customers + 1):
+        barrier = threading.Barrier(taps)
+        threads = [threading.Thread(target=tap, args=(user_id, barrier)) for _ in range(taps)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    check = sqlite3.connect(path)
+    redemptions = Counter(user_id for user_id, in check.execute("SELECT user_id FROM LoyaltyActivities"))
+    check.close()
+    doubled = sum(1 for count in redemptions.values() if count > 1)
+    print(f"{mode:>7}: {customers * taps} taps in {elapsed:.2f}s, "
+          f"{len(redemptions)}/{customers} customers redeemed, {doubled} redeemed more than once, "
+          f"statuses {dict(sorted(statuses.items()))}")
+    return doubled
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--customers', type=int, default=200)
+    parser.add_argument('--taps', type=int, default=8, help="simultaneous requests per customer")
+    parser.add_argument('--rtt-ms', type=float, default=1.0, help="simulated delay per statement")
+    args = parser.parse_args()
+
+    tier_rules._loader = lambda: DEFAULT_TIERS
+    rtt = args.rtt_ms / 1000
+    run('legacy', args.customers, args.taps, rtt)
+    doubled = run('atomic', args.customers, args.taps, rtt)
+    if doubled:
+        raise SystemExit(f"FAIL: {doubled} double redemptions with the atomic endpoints")
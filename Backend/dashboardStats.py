@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+from database import get_db_connection
+from menuCache import menu_cache
+from roles import CUSTOMER_ROLE
+
+# Full recount from MySQL at most this often; corrects drift from writes made by other workers
+RECONCILE_INTERVAL = float(os.environ.get('DASHBOARD_RECONCILE_SECONDS', 300))
+
+# Statuses whose orders count toward totalOrders/totalSales and toward per-category stats
+COMPLETED_STATUSES = ('Completed',)
+SOLD_STATUSES = ('Completed', 'Ready')
+
+
+class DashboardStats:
+    """Running totals behind the admin dashboard endpoints.
+
+    Order transitions update the counters as they commit, so reads cost the
+    same however long the order history gets. Per-item totals are grouped by
+    the item's current category at read time, from the menu cache. A full
+    recount runs in the background every RECONCILE_INTERVAL seconds; until
+    then, writes from other processes are not reflected. Changes recorded
+    while a recount is reading are logged and replayed onto its result, so
+    the swap never drops them.
+    """
+
+    def __init__(self, reconcile_interval=RECONCILE_INTERVAL):
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._reconciling = False
+        self._reconciled_at = 0.0
+        self._completed_orders = 0
+        self._total_sales = 0.0
+        self._total_customers = 0
+        self._item_quantity = defaultdict(int)  # menu_id -> quantity sold
+        self._item_revenue = defaultdict(float)  # menu_id -> revenue
+        self._delta_logs = []  # One list per in-flight reconcile of (method, args) changes
+
+    def record_transition(self, old_status, new_status, total_price, items):
+        """Apply an order status change; ``items`` are (menu_id, quantity, subtotal) rows."""
+        completed = (new_status in COMPLETED_STATUSES) - (old_status in COMPLETED_STATUSES)
+        sold = (new_status in SOLD_STATUSES) - (old_status in SOLD_STATUSES)
+        if not completed and not sold:
+            return
+        with self._lock:
+            self._log_delta(self._apply_transition, completed, sold, total_price, items)
+            self._apply_transition(completed, sold, total_price, items)
+
+    def _apply_transition(self, completed, sold, total_price, items):
+        self._completed_orders += completed
+        self._total_sales += completed * float(total_price or 0)
+        for menu_id, quantity, subtotal in items:
+            if menu_id is None:
+                continue
+            self._item_quantity[menu_id] += sold * int(quantity or 0)
+            self._item_revenue[menu_id] += sold * float(subtotal or 0)
+
+    def record_customer(self, count=1):
+        with self._lock:
+            self._log_delta(self._apply_customers, count)
+            self._apply_customers(count)
+
+    def _apply_customers(self, count):
+        self._total_customers += count
+
+    def _log_delta(self, apply, *args):
+        for log in self._delta_logs:
+            log.append((apply, args))
+
+    def summary(self):
+        self._ensure_fresh()
+        total_menu_items = len(menu_cache.all())
+        with self._lock:
+            return {
+                "totalOrders": self._completed_orders,
+                "totalSales": round(self._total_sales, 2),
+                "totalMenuItems": total_menu_items,
+                "totalCustomers": self._total_customers
+            }
+
+    def category_totals(self):
+        """[(category_label, quantity, revenue)] for every category on the menu."""
+        self._ensure_fresh()
+        menu_items = menu_cache.all()
+        quantities = defaultdict(int)
+        revenues = defaultdict(float)
+        with self._lock:
+            for item in menu_items:
+                category = item.get('category')
+                label = category if category is not None else 'Uncategorized'
+                quantities[label] += self._item_quantity.get(item['menu_id'], 0)
+                revenues[label] += self._item_revenue.get(item['menu_id'], 0.0)
+        return [(label, quantities[label], round(revenues[label], 2)) for label in quantities]
+
+    def reconcile(self):
+        # Changes recorded from here until the swap may be missing from the recount
+        deltas = []
+        with self._lock:
+            self._delta_logs.append(deltas)
+        try:
+            with get_db_connection() as connection, connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT COUNT(*), COALESCE(SUM(total_price), 0)
+                    FROM Orders
+                    WHERE order_status IN ('Completed')
+                """)
+                completed_orders, total_sales = cursor.fetchone()
+
+                cursor.execute("SELECT COUNT(*) FROM Users WHERE role = %s", (CUSTOMER_ROLE,))
+                total_customers = cursor.fetchone()[0]
+
+                cursor.execute("""
+                    SELECT oi.menu_id, COALESCE(SUM(oi.quantity), 0), COALESCE(SUM(oi.subtotal), 0)
+                    FROM OrderItems oi
+                    JOIN Orders o ON oi.order_id = o.order_id
+                    WHERE o.order_status IN ('Completed', 'Ready')
+                    GROUP BY oi.menu_id
+                """)
+                item_rows = cursor.fetchall()
+        except BaseException:
+            with self._lock:
+                self._delta_logs.remove(deltas)
+            raise
+
+        with self._lock:
+            self._delta_logs.remove(deltas)
+            self._completed_orders = completed_orders
+            self._total_sales = float(total_sales)
+            self._total_customers = total_customers
+            self._item_quantity = defaultdict(int, {row[0]: int(row[1]) for row in item_rows})
+            self._item_revenue = defaultdict(float, {row[0]: float(row[2]) for row in item_rows})
+            for apply, args in deltas:
+                apply(*args)
+            self._loaded = True
+            self._reconciled_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        if not self._loaded:
+            self.reconcile()
+            return
+        if time.monotonic() - self._reconciled_at < self.reconcile_interval:
+            return
+        with self._lock:
+            if self._reconciling:
+                return
+            self._reconciling = True
+        threading.Thread(target=self._reconcile_in_background, name='dashboard-reconcile', daemon=True).start()
+
+    def _reconcile_in_background(self):
+        try:
+            self.reconcile()
+        except Exception as e:
+            print(f"Error reconciling dashboard stats: {str(e)}")
+        finally:
+            with self._lock:
+                self._reconciling = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': self._loaded,
+                'reconciling': self._reconciling,
+                'seconds_since_reconcile': round(time.monotonic() - self._reconciled_at, 1) if self._loaded else None,
+            }
+
+
+dashboard_stats = DashboardStats()
+
+
+def fetch_order_lines(cursor, order_ids):
+    """{order_id: [(menu_id, quantity, subtotal), ...]} for many orders, for record_transition."""
+    lines = {order_id: [] for order_id in order_ids}
+    if not lines:
+        return lines
+    cursor.execute(f"""
+        SELECT order_id, menu_id, quantity, subtotal
+        FROM OrderItems
+        WHERE order_id IN ({', '.join(['%s'] * len(lines))})
+    """, list(lines))
+    for order_id, menu_id, quantity, subtotal in cursor.fetchall():
+        lines[order_id].append((menu_id, quantity, subtotal))
+    return lines
@@ -1,27 +1,195 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import mysql.connector
-import bcrypt
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
+
+DB_CONFIG = {
+    'host': os.environ.get('DB_HOST', 'localhost'),
+    'user': os.environ.get('DB_USER', 'root'),
+    'password': os.environ.get('DB_PASSWORD', ''),  # No default credential in code
+    'database': os.environ.get('DB_NAME', 'SmartHotelDB'),
+}
+
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+# Connections idle for longer than this are pinged before being handed out
+DB_POOL_PING_AFTER = float(os.environ.get('DB_POOL_PING_AFTER', 5))
+
+
+class PoolTimeout(Error):
+    pass
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections.
+
+    Connections are created lazily up to ``size``. Borrowing blocks for at most
+    ``timeout`` seconds when every connection is checked out.
+    """
+
+    def __init__(self, factory, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, ping_after=DB_POOL_PING_AFTER):
+        self._factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._idle = deque()  # (connection, returned_at)
+        self._open = 0
+        self._cond = threading.Condition()
+        self._counters = {
+            'created': 0,
+            'borrowed': 0,
+            'discarded': 0,
+            'timeouts': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+        }
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    connection, returned_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    raise PoolTimeout(msg=f"No database connection available after {self.timeout}s")
+                self._cond.wait(remaining)
+
+        try:
+            if connection is None:
+                connection = self._connect()
+            elif time.monotonic() - returned_at > self.ping_after and not self._is_alive(connection):
+                self._close_quietly(connection)
+                with self._cond:
+                    self._counters['discarded'] += 1
+                connection = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._counters['borrowed'] += 1
+            self._counters['wait_total'] += waited
+            self._counters['wait_max'] = max(self._counters['wait_max'], waited)
+        return connection
+
+    def release(self, connection, discard=False):
+        if not discard:
+            try:
+                # Never hand the next borrower an open transaction
+                if getattr(connection, 'in_transaction', False):
+                    connection.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if discard:
+                self._open -= 1
+                self._counters['discarded'] += 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+        if discard:
+            self._close_quietly(connection)
+
+    @contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        except (mysql.connector.InterfaceError, mysql.connector.OperationalError):
+            self.release(connection, discard=True)
+            raise
+        except BaseException:
+            self.release(connection)
+            raise
+        else:
+            self.release(connection)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            counters = dict(self._counters)
+            borrowed = counters['borrowed']
+            return {
+                'size': self.size,
+                'open': self._open,
+                'idle': idle,
+                'in_use': self._open - idle,
+                'created': counters['created'],
+                'borrowed': borrowed,
+                'discarded': counters['discarded'],
+                'timeouts': counters['timeouts'],
+                'avg_wait_ms': round(counters['wait_total'] / borrowed * 1000, 3) if borrowed else 0.0,
+                'max_wait_ms': round(counters['wait_max'] * 1000, 3),
+            }
+
+    def close_all(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for connection, _ in idle:
+            self._close_quietly(connection)
+
+    def _connect(self):
+        connection = self._factory()
+        with self._cond:
+            self._counters['created'] += 1
+        return connection
+
+    @staticmethod
+    def _is_alive(connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def _connect():
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+pool = ConnectionPool(_connect)
+
 
 def get_db_connection():
-    try:
-        connection = mysql.connector.connect(
-            host='localhost',  
-            user='root',        
-            password='sanjit@123',   
-            database='SmartHotelDB' 
-        )
-        if connection.is_connected():
-            return connection
-    except Error as e:
-        print(f"Error connecting to database: {e}")
+    """Borrow a pooled connection; use as ``with get_db_connection() as connection:``.
+
+    The connection goes back to the pool (with any open transaction rolled
+    back) when the block exits, so handlers never close it themselves.
+    """
+    return pool.connection()
+
+
+def duplicate_key(error):
+    """Name of the unique index an IntegrityError violated, or None for any other error."""
+    if getattr(error, 'errno', None) != errorcode.ER_DUP_ENTRY:
         return None
-    
-def hash_password(password):
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed_password.decode('utf-8')
-
-def verify_password(stored_hash, password):
-    if isinstance(stored_hash, str):
-        stored_hash = stored_hash.encode('utf-8')
-    return bcrypt.checkpw(password.encode('utf-8'), stored_hash)
\ No newline at end of file
+    # "Duplicate entry 'a@b.com' for key 'Users.uq_users_email'" (MySQL 8 prefixes the table)
+    match = re.search(r"for key '(?:[^'.]*\.)?([^']*)'", getattr(error, 'msg', '') or '')
+    return match.group(1) if match else ''
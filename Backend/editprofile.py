@@ -20,8 +20,6 @@ def allowed_file(filename):
 
 @edit_profile_bp.route('/api/update-profile', methods=['POST'])
 def update_profile():
-    connection = None
-    cursor = None
     try:
         # Check if required fields are present
         if not request.form.get('Id') or not request.form.get('fullName') or not request.form.get('phone'):
@@ -70,60 +68,50 @@ def update_profile():
                 'error': 'Phone number must be exactly 10 digits'
             }), 400
 
-        # Initialize database connection
-        connection = get_db_connection()
-        if not connection:
-            return jsonify({
-                'status': 'error',
-                'error': 'Database connection failed'
-            }), 500
-
-        cursor = connection.cursor(dictionary=True)
+        # Borrow a pooled database connection
+        with get_db_connection() as connection, connection.cursor(dictionary=True) as cursor:
+            # Find user in database
+            cursor.execute("SELECT * FROM Users WHERE user_id = %s", (user_id,))
+            user = cursor.fetchone()
 
-        # Find user in database
-        cursor.execute("SELECT * FROM Users WHERE user_id = %s", (user_id,))
-        user = cursor.fetchone()
-
-        if not user:
-            return jsonify({
-                'status': 'error',
-                'error': 'User not found'
-            }), 404
+            if not user:
+                return jsonify({
+                    'status': 'error',
+                    'error': 'User not found'
+                }), 404
 
-        # Update user details in database
+            # Update user details in database
         
-        # Update query, including profileImage if a new image was uploaded
-        if profile_image_path:
-            query = """
-                UPDATE Users
-                SET name = %s, phone = %s, Image_URL = %s
-                WHERE user_id = %s
-            """
-            cursor.execute(query, (full_name, phone, profile_image_path, user_id))
-        else:
-            query = """
-                UPDATE Users
-                SET name = %s, phone = %s
-                WHERE user_id = %s
-            """
-            cursor.execute(query, (full_name, phone, user_id))
-        # cursor.execute(
-        #     """
-        #     UPDATE Users
-        #     SET name = %s, phone = %s
-        #     WHERE user_id = %s
-        #     """,
-        #     (full_name, phone, user_id)
-        # )
-
-        connection.commit()
-
-        # Verify the update
-        #cursor.execute("SELECT username, fullName, email, phone, profileImage FROM Users WHERE username = %s", (username,))
-        cursor.execute("SELECT * FROM Users WHERE user_id = %s", (user_id,))
-        updated_user = cursor.fetchone()
-        cursor.close()
-        connection.close()
+            # Update query, including profileImage if a new image was uploaded
+            if profile_image_path:
+                query = """
+                    UPDATE Users
+                    SET name = %s, phone = %s, Image_URL = %s
+                    WHERE user_id = %s
+                """
+                cursor.execute(query, (full_name, phone, profile_image_path, user_id))
+            else:
+                query = """
+                    UPDATE Users
+                    SET name = %s, phone = %s
+                    WHERE user_id = %s
+                """
+                cursor.execute(query, (full_name, phone, user_id))
+            # cursor.execute(
+            #     """
+            #     UPDATE Users
+            #     SET name = %s, phone = %s
+            #     WHERE user_id = %s
+            #     """,
+            #     (full_name, phone, user_id)
+            # )
+
+            connection.commit()
+
+            # Verify the update
+            #cursor.execute("SELECT username, fullName, email, phone, profileImage FROM Users WHERE username = %s", (username,))
+            cursor.execute("SELECT * FROM Users WHERE user_id = %s", (user_id,))
+            updated_user = cursor.fetchone()
 
         if not updated_user:
             return jsonify({'error': 'User not found after update'}), 404
@@ -152,9 +140,4 @@ def update_profile():
 
     except Exception as e:
         print(f"Error in update_profile: {str(e)}")
-        return jsonify({'error': f'Failed to update profile: {str(e)}'}), 500
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'connection' in locals():
-            connection.close()
\ No newline at end of file
+        return jsonify({'error': f'Failed to update profile: {str(e)}'}), 500
\ No newline at end of file
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from database import get_db_connection
+
+# How long a key keeps replaying its first response
+IDEMPOTENCY_TTL = float(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 24 * 3600))
+# Completed responses kept in process memory so replays skip MySQL
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', 10000))
+# Expired rows are deleted from MySQL at most this often
+PURGE_INTERVAL = 600
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request body."""
+
+
+def fingerprint(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class IdempotencyStore:
+    """Responses of completed write requests, replayed when a client retries with the same key.
+
+    Rows live in IdempotencyKeys (migrations/002_idempotency_keys.sql) and
+    are written by ``claim``/``complete`` inside the caller's own
+    transaction, so a response is stored exactly when its write commits. A
+    duplicate from another worker blocks on the primary key until the first
+    commits, then fails with a duplicate-key error and replays. Duplicates
+    within one process wait on a per-key lock instead and never reach MySQL.
+    """
+
+    def __init__(self, ttl=IDEMPOTENCY_TTL, cache_size=IDEMPOTENCY_CACHE_SIZE):
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # (scope, key) -> (expires_at, request_hash, status, body)
+        self._key_locks = {}  # (scope, key) -> [lock, waiters]
+        self._purged_at = 0.0
+        self._counters = {'replayed': 0, 'recorded': 0, 'coalesced': 0, 'conflicts': 0}
+
+    @contextmanager
+    def hold(self, scope, key):
+        """Serialize requests carrying the same key within this process."""
+        cache_key = (scope, key)
+        with self._lock:
+            entry = self._key_locks.setdefault(cache_key, [threading.Lock(), 0])
+            entry[1] += 1
+            if entry[1] > 1:
+                self._counters['coalesced'] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[cache_key]
+
+    def replay(self, scope, key, request_hash):
+        """(status, body) stored for this key, or None; raises IdempotencyConflict on a body mismatch."""
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get((scope, key))
+            if cached is not None and cached[0] <= now:
+                del self._cache[(scope, key)]
+                cached = None
+        if cached is None:
+            cached = self._load(scope, key, now)
+            if cached is None:
+                return None
+            self._remember(scope, key, cached)
+
+        _, stored_hash, status, body = cached
+        if stored_hash != request_hash:
+            self._count('conflicts')
+            raise IdempotencyConflict(key)
+        self._count('replayed')
+        return status, body
+
+    def claim(self, cursor, scope, key, request_hash):
+        """Reserve the key on the caller's open transaction, before its writes.
+
+        Raises a duplicate-key IntegrityError if another request already
+        committed this key; if that request is still in flight, this blocks
+        on its row lock until it commits or rolls back.
+        """
+        cursor.execute("""
+            INSERT INTO IdempotencyKeys (scope, idempotency_key, request_hash, expires_at)
+            VALUES (%s, %s, %s, %s)
+        """, (scope, key, request_hash, time.time() + self.ttl))
+
+    def complete(self, cursor, scope, key, status, body):
+        """Attach the response to a claimed key, still inside the caller's transaction."""
+        cursor.execute("""
+            UPDATE IdempotencyKeys SET status = %s, response = %s
+            WHERE scope = %s AND idempotency_key = %s
+        """, (status, json.dumps(body), scope, key))
+
+    def committed(self, scope, key, request_hash, status, body):
+        """Cache a response after its transaction committed."""
+        self._remember(scope, key, (time.time() + self.ttl, request_hash, status, body))
+        self._count('recorded')
+        self._purge_expired()
+
+    def _load(self, scope, key, now):
+        with get_db_connection() as connection, connection.cursor(buffered=True) as cursor:
+            cursor.execute("""
+                SELECT request_hash, status, response, expires_at
+                FROM IdempotencyKeys WHERE scope = %s AND idempotency_key = %s
+            """, (scope, key))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            request_hash, status, response, expires_at = row
+            if expires_at <= now:
+                cursor.execute(
+                    "DELETE FROM IdempotencyKeys WHERE scope = %s AND idempotency_key = %s AND expires_at <= %s",
+                    (scope, key, now)
+                )
+                connection.commit()
+                return None
+        return expires_at, request_hash, status, json.loads(response)
+
+    def _remember(self, scope, key, entry):
+        with self._lock:
+            self._cache[(scope, key)] = entry
+            self._cache.move_to_end((scope, key))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _purge_expired(self):
+        now = time.time()
+        with self._lock:
+            if now - self._purged_at < PURGE_INTERVAL:
+                return
+            self._purged_at = now
+            for cache_key in [k for k, entry in self._cache.items() if entry[0] <= now]:
+                del self._cache[cache_key]
+        try:
+            with get_db_connection() as connection, connection.cursor() as cursor:
+                cursor.execute("DELETE FROM IdempotencyKeys WHERE expires_at <= %s", (now,))
+                connection.commit()
+        except Exception as e:
+            print(f"Error purging idempotency keys: {str(e)}")
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cached': len(self._cache),
+                'in_flight_keys': len(self._key_locks),
+                **self._counters,
+            }
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,127 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class InferenceQueueFull(Exception):
+    pass
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item predictions into batched calls.
+
+    Callers block in ``submit``; one worker thread takes the first waiting
+    item, keeps collecting for up to ``window`` seconds or ``max_batch``
+    items, runs ``predict_batch`` once over the batch and hands every caller
+    its own result. When traffic is idle the window is skipped, so a lone
+    request pays no batching delay. The queue is bounded: when it stays full
+    for ``enqueue_timeout`` seconds, ``submit`` raises InferenceQueueFull. A
+    caller waits at most ``result_timeout`` seconds for its result.
+    """
+
+    def __init__(self, predict_batch, window=0.003, max_batch=64, max_queue=1024, enqueue_timeout=0.05,
+                 result_timeout=10.0):
+        self._predict_batch = predict_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.enqueue_timeout = enqueue_timeout
+        self.result_timeout = result_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._counters = {
+            'submitted': 0,
+            'rejected': 0,
+            'batches': 0,
+            'items': 0,
+            'max_batch_seen': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+            'predict_total': 0.0,
+        }
+        self._batch_sizes = {}  # batch size -> count
+
+    def submit(self, item, timeout=None):
+        """Result for ``item``; raises concurrent.futures.TimeoutError after ``timeout`` (default result_timeout)."""
+        self._ensure_worker()
+        future = Future()
+        try:
+            self._queue.put((item, time.monotonic(), future), timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self._counters['rejected'] += 1
+            raise InferenceQueueFull("Inference queue is full")
+        with self._stats_lock:
+            self._counters['submitted'] += 1
+        return future.result(self.result_timeout if timeout is None else timeout)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        last_batch_size = 1
+        while True:
+            batch = [self._queue.get()]
+            # A lone request while the previous batch was also a single one means
+            # the queue is idle: dispatch it at once instead of waiting the window.
+            idle = last_batch_size == 1 and self._queue.empty()
+            deadline = time.monotonic() + (0 if idle else self.window)
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+            last_batch_size = len(batch)
+
+    def _dispatch(self, batch):
+        started = time.monotonic()
+        waits = [started - enqueued for _, enqueued, _ in batch]
+        try:
+            results = list(self._predict_batch([item for item, _, _ in batch]))
+            if len(results) != len(batch):
+                raise ValueError(f"predict_batch returned {len(results)} results for {len(batch)} items")
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            # Every caller still waiting gets the error rather than blocking
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+        with self._stats_lock:
+            counters = self._counters
+            counters['batches'] += 1
+            counters['items'] += len(batch)
+            counters['max_batch_seen'] = max(counters['max_batch_seen'], len(batch))
+            counters['wait_total'] += sum(waits)
+            counters['wait_max'] = max(counters['wait_max'], max(waits))
+            counters['predict_total'] += time.monotonic() - started
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+
+    def stats(self):
+        with self._stats_lock:
+            counters = dict(self._counters)
+            batches, items = counters['batches'], counters['items']
+            return {
+                'window_ms': self.window * 1000,
+                'max_batch': self.max_batch,
+                'queue_depth': self._queue.qsize(),
+                'submitted': counters['submitted'],
+                'rejected': counters['rejected'],
+                'batches': batches,
+                'avg_batch_size': round(items / batches, 2) if batches else 0.0,
+                'max_batch_size': counters['max_batch_seen'],
+                'batch_size_histogram': dict(sorted(self._batch_sizes.items())),
+                'avg_queue_wait_ms': round(counters['wait_total'] / items * 1000, 3) if items else 0.0,
+                'max_queue_wait_ms': round(counters['wait_max'] * 1000, 3),
+                'avg_predict_ms': round(counters['predict_total'] / batches * 1000, 3) if batches else 0.0,
+            }
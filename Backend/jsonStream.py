@@ -0,0 +1,45 @@
+import json
+import os
+
+from flask import Response, request
+
+# Rows fetched per round-trip, and serialized per chunk written to the client
+STREAM_CHUNK_ROWS = int(os.environ.get('STREAM_CHUNK_ROWS', 500))
+
+
+def wants_stream():
+    """True when the client asked for a streamed response with ``?stream=1``."""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def iter_rows(cursor, chunk_size=STREAM_CHUNK_ROWS):
+    """Rows of an executed query, ``chunk_size`` at a time, without holding the whole result."""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def json_array_chunks(items, transform=None, chunk_size=STREAM_CHUNK_ROWS):
+    """Encode ``items`` as one JSON array, yielded in pieces of up to ``chunk_size`` elements."""
+    yield '['
+    separator = ''
+    batch = []
+    for item in items:
+        batch.append(json.dumps(transform(item) if transform else item, default=str))
+        if len(batch) >= chunk_size:
+            yield separator + ','.join(batch)
+            separator, batch = ',', []
+    if batch:
+        yield separator + ','.join(batch)
+    yield ']'
+
+
+def json_stream_response(items, transform=None, status=200):
+    """A chunked application/json response that serializes ``items`` as the client reads it."""
+    response = Response(json_array_chunks(items, transform), status=status, mimetype='application/json')
+    if hasattr(items, 'close'):
+        # Runs however the response ends, including a client disconnect mid-stream
+        response.call_on_close(items.close)
+    return response
@@ -1,22 +1,27 @@
 from flask import Blueprint, jsonify, request, session
 from database import get_db_connection
-import bcrypt
+from passwordHasher import password_hasher
 
 # Define the Blueprint
 login_bp = Blueprint('login', __name__)
 
 
-def verify_password(stored_hash, password):
+def upgrade_password_hash(user_id, password, stored_hash):
+    """Re-hash a password stored at an outdated bcrypt cost in the background; the login never waits."""
+    def store(new_hash):
+        try:
+            with get_db_connection() as connection, connection.cursor() as cursor:
+                # Skipped if the password was changed while the new hash was computed
+                cursor.execute("UPDATE Users SET password = %s WHERE user_id = %s AND password = %s",
+                               (new_hash, user_id, stored_hash))
+                connection.commit()
+        except Exception as e:
+            print(f"Error upgrading password hash for user {user_id}: {str(e)}")
+
     try:
- 
-        if isinstance(stored_hash, str):
-            stored_hash = stored_hash.encode('utf-8')
-        # Ensure password is in bytes
-        password = password.encode('utf-8')
-        return bcrypt.checkpw(password, stored_hash)
+        password_hasher.rehash(password, store)
     except Exception as e:
-        print(f"Password verification failed: {str(e)}")
-        return False
+        print(f"Error upgrading password hash for user {user_id}: {str(e)}")
 
 # Login route
 @login_bp.route('/login', methods=['POST'])
@@ -29,40 +34,39 @@ def login():
         if not email or not password:
             return jsonify({"error": "Missing required fields"}), 400
 
-        connection = get_db_connection()
-        if connection:
+        with get_db_connection() as connection:
             cursor = connection.cursor(dictionary=True)
             cursor.execute("SELECT * FROM Users WHERE email = %s", (email,))
             user = cursor.fetchone()
             cursor.close()
-            connection.close()
 
-            if not user:
-                return jsonify({"error": "Email or Password do not match"}), 401
+        if not user:
+            return jsonify({"error": "Email or Password do not match"}), 401
 
-            stored_hash = user['password']
-            if verify_password(stored_hash, password):
-                session['user_id'] = user['user_id']
-                session['role'] = user['role']
-                session['name'] = user['name']
-                session['email'] = user['email']
-                session['Image_URL'] = user['Image_URL']
-                session['phone'] = user['phone']
+        stored_hash = user['password']
+        if password_hasher.verify_password(stored_hash, password):
+            if password_hasher.needs_rehash(stored_hash):
+                upgrade_password_hash(user['user_id'], password, stored_hash)
 
-                return jsonify({
-                    "message": "Login successful",
-                    "user_id": user['user_id'],
-                    "role": user['role'],
-                    "name": user['name'],
-                    "email": user['email'],
-                    "Image_URL": user['Image_URL'],
-                    "phone": user['phone']
-                }), 200
-            else:
-                return jsonify({"error": "Email or Password do not match"}), 401
+            session['user_id'] = user['user_id']
+            session['role'] = user['role']
+            session['name'] = user['name']
+            session['email'] = user['email']
+            session['Image_URL'] = user['Image_URL']
+            session['phone'] = user['phone']
 
-        return jsonify({"error": "Database connection failed"}), 500
+            return jsonify({
+                "message": "Login successful",
+                "user_id": user['user_id'],
+                "role": user['role'],
+                "name": user['name'],
+                "email": user['email'],
+                "Image_URL": user['Image_URL'],
+                "phone": user['phone']
+            }), 200
+        else:
+            return jsonify({"error": "Email or Password do not match"}), 401
 
     except Exception as e:
         print(f"Error: {str(e)}")
-        return jsonify({"error": "Internal Server Error"}),500
\ No newline at end of file
+        return jsonify({"error": "Internal Server Error"}),500
@@ -0,0 +1,212 @@
+"""Loyalty points and tiers, kept up to date as orders complete.
+
+``credit_completed_orders`` runs inside the order transition transaction,
+so a customer's points move exactly when their order commits as
+Completed. ``rebuild`` recomputes every balance from Orders and the
+redemptions logged in LoyaltyActivities, for repairing drift or seeding
+the table for the first time. ``retier`` moves every member onto the
+current tier table after its thresholds change.
+
+    python loyaltyLedger.py rebuild [--chunk-size 1000] [--dry-run]
+    python loyaltyLedger.py retier [--chunk-size 5000] [--dry-run]
+"""
+import argparse
+import time
+from collections import Counter
+
+from database import get_db_connection
+from httpCache import data_versions
+from loyaltyTiers import tier_rules
+from roles import CUSTOMER_ROLE
+
+POINTS_PER_COMPLETED_ORDER = 50
+
+INSERT_ACTIVITY = """
+INSERT INTO LoyaltyActivities (user_id, description, points_change, amount)
+VALUES (%s, %s, %s, %s)
+"""
+
+
+def tier_change_message(tier, discount):
+    return f"For {tier} you will get {int(discount)}% discount"
+
+
+def loyalty_version(user_id):
+    """data_versions name bumped whenever a user's loyalty record changes."""
+    return f'loyalty:{user_id}'
+
+
+def credit_completed_orders(cursor, customer_ids):
+    """Credit points for orders that just completed, on the caller's open transaction.
+
+    ``customer_ids`` has one entry per completed order. Points are added
+    with one additive upsert, so concurrent completions never overwrite
+    each other; tier changes are then written and logged as activities.
+    Returns the ids of the customers credited.
+    """
+    earned = Counter(customer_id for customer_id in customer_ids if customer_id is not None)
+    if not earned:
+        return []
+    user_ids = list(earned)
+    placeholders = ', '.join(['%s'] * len(user_ids))
+
+    # New members start on the lowest tier and are moved up below like everyone else
+    table = tier_rules.table()
+    lowest_tier, lowest_discount = table.lowest
+    cursor.execute(f"""
+        INSERT INTO CustomerLoyalty (user_id, customer_name, loyalty_points, discount_percentage, tier, redeemed_discount)
+        SELECT user_id, name, CASE user_id {' '.join(['WHEN %s THEN %s'] * len(user_ids))} END, %s, %s, FALSE
+        FROM Users WHERE user_id IN ({placeholders})
+        ON DUPLICATE KEY UPDATE loyalty_points = loyalty_points + VALUES(loyalty_points)
+    """, [value for user_id in user_ids for value in (user_id, earned[user_id] * POINTS_PER_COMPLETED_ORDER)]
+         + [lowest_discount, lowest_tier] + user_ids)
+
+    cursor.execute(f"""
+        SELECT user_id, loyalty_points, tier FROM CustomerLoyalty
+        WHERE user_id IN ({placeholders}) FOR UPDATE
+    """, user_ids)
+    changes = []
+    for user_id, points, old_tier in cursor.fetchall():
+        tier, discount = table.tier_for(points)
+        if tier != old_tier:
+            changes.append((user_id, tier, discount))
+
+    for user_id, tier, discount in changes:
+        cursor.execute("""
+            UPDATE CustomerLoyalty SET tier = %s, discount_percentage = %s WHERE user_id = %s
+        """, (tier, discount, user_id))
+    log_tier_changes(cursor, changes)
+    return user_ids
+
+
+def log_tier_changes(cursor, changes):
+    """One LoyaltyActivities row per (user_id, tier, discount) change."""
+    if changes:
+        cursor.executemany(INSERT_ACTIVITY, [
+            (user_id, tier_change_message(tier, discount), 0, f"{discount}% discount")
+            for user_id, tier, discount in changes
+        ])
+
+
+SELECT_BALANCES = """
+    SELECT u.user_id, u.name,
+           (SELECT COUNT(*) FROM Orders o
+            WHERE o.customer_id = u.user_id AND o.order_status = 'Completed') AS completed_orders,
+           (SELECT COALESCE(SUM(a.points_change), 0) FROM LoyaltyActivities a
+            WHERE a.user_id = u.user_id AND a.points_change < 0) AS points_spent
+    FROM Users u
+    WHERE u.role = %s AND u.user_id > %s
+    ORDER BY u.user_id
+    LIMIT %s
+"""
+
+UPSERT_BALANCE = """
+INSERT INTO CustomerLoyalty (user_id, customer_name, loyalty_points, discount_percentage, tier, redeemed_discount)
+VALUES (%s, %s, %s, %s, %s, FALSE)
+ON DUPLICATE KEY UPDATE
+    loyalty_points = VALUES(loyalty_points),
+    discount_percentage = VALUES(discount_percentage),
+    tier = VALUES(tier)
+"""
+
+
+def rebuild(chunk_size=1000, dry_run=False):
+    """Recompute every customer's balance: points per completed order, less points redeemed."""
+    table = tier_rules.table()
+    last_id = 0
+    rebuilt = 0
+    started = time.perf_counter()
+    while True:
+        with get_db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute(SELECT_BALANCES, (CUSTOMER_ROLE, last_id, chunk_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            balances = []
+            for user_id, name, completed_orders, points_spent in rows:
+                points = max(0, completed_orders * POINTS_PER_COMPLETED_ORDER + int(points_spent))
+                tier, discount = table.tier_for(points)
+                balances.append((user_id, name, points, discount, tier))
+            if not dry_run:
+                cursor.executemany(UPSERT_BALANCE, balances)
+                connection.commit()
+                data_versions.bump(*(loyalty_version(row[0]) for row in rows))
+
+        last_id = rows[-1][0]
+        rebuilt += len(rows)
+        elapsed = time.perf_counter() - started
+        print(f"Rebuilt {rebuilt} loyalty balances (up to user_id {last_id}), {rebuilt / elapsed:.0f} users/s")
+
+    return rebuilt
+
+
+def retier(chunk_size=5000, dry_run=False):
+    """Re-evaluate every member against the current tier table, one chunk per transaction.
+
+    Walks CustomerLoyalty in user_id order, locking one chunk at a time;
+    the rows whose tier or discount changed move in a single CASE UPDATE
+    and tier changes are logged as activities. Only a chunk is ever locked,
+    so orders keep completing while this runs. Returns how many members
+    were updated.
+    """
+    tier_rules.invalidate()
+    table = tier_rules.table()
+    last_id = 0
+    scanned = updated = 0
+    started = time.perf_counter()
+    while True:
+        with get_db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT user_id, loyalty_points, tier, discount_percentage FROM CustomerLoyalty
+                WHERE user_id > %s ORDER BY user_id LIMIT %s FOR UPDATE
+            """, (last_id, chunk_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            moves, changes = [], []
+            for user_id, points, old_tier, old_discount in rows:
+                tier, discount = table.tier_for(points or 0)
+                if tier != old_tier or float(old_discount or 0) != discount:
+                    moves.append((user_id, tier, discount))
+                    if tier != old_tier:
+                        changes.append((user_id, tier, discount))
+            if moves and not dry_run:
+                cases = ' '.join(['WHEN %s THEN %s'] * len(moves))
+                cursor.execute(f"""
+                    UPDATE CustomerLoyalty
+                    SET tier = CASE user_id {cases} END,
+                        discount_percentage = CASE user_id {cases} END
+                    WHERE user_id IN ({', '.join(['%s'] * len(moves))})
+                """, [value for user_id, tier, _ in moves for value in (user_id, tier)]
+                     + [value for user_id, _, discount in moves for value in (user_id, discount)]
+                     + [user_id for user_id, _, _ in moves])
+                log_tier_changes(cursor, changes)
+                connection.commit()
+                data_versions.bump(*(loyalty_version(user_id) for user_id, _, _ in moves))
+            else:
+                connection.rollback()
+
+        last_id = rows[-1][0]
+        scanned += len(rows)
+        updated += len(moves)
+        elapsed = time.perf_counter() - started
+        print(f"Re-tiered {scanned} members (up to user_id {last_id}), {updated} updated, {scanned / elapsed:.0f} members/s")
+
+    return updated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Maintain CustomerLoyalty balances and tiers")
+    parser.add_argument('command', choices=('rebuild', 'retier'),
+                        help="rebuild: recompute balances from Orders; retier: apply the current tier table")
+    parser.add_argument('--chunk-size', type=int)
+    parser.add_argument('--dry-run', action='store_true', help="compute but do not write back")
+    args = parser.parse_args()
+    if args.command == 'rebuild':
+        total = rebuild(args.chunk_size or 1000, args.dry_run)
+        print(f"Done: {total} customers")
+    else:
+        total = retier(args.chunk_size or 5000, args.dry_run)
+        print(f"Done: {total} members updated")
@@ -0,0 +1,109 @@
+"""Loyalty tier thresholds and discounts, loaded once and cached.
+
+The table comes from LOYALTY_TIERS (a JSON list of
+``[min_points, tier, discount_percentage]``) if set, otherwise from the
+LoyaltyTiers table (migrations/007_loyalty_tiers.sql). After changing the
+thresholds, move existing members onto them with
+``python loyaltyLedger.py retier``.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+
+from mysql.connector import Error as MySQLError
+
+from database import get_db_connection
+
+# Other workers pick up edited thresholds within this many seconds
+LOYALTY_TIERS_TTL = float(os.environ.get('LOYALTY_TIERS_TTL', 300))
+
+# Used when neither LOYALTY_TIERS nor the LoyaltyTiers table provides any rows
+DEFAULT_TIERS = (
+    (0, 'Bronze', 0.00),
+    (1000, 'Silver', 15.00),
+    (2000, 'Gold', 25.00),
+    (3000, 'Platinum', 50.00),
+)
+
+
+class TierTable:
+    """An immutable, ascending tier ladder; lookups are a bisect over the thresholds."""
+
+    def __init__(self, tiers):
+        tiers = sorted((int(minimum), name, float(discount)) for minimum, name, discount in tiers)
+        if not tiers:
+            raise ValueError("At least one loyalty tier is required")
+        self.tiers = tuple(tiers)
+        self._thresholds = [minimum for minimum, _, _ in tiers]
+        self._by_name = {name: (minimum, discount) for minimum, name, discount in tiers}
+
+    @property
+    def lowest(self):
+        """(tier, discount_percentage) a balance falls back to, e.g. after a reset."""
+        return self.tiers[0][1:]
+
+    def tier_for(self, points):
+        """(tier, discount_percentage) for a points balance."""
+        index = bisect_right(self._thresholds, points) - 1
+        return self.tiers[max(index, 0)][1:]
+
+    def points_to_next(self, points):
+        index = bisect_right(self._thresholds, points)
+        return self._thresholds[index] - points if index < len(self._thresholds) else 0
+
+    def discount(self, tier):
+        """Discount percentage of a named tier, or None if there is no such tier."""
+        entry = self._by_name.get(tier)
+        return entry[1] if entry else None
+
+
+def _load_tiers():
+    configured = os.environ.get('LOYALTY_TIERS')
+    if configured:
+        return json.loads(configured)
+    try:
+        with get_db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT min_points, tier, discount_percentage FROM LoyaltyTiers")
+            rows = cursor.fetchall()
+    except MySQLError as e:
+        print(f"Error loading loyalty tiers, using defaults: {str(e)}")
+        return DEFAULT_TIERS
+    return rows or DEFAULT_TIERS
+
+
+class TierRules:
+    """Process-level cache of the tier table, reloaded every LOYALTY_TIERS_TTL seconds."""
+
+    def __init__(self, loader=_load_tiers, ttl=LOYALTY_TIERS_TTL):
+        self._loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._table = None
+        self._loaded_at = 0.0
+        self._counters = {'loads': 0}
+
+    def table(self):
+        with self._lock:
+            if self._table is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self._table = TierTable(self._loader())
+                self._loaded_at = time.monotonic()
+                self._counters['loads'] += 1
+            return self._table
+
+    def invalidate(self):
+        with self._lock:
+            self._table = None
+
+    def stats(self):
+        table = self.table()
+        with self._lock:
+            return {
+                'tiers': [{'min_points': m, 'tier': t, 'discount_percentage': d} for m, t, d in table.tiers],
+                'age_seconds': round(time.monotonic() - self._loaded_at, 1),
+                **self._counters,
+            }
+
+
+tier_rules = TierRules()
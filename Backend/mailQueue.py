@@ -0,0 +1,283 @@
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+SMTP_HOST = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
+# Credentials have no defaults; leave both unset for an unauthenticated relay
+# (e.g. a local aiosmtpd with SMTP_STARTTLS=0)
+SMTP_USER = os.environ.get('SMTP_USER')
+SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', '1') == '1'
+MAIL_FROM = os.environ.get('MAIL_FROM', SMTP_USER or 'smarthotel@localhost')
+
+MAIL_QUEUE_PATH = os.environ.get('MAIL_QUEUE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mail_queue.db'))
+MAIL_WORKERS = int(os.environ.get('MAIL_WORKERS', 2))
+MAIL_MAX_ATTEMPTS = int(os.environ.get('MAIL_MAX_ATTEMPTS', 5))
+MAIL_RETRY_BASE = float(os.environ.get('MAIL_RETRY_BASE_SECONDS', 2))
+# Timeout of each blocking SMTP step (connect, STARTTLS, login, send)
+SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', 30))
+# A 'sending' claim older than this belongs to a worker that died mid-send and is
+# retried; it must outlast a slow but live send, which can block on several steps
+MAIL_CLAIM_TIMEOUT = float(os.environ.get('MAIL_CLAIM_TIMEOUT', SMTP_TIMEOUT * 5))
+# Authenticated sessions idle longer than this are closed rather than reused
+SMTP_IDLE_TIMEOUT = float(os.environ.get('SMTP_IDLE_TIMEOUT', 60))
+# How often idle workers look for retries that have become due
+POLL_INTERVAL = 1.0
+# Longest a worker waits before retrying after the outbox itself failed
+MAX_CLAIM_BACKOFF = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    to_addr TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    claimed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+def check_config():
+    """Raise RuntimeError if only one of SMTP_USER and SMTP_PASSWORD is set; both or neither is fine."""
+    if bool(SMTP_USER) != bool(SMTP_PASSWORD):
+        missing = 'SMTP_PASSWORD' if SMTP_USER else 'SMTP_USER'
+        raise RuntimeError(f"SMTP_USER and SMTP_PASSWORD must be set together; {missing} is missing")
+    if not SMTP_USER:
+        print(f"Mail queue: no SMTP credentials set, sending to {SMTP_HOST}:{SMTP_PORT} without logging in")
+
+
+class SMTPSession:
+    """One worker's SMTP connection, kept open and logged in between messages."""
+
+    def __init__(self, host, port, user, password, starttls):
+        self.host, self.port = host, port
+        self.user, self.password = user, password
+        self.starttls = starttls
+        self._server = None
+        self._last_used = 0.0
+
+    def send(self, to_addr, message):
+        if self._server is not None and time.monotonic() - self._last_used > SMTP_IDLE_TIMEOUT:
+            self.close()
+        try:
+            self._connect().sendmail(MAIL_FROM, to_addr, message)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped a reused session; retry once on a fresh one
+            self.close()
+            self._connect().sendmail(MAIL_FROM, to_addr, message)
+        self._last_used = time.monotonic()
+
+    def _connect(self):
+        if self._server is None:
+            server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+            if self.starttls:
+                server.starttls()
+            if self.user:
+                server.login(self.user, self.password)
+            self._server = server
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+
+class MailQueue:
+    """Durable outbound mail queue drained by a pool of SMTP worker threads.
+
+    Messages are written to a SQLite outbox before ``enqueue`` returns, so
+    they survive restarts. Workers claim due messages, reuse their
+    authenticated session, and reschedule failures with exponential backoff
+    until MAIL_MAX_ATTEMPTS, after which the message is marked 'failed'.
+    Several processes may share the outbox: a claim is only taken over once
+    it is older than MAIL_CLAIM_TIMEOUT, so a live send is never repeated.
+    """
+
+    def __init__(self, path=MAIL_QUEUE_PATH, workers=MAIL_WORKERS, session_factory=None):
+        self.path = path
+        self.workers = workers
+        self._session_factory = session_factory or (
+            lambda: SMTPSession(SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SMTP_STARTTLS)
+        )
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._stopping = False
+        self._initialized = False
+
+    def _db(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def _init_db(self):
+        if self._initialized:
+            return
+        connection = self._db()
+        try:
+            connection.executescript(SCHEMA)
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(outbox)")}
+            if 'claimed_at' not in columns:
+                # Outboxes created before claims were timestamped
+                connection.execute("ALTER TABLE outbox ADD COLUMN claimed_at REAL")
+        finally:
+            connection.close()
+        self._initialized = True
+
+    def enqueue(self, to_addr, subject, body):
+        self.start()
+        now = time.time()
+        connection = self._db()
+        try:
+            cursor = connection.execute(
+                "INSERT INTO outbox (to_addr, subject, body, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (to_addr, subject, body, now, now)
+            )
+            message_id = cursor.lastrowid
+        finally:
+            connection.close()
+        with self._wakeup:
+            self._wakeup.notify()
+        return message_id
+
+    def start(self):
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            self._init_db()
+            self._stopping = False
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'mail-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        self._stopping = True
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _claim(self, connection):
+        """Claim the next due message, or one whose claim went stale with its worker."""
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT id, to_addr, subject, body, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                row = connection.execute(
+                    "SELECT id, to_addr, subject, body, attempts FROM outbox "
+                    "WHERE status = 'sending' AND (claimed_at IS NULL OR claimed_at < ?) "
+                    "ORDER BY next_attempt_at LIMIT 1",
+                    (now - MAIL_CLAIM_TIMEOUT,)
+                ).fetchone()
+                if row:
+                    print(f"Email {row[0]} to {row[1]} was claimed by a worker that stopped, retrying")
+            if row:
+                connection.execute("UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ?", (now, row[0]))
+            connection.execute("COMMIT")
+            return row
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _work(self):
+        session = self._session_factory()
+        connection = self._db()
+        try:
+            failures = 0
+            while not self._stopping:
+                try:
+                    row = self._claim(connection)
+                except sqlite3.Error as e:
+                    # Locked or failing outbox: back off and keep the worker alive
+                    failures += 1
+                    delay = min(POLL_INTERVAL * (2 ** failures), MAX_CLAIM_BACKOFF)
+                    print(f"Error claiming email from the outbox ({str(e)}), retrying in {delay:.1f}s")
+                    with self._wakeup:
+                        self._wakeup.wait(delay)
+                    continue
+                failures = 0
+                if row is None:
+                    with self._wakeup:
+                        self._wakeup.wait(POLL_INTERVAL)
+                    continue
+
+                message_id, to_addr, subject, body, attempts = row
+                try:
+                    session.send(to_addr, build_message(to_addr, subject, body))
+                except Exception as e:
+                    session.close()
+                    attempts += 1
+                    if attempts >= MAIL_MAX_ATTEMPTS:
+                        status, next_attempt_at = 'failed', time.time()
+                        print(f"Giving up on email {message_id} to {to_addr} after {attempts} attempts: {str(e)}")
+                    else:
+                        delay = MAIL_RETRY_BASE * (2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+                        status, next_attempt_at = 'pending', time.time() + delay
+                        print(f"Email {message_id} to {to_addr} failed ({str(e)}), retrying in {delay:.1f}s")
+                    self._record(connection, message_id,
+                                 "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                                 (status, attempts, next_attempt_at, str(e), message_id))
+                else:
+                    print(f"Email {message_id} sent successfully to {to_addr}")
+                    self._record(connection, message_id, "DELETE FROM outbox WHERE id = ?", (message_id,))
+        finally:
+            session.close()
+            connection.close()
+
+    def _record(self, connection, message_id, query, params):
+        """Write a send's outcome; on failure the claim goes stale and the message is retried later."""
+        try:
+            connection.execute(query, params)
+        except sqlite3.Error as e:
+            print(f"Error recording the outcome of email {message_id}: {str(e)}")
+
+    def stats(self):
+        self._init_db()
+        connection = self._db()
+        try:
+            counts = dict(connection.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        finally:
+            connection.close()
+        return {
+            'workers': len(self._threads),
+            'pending': counts.get('pending', 0),
+            'sending': counts.get('sending', 0),
+            'failed': counts.get('failed', 0),
+        }
+
+
+def build_message(to_addr, subject, body):
+    msg = MIMEMultipart()
+    msg['From'] = MAIL_FROM
+    msg['To'] = to_addr
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg.as_string()
+
+
+mail_queue = MailQueue()
@@ -1,36 +1,39 @@
 from flask import Blueprint, jsonify, request
-from database import get_db_connection
+from httpCache import conditional
+from jsonStream import json_stream_response, wants_stream
+from menuCache import menu_cache
+from menuSearch import search_menu
+from reviewSummary import review_summaries
 
 # Define the Blueprint
 menu_bp = Blueprint('menu', __name__)
 
+
+def with_review_summary(item):
+    # Each item carries its review summary, also served from memory
+    return dict(item, review_summary=review_summaries.get(item['menu_id']))
+
+
 # Route to fetch all menu items with optional search
 @menu_bp.route('/menu', methods=['GET'])
+@conditional(lambda: ('menu', menu_cache.current_version(), review_summaries.current_version()))
 def get_menu():
     try:
         search_query = request.args.get('search', '').strip() 
-        connection = get_db_connection()
-        if not connection:
-            return jsonify({"error": "Database connection failed"}), 500
-
-        cursor = connection.cursor(dictionary=True)
-        
+        # Served from the in-process menu cache; MenuManagement keeps it current
         if search_query:
-
-            query = "SELECT * FROM Menu WHERE LOWER(name) LIKE %s"
-            cursor.execute(query, (f'%{search_query.lower()}%',))
+            limit = request.args.get('limit', type=int)
+            menu_items = search_menu(search_query, limit)
         else:
-            # Fetch all items if no search query
-            cursor.execute("SELECT * FROM Menu")
-        
-        menu_items = cursor.fetchall()
-        cursor.close()
-        connection.close()
+            menu_items = menu_cache.all()
 
         if not menu_items:
             return jsonify({"message": "No menu items found"}), 200
 
-        return jsonify(menu_items), 200
+        if wants_stream():
+            # Serialized item by item as the client reads, instead of as one string
+            return json_stream_response(menu_items, transform=with_review_summary), 200
+        return jsonify([with_review_summary(item) for item in menu_items]), 200
 
     except Exception as e:
         print(f"Error fetching menu: {str(e)}")
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+from database import get_db_connection
+
+# Safety net for changes made outside this process (other workers, manual SQL)
+MENU_CACHE_TTL = float(os.environ.get('MENU_CACHE_TTL', 300))
+
+# Columns exposed by the item-level endpoints
+MENU_FIELDS = ('menu_id', 'name', 'description', 'price', 'category', 'image_url')
+
+
+def _load_menu():
+    with get_db_connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM Menu")
+        rows = cursor.fetchall()
+        cursor.close()
+    return rows
+
+
+class MenuCache:
+    """Process-level copy of the Menu table.
+
+    Loaded on first use and kept current by the MenuManagement write handlers.
+    Every change bumps ``version``. Readers get shared row dicts and must not
+    mutate them; writers swap in new containers instead of editing in place.
+
+    Each post-commit re-read takes a ticket before it queries. A row is only
+    applied if no later ticket for the same item got there first, so two
+    edits refreshing out of order never leave the older row cached.
+    """
+
+    def __init__(self, loader=_load_menu, ttl=MENU_CACHE_TTL):
+        self._loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._state = None  # (items_by_id, items_list)
+        self._loaded_at = 0.0
+        self.version = 0
+        self._counters = {'hits': 0, 'misses': 0, 'loads': 0, 'updates': 0, 'stale_refreshes': 0}
+        self._listeners = []
+        self._tickets = 0
+        self._applied = {}  # menu_id -> ticket of the last row applied
+
+    def add_listener(self, listener):
+        """Mirror every change into ``listener`` (``rebuild(rows)``, ``upsert(row)``, ``remove(menu_id)``).
+
+        Callbacks run under the cache lock, so derived structures never miss
+        or reorder a change.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+            if self._state is not None:
+                listener.rebuild(self._state[1])
+
+    def _snapshot(self):
+        with self._lock:
+            if self._state is not None and time.monotonic() - self._loaded_at < self.ttl:
+                self._counters['hits'] += 1
+                return self._state
+            self._counters['misses'] += 1
+            rows = self._loader()
+            items = {row['menu_id']: row for row in rows}
+            self._state = (items, list(items.values()))
+            self._loaded_at = time.monotonic()
+            self._counters['loads'] += 1
+            self.version += 1
+            for listener in self._listeners:
+                listener.rebuild(self._state[1])
+            return self._state
+
+    def current_version(self):
+        """Version of the data ``all``/``get`` would return right now (reloads if expired)."""
+        self._snapshot()
+        return self.version
+
+    def all(self):
+        return self._snapshot()[1]
+
+    def get(self, menu_id):
+        return self._snapshot()[0].get(menu_id)
+
+    def refresh_item(self, connection, menu_id):
+        """Re-read one row on the writer's connection after it commits."""
+        ticket = self._ticket()
+        cursor = connection.cursor(dictionary=True, buffered=True)
+        cursor.execute("SELECT * FROM Menu WHERE menu_id = %s", (menu_id,))
+        row = cursor.fetchone()
+        cursor.close()
+        self._apply(menu_id, row, ticket)
+
+    def remove(self, menu_id):
+        self._apply(menu_id, None, self._ticket())
+
+    def _ticket(self):
+        with self._lock:
+            self._tickets += 1
+            return self._tickets
+
+    def invalidate(self):
+        with self._lock:
+            self._state = None
+            self.version += 1
+
+    def _apply(self, menu_id, row, ticket):
+        with self._lock:
+            if ticket < self._applied.get(menu_id, 0):
+                self._counters['stale_refreshes'] += 1
+                return  # A re-read that started later already applied a newer row
+            self._applied[menu_id] = ticket
+            self.version += 1
+            self._counters['updates'] += 1
+            if self._state is None:
+                return  # Next read loads the whole table anyway
+            items = dict(self._state[0])
+            if row is None:
+                items.pop(menu_id, None)
+            else:
+                items[menu_id] = row
+            self._state = (items, list(items.values()))
+            for listener in self._listeners:
+                if row is None:
+                    listener.remove(menu_id)
+                else:
+                    listener.upsert(row)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            return {
+                **self._counters,
+                'hit_ratio': round(self._counters['hits'] / lookups, 4) if lookups else 0.0,
+                'version': self.version,
+                'size': len(self._state[0]) if self._state else 0,
+                'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self._state else None,
+            }
+
+
+menu_cache = MenuCache()
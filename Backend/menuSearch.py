@@ -0,0 +1,206 @@
+import bisect
+import re
+import threading
+from collections import defaultdict
+
+from menuCache import menu_cache
+
+# Relative weight of a hit in each indexed column
+FIELD_WEIGHTS = {'name': 3.0, 'category': 2.0, 'description': 1.0}
+# Score multiplier by how a query token matched an indexed token
+EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.4
+# Shortest query token that is also matched with one typo
+FUZZY_MIN_LENGTH = 4
+# Recent (query, limit) results kept between catalog changes; type-ahead repeats prefixes a lot
+RESULT_CACHE_SIZE = 1024
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+def _deletes(token):
+    return {token} | {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _within_one_edit(a, b):
+    """True if ``a`` and ``b`` differ by at most one insert, delete, substitution or adjacent swap."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diffs = [i for i in range(la) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class MenuSearchIndex:
+    """Inverted index over Menu name, category and description.
+
+    Every query token must match some indexed token, exactly, as a prefix
+    (search-as-you-type) or with one typo. Results are ranked by summed field
+    weights. Kept in sync through ``MenuCache.add_listener``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(dict)  # token -> {menu_id: weight}
+        self._vocabulary = []  # sorted tokens, for prefix ranges
+        self._deletes = defaultdict(set)  # one-deletion variant -> tokens
+        self._doc_tokens = {}  # menu_id -> set of tokens
+        self._items = {}
+        self._names = {}  # menu_id -> normalized name
+        self._sorted_names = []  # sorted (name, menu_id), for the phrase bonus
+        self._results = {}  # (query tokens, limit) -> ranked rows
+
+    def rebuild(self, rows):
+        with self._lock:
+            self._postings.clear()
+            self._vocabulary = []
+            self._deletes.clear()
+            self._doc_tokens.clear()
+            self._items.clear()
+            self._names.clear()
+            self._sorted_names = []
+            self._results.clear()
+            for row in rows:
+                self._add(row)
+
+    def upsert(self, row):
+        with self._lock:
+            self._remove(row['menu_id'])
+            self._add(row)
+            self._results.clear()
+
+    def remove(self, menu_id):
+        with self._lock:
+            self._remove(menu_id)
+            self._results.clear()
+
+    def _add(self, row):
+        menu_id = row['menu_id']
+        weights = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(row.get(field)):
+                weights[token] = max(weights[token], weight)
+
+        for token, weight in weights.items():
+            if token not in self._postings:
+                bisect.insort(self._vocabulary, token)
+                for variant in _deletes(token):
+                    self._deletes[variant].add(token)
+            self._postings[token][menu_id] = weight
+        self._doc_tokens[menu_id] = set(weights)
+        self._items[menu_id] = row
+        self._names[menu_id] = ' '.join(tokenize(row.get('name')))
+        bisect.insort(self._sorted_names, (self._names[menu_id], menu_id))
+
+    def _remove(self, menu_id):
+        for token in self._doc_tokens.pop(menu_id, ()):
+            posting = self._postings[token]
+            posting.pop(menu_id, None)
+            if not posting:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+                for variant in _deletes(token):
+                    self._deletes[variant].discard(token)
+                    if not self._deletes[variant]:
+                        del self._deletes[variant]
+        self._items.pop(menu_id, None)
+        name = self._names.pop(menu_id, None)
+        if name is not None:
+            del self._sorted_names[bisect.bisect_left(self._sorted_names, (name, menu_id))]
+
+    def _matches(self, query_token):
+        """{indexed_token: match_factor} for one query token."""
+        matches = {}
+        # Tokens sharing the prefix form one contiguous range of the sorted vocabulary
+        start = bisect.bisect_left(self._vocabulary, query_token)
+        end = bisect.bisect_left(self._vocabulary, query_token + '\uffff', start)
+        for index in range(start, end):
+            token = self._vocabulary[index]
+            matches[token] = EXACT if token == query_token else PREFIX
+
+        if len(query_token) >= FUZZY_MIN_LENGTH:
+            candidates = set()
+            for variant in _deletes(query_token):
+                candidates |= self._deletes.get(variant, set())
+            for token in candidates:
+                if token not in matches and _within_one_edit(query_token, token):
+                    matches[token] = FUZZY
+        return matches
+
+    def search(self, text, limit=None):
+        query_tokens = tuple(dict.fromkeys(tokenize(text)))
+        if not query_tokens:
+            return []
+
+        with self._lock:
+            cached = self._results.get((query_tokens, limit))
+            if cached is None:
+                cached = self._search(query_tokens, limit)
+                if len(self._results) >= RESULT_CACHE_SIZE:
+                    self._results.clear()
+                self._results[(query_tokens, limit)] = cached
+            return cached
+
+    def _search(self, query_tokens, limit):
+        scores = None
+        for query_token in query_tokens:
+            # Best factor-weighted hit of this query token per item
+            token_scores = {}
+            best = token_scores.get
+            for token, factor in self._matches(query_token).items():
+                for menu_id, weight in self._postings[token].items():
+                    score = weight * factor
+                    if score > best(menu_id, 0.0):
+                        token_scores[menu_id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                if len(token_scores) < len(scores):
+                    scores, token_scores = token_scores, scores
+                scores = {menu_id: score + token_scores[menu_id]
+                          for menu_id, score in scores.items() if menu_id in token_scores}
+            if not scores:
+                return []
+
+        # Names starting with the query as typed rank first; they are one range of the sorted names
+        phrase = ' '.join(query_tokens)
+        start = bisect.bisect_left(self._sorted_names, (phrase,))
+        end = bisect.bisect_left(self._sorted_names, (phrase + '\uffff',), start)
+        for index in range(start, end):
+            menu_id = self._sorted_names[index][1]
+            if menu_id in scores:
+                scores[menu_id] += 1
+
+        # Rank score buckets from the top, so only the buckets that reach ``limit`` get sorted
+        by_score = defaultdict(list)
+        for menu_id, score in scores.items():
+            by_score[score].append(menu_id)
+        ranked = []
+        for score in sorted(by_score, reverse=True):
+            ranked.extend(sorted(by_score[score]))
+            if limit is not None and len(ranked) >= limit:
+                break
+        return [self._items[menu_id] for menu_id in ranked[:limit]]
+
+
+menu_search = MenuSearchIndex()
+menu_cache.add_listener(menu_search)
+
+
+def search_menu(text, limit=None):
+    menu_cache.current_version()  # Loads or refreshes the catalog, which rebuilds the index
+    return menu_search.search(text, limit)
@@ -0,0 +1,13 @@
+-- Unique email and phone on Users. register inserts in one statement and
+-- relies on these to reject duplicates (MySQL error 1062 -> HTTP 409), so
+-- apply before deploying that change:
+--
+--     mysql -u root -p SmartHotelDB < Backend/migrations/001_users_unique_email_phone.sql
+--
+-- Fails if duplicates already exist; find them first with
+--     SELECT email, COUNT(*) FROM Users GROUP BY email HAVING COUNT(*) > 1;
+--     SELECT phone, COUNT(*) FROM Users GROUP BY phone HAVING COUNT(*) > 1;
+
+ALTER TABLE Users
+    ADD UNIQUE INDEX uq_users_email (email),
+    ADD UNIQUE INDEX uq_users_phone (phone);
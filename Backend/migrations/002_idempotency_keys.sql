@@ -0,0 +1,16 @@
+-- Stored responses for POST /place-order retries sent with an Idempotency-Key
+-- header (idempotencyStore.py). The primary key is what stops two workers
+-- from both inserting the same order. Expired rows are purged by the app.
+--
+--     mysql -u root -p SmartHotelDB < Backend/migrations/002_idempotency_keys.sql
+
+CREATE TABLE IF NOT EXISTS IdempotencyKeys (
+    scope VARCHAR(32) NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status SMALLINT NULL,
+    response TEXT NULL,
+    expires_at DOUBLE NOT NULL,
+    PRIMARY KEY (scope, idempotency_key),
+    INDEX idx_idempotency_keys_expiry (expires_at)
+);
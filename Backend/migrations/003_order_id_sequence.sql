@@ -0,0 +1,15 @@
+-- Order id sequence for ORDER_INGEST_MODE=buffered (orderBuffer.py). Buffered
+-- orders are acknowledged before they reach Orders, so their ids come from
+-- this row in reserved blocks instead of AUTO_INCREMENT. Every worker must
+-- run in the same ingest mode once this is in use.
+--
+--     mysql -u root -p SmartHotelDB < Backend/migrations/003_order_id_sequence.sql
+
+CREATE TABLE IF NOT EXISTS OrderIdSequence (
+    id TINYINT NOT NULL PRIMARY KEY,
+    next_id BIGINT NOT NULL
+);
+
+INSERT INTO OrderIdSequence (id, next_id)
+SELECT 1, COALESCE(MAX(order_id), 0) + 1 FROM Orders
+ON DUPLICATE KEY UPDATE next_id = GREATEST(next_id, VALUES(next_id));
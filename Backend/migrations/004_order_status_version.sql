@@ -0,0 +1,9 @@
+-- Order status transitions (orderTransitions.py): a version counter for
+-- optimistic locking, and room for the 'Ready' and 'Rejected' statuses.
+-- Rejected orders are kept with that status instead of being deleted.
+--
+--     mysql -u root -p SmartHotelDB < Backend/migrations/004_order_status_version.sql
+
+ALTER TABLE Orders
+    MODIFY order_status VARCHAR(20) DEFAULT 'Pending',
+    ADD COLUMN version INT NOT NULL DEFAULT 0;
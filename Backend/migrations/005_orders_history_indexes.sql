@@ -0,0 +1,14 @@
+-- Composite indexes behind the customer current-orders query and the
+-- keyset-paginated GET /orders/history (userOrderTracking.py). Each filter
+-- column leads, followed by (order_time, order_id) so a page is one
+-- index range scan in order, however deep the cursor.
+--
+--     mysql -u root -p SmartHotelDB < Backend/migrations/005_orders_history_indexes.sql
+
+ALTER TABLE Orders
+    ADD INDEX idx_orders_time (order_time, order_id),
+    ADD INDEX idx_orders_customer_time (customer_id, order_time, order_id),
+    ADD INDEX idx_orders_customer_status (customer_id, order_status, order_time),
+    ADD INDEX idx_orders_status_time (order_status, order_time, order_id),
+    ADD INDEX idx_orders_table_time (table_number, order_time, order_id),
+    ADD INDEX idx_orders_chef_time (chef_id, order_time, order_id);
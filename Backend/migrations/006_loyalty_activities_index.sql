@@ -0,0 +1,10 @@
+-- GET /loyalty reads a user's latest activities in the same statement as
+-- their balance; this index makes that one range scan in activity_time
+-- order. Balances are now credited as orders complete (loyaltyLedger.py),
+-- so seed them once from existing orders after applying:
+--
+--     mysql -u root -p SmartHotelDB < Backend/migrations/006_loyalty_activities_index.sql
+--     cd Backend && python loyaltyLedger.py rebuild
+
+ALTER TABLE LoyaltyActivities
+    ADD INDEX idx_loyalty_activities_user_time (user_id, activity_time);
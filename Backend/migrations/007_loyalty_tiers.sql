@@ -0,0 +1,20 @@
+-- Tier ladder read by loyaltyTiers.py (cached per process for
+-- LOYALTY_TIERS_TTL seconds). To change thresholds or discounts, edit
+-- these rows, then move existing members onto the new ladder in chunks
+-- while the app keeps running:
+--
+--     mysql -u root -p SmartHotelDB < Backend/migrations/007_loyalty_tiers.sql
+--     cd Backend && python loyaltyLedger.py retier
+
+CREATE TABLE IF NOT EXISTS LoyaltyTiers (
+    tier VARCHAR(20) PRIMARY KEY,
+    min_points INT NOT NULL,
+    discount_percentage DECIMAL(5, 2) NOT NULL,
+    UNIQUE KEY uq_loyalty_tiers_min_points (min_points)
+);
+
+INSERT IGNORE INTO LoyaltyTiers (tier, min_points, discount_percentage) VALUES
+    ('Bronze', 0, 0.00),
+    ('Silver', 1000, 15.00),
+    ('Gold', 2000, 25.00),
+    ('Platinum', 3000, 50.00);
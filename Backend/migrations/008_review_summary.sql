@@ -0,0 +1,37 @@
+-- Per-menu-item review statistics (reviewSummary.py), updated in the same
+-- transaction as each review insert or delete, plus the index behind the
+-- keyset-paginated GET /reviews/<menu_id>. The INSERT ... SELECT seeds the
+-- summaries from existing reviews; running that statement again recomputes
+-- them if they ever drift.
+--
+--     mysql -u root -p SmartHotelDB < Backend/migrations/008_review_summary.sql
+
+CREATE TABLE IF NOT EXISTS ReviewSummary (
+    menu_id INT PRIMARY KEY,
+    review_count INT NOT NULL DEFAULT 0,
+    rating_sum INT NOT NULL DEFAULT 0,
+    rating_1 INT NOT NULL DEFAULT 0,
+    rating_2 INT NOT NULL DEFAULT 0,
+    rating_3 INT NOT NULL DEFAULT 0,
+    rating_4 INT NOT NULL DEFAULT 0,
+    rating_5 INT NOT NULL DEFAULT 0,
+    positive INT NOT NULL DEFAULT 0,
+    negative INT NOT NULL DEFAULT 0,
+    neutral INT NOT NULL DEFAULT 0
+);
+
+INSERT INTO ReviewSummary (menu_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5,
+                           positive, negative, neutral)
+SELECT menu_id, COUNT(*), SUM(rating),
+       SUM(rating = 1), SUM(rating = 2), SUM(rating = 3), SUM(rating = 4), SUM(rating = 5),
+       SUM(sentiment = 'positive'), SUM(sentiment = 'negative'), SUM(sentiment = 'neutral')
+FROM Reviews
+GROUP BY menu_id
+ON DUPLICATE KEY UPDATE
+    review_count = VALUES(review_count), rating_sum = VALUES(rating_sum),
+    rating_1 = VALUES(rating_1), rating_2 = VALUES(rating_2), rating_3 = VALUES(rating_3),
+    rating_4 = VALUES(rating_4), rating_5 = VALUES(rating_5),
+    positive = VALUES(positive), negative = VALUES(negative), neutral = VALUES(neutral);
+
+ALTER TABLE Reviews
+    ADD INDEX idx_reviews_menu_created (menu_id, created_at, review_id);
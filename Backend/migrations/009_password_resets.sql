@@ -0,0 +1,14 @@
+-- Password reset state for the MySQL OTP store (otpStore.MySQLOTPStore):
+-- the hashed OTP, wrong-guess count and, once verified, the hashed reset
+-- token. Rows are purged by the app when they expire.
+--
+--     mysql -u root -p SmartHotelDB < Backend/migrations/009_password_resets.sql
+
+CREATE TABLE IF NOT EXISTS PasswordResets (
+    email VARCHAR(255) NOT NULL PRIMARY KEY,
+    otp_hash CHAR(64),
+    attempts INT NOT NULL DEFAULT 0,
+    expires_at DOUBLE NOT NULL,
+    token_hash CHAR(64) UNIQUE,
+    INDEX idx_password_resets_expiry (expires_at)
+);
@@ -0,0 +1,435 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from mysql.connector import IntegrityError
+
+from database import get_db_connection, duplicate_key
+from idempotencyStore import IDEMPOTENCY_TTL
+from orderWatch import order_watch
+
+# 'direct' writes each order to MySQL in the request; 'buffered' logs it locally and acknowledges at once
+ORDER_INGEST_MODE = os.environ.get('ORDER_INGEST_MODE', 'direct')
+ORDER_BUFFER_PATH = os.environ.get('ORDER_BUFFER_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'order_buffer.db'))
+# Most orders written to MySQL in one group commit
+ORDER_FLUSH_BATCH = int(os.environ.get('ORDER_FLUSH_BATCH', 200))
+# How long the flusher waits for more orders to join a batch
+ORDER_FLUSH_WINDOW = float(os.environ.get('ORDER_FLUSH_WINDOW_MS', 50)) / 1000
+# Order ids reserved from OrderIdSequence per round-trip
+ORDER_ID_BLOCK = int(os.environ.get('ORDER_ID_BLOCK', 100))
+# Longest wait between retries while MySQL is unavailable
+MAX_RETRY_DELAY = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS order_log (
+    order_id INTEGER PRIMARY KEY,
+    idempotency_key TEXT UNIQUE,
+    request_hash TEXT,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS order_quarantine (
+    order_id INTEGER PRIMARY KEY,
+    idempotency_key TEXT,
+    request_hash TEXT,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    quarantined_at REAL NOT NULL,
+    reason TEXT NOT NULL
+);
+"""
+
+
+class DuplicateOrderKey(Exception):
+    """An order with this Idempotency-Key is already in the log; ``order_id`` and ``request_hash`` describe it."""
+
+    def __init__(self, order_id, request_hash):
+        super().__init__(order_id)
+        self.order_id = order_id
+        self.request_hash = request_hash
+
+
+class OrderIdAllocator:
+    """Hands out order ids from blocks reserved in the OrderIdSequence table.
+
+    Buffered orders need their id before they reach Orders, so ids come from
+    a sequence row (migrations/003_order_id_sequence.sql) instead of
+    AUTO_INCREMENT; one UPDATE reserves ORDER_ID_BLOCK of them. Each block
+    starts past MAX(order_id), since orders placed in direct mode take
+    AUTO_INCREMENT ids without moving the sequence.
+    """
+
+    def __init__(self, block=ORDER_ID_BLOCK):
+        self.block = block
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def next_id(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._end = self._reserve()
+                self._next = self._end - self.block
+            order_id = self._next
+            self._next += 1
+            return order_id
+
+    def _reserve(self):
+        with get_db_connection() as connection, connection.cursor(buffered=True) as cursor:
+            cursor.execute("""
+                UPDATE OrderIdSequence
+                SET next_id = LAST_INSERT_ID(
+                    GREATEST(next_id, (SELECT COALESCE(MAX(order_id), 0) + 1 FROM Orders)) + %s
+                )
+                WHERE id = 1
+            """, (self.block,))
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            end = cursor.fetchone()[0]
+            connection.commit()
+        return end
+
+
+class OrderBuffer:
+    """Write-ahead log of accepted orders, group-committed to MySQL in the background.
+
+    ``append`` stores the order in a local SQLite log (WAL, synchronous=FULL)
+    and returns as soon as it is durable. A flusher thread drains the log
+    into Orders/OrderItems/UserRewards in batches of up to ORDER_FLUSH_BATCH,
+    one transaction each. An order leaves the log only after its batch
+    commits; on restart whatever is left is flushed again, and orders that
+    already made it to MySQL are recognised by id and skipped. An order whose
+    id is held by a different order is moved to the order_quarantine table
+    for an operator, and the rest keep flowing.
+    """
+
+    def __init__(self, path=ORDER_BUFFER_PATH, batch=ORDER_FLUSH_BATCH, window=ORDER_FLUSH_WINDOW,
+                 allocator=None):
+        self.path = path
+        self.batch = batch
+        self.window = window
+        self.allocator = allocator or OrderIdAllocator()
+        self._pending = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._initialized = False
+        self._stopping = False
+        self._stats_lock = threading.Lock()
+        self._counters = {
+            'appended': 0,
+            'flushed': 0,
+            'batches': 0,
+            'duplicates_dropped': 0,
+            'id_conflicts': 0,
+            'flush_errors': 0,
+            'last_flush_ms': 0.0,
+            'last_error': None,
+        }
+
+    def _db(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=FULL")
+        return connection
+
+    def _init_db(self):
+        if self._initialized:
+            return
+        connection = self._db()
+        try:
+            connection.executescript(SCHEMA)
+        finally:
+            connection.close()
+        self._initialized = True
+
+    def append(self, table_number, customer_id, order_items, total_price, idempotency=None):
+        """Durably log one priced order and return its id.
+
+        ``order_items`` are (menu_id, name, quantity, subtotal) rows from
+        price_cart. ``idempotency`` is an optional (key, request_hash); a key
+        already in the log raises DuplicateOrderKey.
+        """
+        self.start()
+        key, request_hash = idempotency or (None, None)
+        payload = {
+            'table_number': table_number,
+            'customer_id': customer_id,
+            'total_price': float(total_price),
+            'items': [[menu_id, name, quantity, float(subtotal)] for menu_id, name, quantity, subtotal in order_items],
+        }
+        order_id = self.allocator.next_id()
+        connection = self._db()
+        try:
+            connection.execute(
+                "INSERT INTO order_log (order_id, idempotency_key, request_hash, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                (order_id, key, request_hash, json.dumps(payload), time.time())
+            )
+        except sqlite3.IntegrityError:
+            row = connection.execute(
+                "SELECT order_id, request_hash FROM order_log WHERE idempotency_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                raise
+            raise DuplicateOrderKey(*row)
+        finally:
+            connection.close()
+
+        with self._stats_lock:
+            self._counters['appended'] += 1
+        self._pending.set()
+        return order_id
+
+    def contains(self, order_id):
+        if not self._initialized:
+            return False
+        connection = self._db()
+        try:
+            return connection.execute("SELECT 1 FROM order_log WHERE order_id = ?", (order_id,)).fetchone() is not None
+        finally:
+            connection.close()
+
+    def flush_if_pending(self, order_ids):
+        """Make sure buffered orders are in MySQL before something updates them."""
+        if any(self.contains(order_id) for order_id in order_ids):
+            self.flush()
+
+    def pending_tickets(self):
+        """Logged orders not yet in MySQL, shaped like the kitchen feed's entries."""
+        if not self._initialized:
+            return []
+        connection = self._db()
+        try:
+            rows = connection.execute("SELECT order_id, payload FROM order_log ORDER BY order_id").fetchall()
+        finally:
+            connection.close()
+        tickets = []
+        for order_id, payload in rows:
+            payload = json.loads(payload)
+            tickets.append({
+                'order_id': order_id,
+                'order_status': 'Pending',
+                'version': 0,
+                'table_number': payload['table_number'],
+                'items': [
+                    {'food_name': name, 'quantity': quantity, 'subtotal': subtotal}
+                    for _, name, quantity, subtotal in payload['items']
+                ]
+            })
+        return tickets
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._init_db()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='order-flusher', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopping = True
+        self._pending.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        delay = 0.0
+        while not self._stopping:
+            # The timeout doubles as a poll for orders logged by other workers sharing the file
+            self._pending.wait(1.0)
+            self._pending.clear()
+            if self.window:
+                time.sleep(self.window)  # Let orders arriving together share one commit
+            try:
+                self.flush()
+                delay = 0.0
+            except Exception as e:
+                delay = min(max(delay * 2, 0.5), MAX_RETRY_DELAY)
+                with self._stats_lock:
+                    self._counters['flush_errors'] += 1
+                    self._counters['last_error'] = str(e)
+                print(f"Error flushing buffered orders, retrying in {delay:.1f}s: {str(e)}")
+                time.sleep(delay)
+
+    def flush(self):
+        """Write every logged order to MySQL now; returns how many were flushed."""
+        total = 0
+        with self._flush_lock:
+            connection = self._db()
+            try:
+                while True:
+                    rows = connection.execute(
+                        "SELECT order_id, idempotency_key, request_hash, payload FROM order_log ORDER BY order_id LIMIT ?",
+                        (self.batch,)
+                    ).fetchall()
+                    if not rows:
+                        return total
+                    started = time.monotonic()
+                    orders = [(row[0], row[1], row[2], json.loads(row[3])) for row in rows]
+                    conflicts = self._write_batch(orders)
+                    connection.execute("BEGIN IMMEDIATE")
+                    try:
+                        if conflicts:
+                            self._quarantine(connection, conflicts)
+                        connection.executemany("DELETE FROM order_log WHERE order_id = ?", [(row[0],) for row in rows])
+                        connection.execute("COMMIT")
+                    except BaseException:
+                        connection.execute("ROLLBACK")
+                        raise
+                    total += len(rows)
+                    with self._stats_lock:
+                        self._counters['flushed'] += len(rows)
+                        self._counters['batches'] += 1
+                        self._counters['last_flush_ms'] = round((time.monotonic() - started) * 1000, 3)
+                    # Long-polling customers can see these orders now that MySQL has them
+                    order_watch.notify(*(payload['customer_id'] for _, _, _, payload in orders))
+                    if len(rows) < self.batch:
+                        return total
+            finally:
+                connection.close()
+
+    def _write_batch(self, orders):
+        """Insert a batch in one transaction; returns {order_id: reason} for orders that must be quarantined."""
+        with get_db_connection() as connection, connection.cursor() as cursor:
+            try:
+                self._insert(cursor, orders)
+                connection.commit()
+                return {}
+            except IntegrityError as e:
+                connection.rollback()
+                if duplicate_key(e) is None:
+                    raise
+
+            # Replaying after a crash, or another worker flushed part of this batch
+            orders, conflicts = self._drop_existing(cursor, orders)
+            if orders:
+                self._insert(cursor, orders)
+            connection.commit()
+            return conflicts
+
+    def _insert(self, cursor, orders):
+        cursor.executemany("""
+            INSERT INTO Orders (order_id, table_number, customer_id, order_status, total_price)
+            VALUES (%s, %s, %s, 'Pending', %s)
+        """, [(order_id, p['table_number'], p['customer_id'], p['total_price']) for order_id, _, _, p in orders])
+
+        cursor.executemany("""
+            INSERT INTO OrderItems (order_id, menu_id, quantity, subtotal)
+            VALUES (%s, %s, %s, %s)
+        """, [
+            (order_id, menu_id, quantity, subtotal)
+            for order_id, _, _, p in orders
+            for menu_id, _, quantity, subtotal in p['items']
+        ])
+
+        # One statement bumps every customer's order count
+        counts = Counter(p['customer_id'] for _, _, _, p in orders)
+        cursor.execute(f"""
+            UPDATE UserRewards
+            SET orders = orders + CASE user_id {' '.join(['WHEN %s THEN %s'] * len(counts))} ELSE 0 END
+            WHERE user_id IN ({', '.join(['%s'] * len(counts))})
+        """, [value for pair in counts.items() for value in pair] + list(counts))
+
+        keyed = [(key, request_hash, order_id) for order_id, key, request_hash, _ in orders if key]
+        if keyed:
+            cursor.executemany("""
+                INSERT INTO IdempotencyKeys (scope, idempotency_key, request_hash, status, response, expires_at)
+                VALUES ('place-order', %s, %s, 202, %s, %s)
+            """, [
+                (key, request_hash, json.dumps(accepted_body(order_id)), time.time() + IDEMPOTENCY_TTL)
+                for key, request_hash, order_id in keyed
+            ])
+
+    def _drop_existing(self, cursor, orders):
+        order_ids = [order[0] for order in orders]
+        cursor.execute(f"""
+            SELECT order_id, table_number, customer_id, total_price FROM Orders
+            WHERE order_id IN ({', '.join(['%s'] * len(order_ids))})
+        """, order_ids)
+        found = {row[0]: order_fingerprint(*row[1:]) for row in cursor.fetchall()}
+
+        # An existing id only means "already flushed" if it holds this very order
+        existing, conflicts = set(), {}
+        for order_id, _, _, payload in orders:
+            if order_id not in found:
+                continue
+            expected = order_fingerprint(payload['table_number'], payload['customer_id'], payload['total_price'])
+            if found[order_id] != expected:
+                conflicts[order_id] = "order_id already used by a different order in Orders"
+                print(f"Quarantining buffered order {order_id}: its id is held by a different order in Orders")
+            existing.add(order_id)
+
+        keys = [order[1] for order in orders if order[1] and order[0] not in existing]
+        taken = set()
+        if keys:
+            cursor.execute(f"""
+                SELECT idempotency_key FROM IdempotencyKeys
+                WHERE scope = 'place-order' AND idempotency_key IN ({', '.join(['%s'] * len(keys))})
+            """, keys)
+            taken = {row[0] for row in cursor.fetchall()}
+
+        remaining = []
+        for order in orders:
+            if order[0] in existing:
+                continue
+            if order[1] in taken:
+                # The same Idempotency-Key reached another host first; that order stands
+                print(f"Dropping buffered order {order[0]}: duplicate of Idempotency-Key {order[1]}")
+                with self._stats_lock:
+                    self._counters['duplicates_dropped'] += 1
+                continue
+            remaining.append(order)
+        return remaining, conflicts
+
+    def _quarantine(self, connection, conflicts):
+        """Move conflicting orders from the log to order_quarantine, inside the caller's SQLite transaction."""
+        now = time.time()
+        connection.executemany("""
+            INSERT OR REPLACE INTO order_quarantine
+                (order_id, idempotency_key, request_hash, payload, created_at, quarantined_at, reason)
+            SELECT order_id, idempotency_key, request_hash, payload, created_at, ?, ?
+            FROM order_log WHERE order_id = ?
+        """, [(now, reason, order_id) for order_id, reason in conflicts.items()])
+        with self._stats_lock:
+            self._counters['id_conflicts'] += len(conflicts)
+
+    def stats(self):
+        self._init_db()
+        connection = self._db()
+        try:
+            pending, oldest = connection.execute("SELECT COUNT(*), MIN(created_at) FROM order_log").fetchone()
+            quarantined = [row[0] for row in connection.execute("SELECT order_id FROM order_quarantine ORDER BY order_id")]
+        finally:
+            connection.close()
+        with self._stats_lock:
+            counters = dict(self._counters)
+        return {
+            'mode': ORDER_INGEST_MODE,
+            'running': self._thread is not None,
+            'pending': pending,
+            # Age of the oldest order still waiting for MySQL
+            'lag_seconds': round(time.time() - oldest, 3) if oldest else 0.0,
+            # Acknowledged orders that could not be written; each needs an operator
+            'quarantined': len(quarantined),
+            'quarantined_order_ids': quarantined[:100],
+            **counters,
+        }
+
+
+def order_fingerprint(table_number, customer_id, total_price):
+    """Comparable form of an order's Orders columns, whether from a payload or read back from MySQL."""
+    return (str(table_number), str(customer_id), round(float(total_price), 2))
+
+
+def accepted_body(order_id):
+    return {"message": "Order placed successfully", "order_id": order_id}
+
+order_buffer = OrderBuffer()
+if ORDER_INGEST_MODE == 'buffered':
+    order_buffer.start()  # Replays anything left in the log by a previous run
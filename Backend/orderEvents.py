@@ -0,0 +1,116 @@
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+
+# Events kept for clients that reconnect with Last-Event-ID
+REPLAY_BUFFER_SIZE = 256
+# Per-subscriber backlog; a subscriber that falls this far behind is dropped
+SUBSCRIBER_QUEUE_SIZE = 512
+
+
+class Subscription:
+    def __init__(self, hub, maxsize):
+        self._hub = hub
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def get(self, timeout=None):
+        """Next event, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._hub.unsubscribe(self)
+
+
+class OrderEventHub:
+    """In-process pub/sub for order lifecycle events.
+
+    Write paths call ``publish`` after committing; streaming endpoints hold a
+    ``Subscription`` each. Only subscribers in the same process see an event,
+    so run the streaming endpoints on the worker that handles order writes.
+
+    Event ids are ``<boot_id>-<seq>``. The boot id is new for every hub, so
+    an id from before a restart or from another worker is never mistaken
+    for one of ours.
+    """
+
+    def __init__(self, replay_size=REPLAY_BUFFER_SIZE, subscriber_queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._recent = deque(maxlen=replay_size)
+        self._subscriber_queue_size = subscriber_queue_size
+        self._seq = 0
+        self.boot_id = uuid.uuid4().hex[:12]
+
+    def _event_id(self, seq):
+        return f"{self.boot_id}-{seq}"
+
+    def publish(self, event_type, data):
+        with self._lock:
+            self._seq += 1
+            event = {'id': self._event_id(self._seq), 'seq': self._seq, 'type': event_type, 'time': time.time(), 'data': data}
+            self._recent.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            try:
+                subscription._queue.put_nowait(event)
+            except queue.Full:
+                # A stalled client must resync from a fresh snapshot
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+        return event
+
+    def subscribe(self):
+        subscription = Subscription(self, self._subscriber_queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def events_since(self, last_id):
+        """Events published after the event id ``last_id``, or None if the client must resync.
+
+        None covers ids this hub cannot vouch for: malformed, from another
+        boot or worker, or already gone from the replay buffer.
+        """
+        boot_id, _, seq = (last_id or '').rpartition('-')
+        if boot_id != self.boot_id or not seq.isdigit():
+            return None
+        seq = int(seq)
+        with self._lock:
+            if seq > self._seq:
+                return None
+            if seq == self._seq:
+                return []
+            if not self._recent or self._recent[0]['seq'] > seq + 1:
+                return None
+            return [event for event in self._recent if event['seq'] > seq]
+
+    @property
+    def last_id(self):
+        with self._lock:
+            return self._event_id(self._seq)
+
+    def stats(self):
+        with self._lock:
+            return {'subscribers': len(self._subscribers), 'boot_id': self.boot_id, 'last_event_id': self._seq}
+
+
+def format_sse(event_type, data, event_id=None):
+    message = f"event: {event_type}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data, default=str)}\n\n"
+
+
+order_events = OrderEventHub()
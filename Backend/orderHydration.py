@@ -0,0 +1,54 @@
+from collections import defaultdict
+
+# Upper bound on ids per IN (...) list so a huge feed never builds a giant statement
+ITEM_BATCH_SIZE = 500
+
+ORDER_ITEMS_QUERY = """
+SELECT oi.order_id, m.name AS food_name, oi.quantity, oi.subtotal
+FROM OrderItems oi
+JOIN Menu m ON oi.menu_id = m.menu_id
+WHERE oi.order_id IN ({placeholders})
+"""
+
+
+def load_order_items(cursor, order_ids):
+    """Fetch the items of many orders in one round-trip per ITEM_BATCH_SIZE ids.
+
+    Returns {order_id: [{'food_name', 'quantity', 'subtotal'}, ...]}; orders
+    without items are simply absent. Works with tuple and dictionary cursors.
+    """
+    order_ids = list(dict.fromkeys(order_ids))
+    items_by_order = defaultdict(list)
+
+    for start in range(0, len(order_ids), ITEM_BATCH_SIZE):
+        batch = order_ids[start:start + ITEM_BATCH_SIZE]
+        placeholders = ', '.join(['%s'] * len(batch))
+        cursor.execute(ORDER_ITEMS_QUERY.format(placeholders=placeholders), tuple(batch))
+        for row in cursor.fetchall():
+            if isinstance(row, dict):
+                row = (row['order_id'], row['food_name'], row['quantity'], row['subtotal'])
+            items_by_order[row[0]].append({
+                'food_name': row[1],
+                'quantity': row[2],
+                'subtotal': float(row[3])
+            })
+
+    return items_by_order
+
+
+def hydrate_orders(cursor, orders, status_key='order_status'):
+    """Attach item lists to (order_id, table_number, order_status) tuples.
+
+    ``status_key`` names the status field in the output, since the chef feed
+    calls it ``order_status`` and the customer feed calls it ``status``.
+    """
+    items_by_order = load_order_items(cursor, [order[0] for order in orders])
+    return [
+        {
+            'order_id': order_id,
+            status_key: order_status,
+            'table_number': table_number,
+            'items': items_by_order.get(order_id, [])
+        }
+        for order_id, table_number, order_status in orders
+    ]
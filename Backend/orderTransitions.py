@@ -0,0 +1,148 @@
+from dashboardStats import dashboard_stats, fetch_order_lines, COMPLETED_STATUSES, SOLD_STATUSES
+from database import get_db_connection
+from httpCache import data_versions
+from loyaltyLedger import credit_completed_orders, loyalty_version
+from orderBuffer import order_buffer
+from orderEvents import order_events
+from orderWatch import order_watch
+
+# Status -> statuses it may move to. In Progress -> Completed is kept for kitchens that skip the pass.
+TRANSITIONS = {
+    'Pending': ('In Progress', 'Rejected'),
+    'In Progress': ('Ready', 'Completed'),
+    'Ready': ('Completed',),
+}
+
+# Kitchen stream event published for each target status
+EVENTS = {
+    'In Progress': 'order_accepted',
+    'Rejected': 'order_rejected',
+    'Ready': 'order_ready',
+    'Completed': 'order_completed',
+}
+
+MAX_BULK_TRANSITIONS = 200
+
+# Result error codes
+NOT_FOUND, INVALID_TRANSITION, CONFLICT = 'not_found', 'invalid_transition', 'conflict'
+
+
+def apply_transitions(transitions):
+    """Move many orders to new statuses in one transaction.
+
+    ``transitions`` are dicts with ``order_id``, ``status`` and optionally
+    ``version`` (the version the client last saw) and ``chef_id``. Each is
+    checked against TRANSITIONS and applied with a compare-and-set on the
+    order's version, so no rows are locked while checking; an order that
+    changed in between is reported as a conflict rather than overwritten.
+    Returns one result dict per transition, in order: ``ok``, ``order_id``
+    and either the new ``status``/``version`` or an ``error`` code with the
+    order's current state.
+    """
+    order_ids = list(dict.fromkeys(t['order_id'] for t in transitions))
+    order_buffer.flush_if_pending(order_ids)
+
+    applied = []
+    with get_db_connection() as connection, connection.cursor() as cursor:
+        # The check below relies on the snapshot read, which READ COMMITTED would not give
+        connection.start_transaction(isolation_level='REPEATABLE READ')
+        cursor.execute(f"""
+            SELECT order_id, order_status, version, total_price, customer_id
+            FROM Orders WHERE order_id IN ({', '.join(['%s'] * len(order_ids))})
+        """, order_ids)
+        current = {row[0]: row[1:] for row in cursor.fetchall()}
+
+        planned, results = plan_transitions(transitions, current)
+        if planned:
+            won = _compare_and_set(cursor, planned)
+            for index, transition, status, version, total_price in planned:
+                order_id = transition['order_id']
+                if order_id in won:
+                    applied.append((transition, status, total_price))
+                    results[index] = {'ok': True, 'order_id': order_id,
+                                      'status': transition['status'], 'version': version + 1}
+                else:
+                    results[index] = {'ok': False, 'order_id': order_id, 'error': CONFLICT,
+                                      'current_status': status, 'version': version}
+
+            counted = [t['order_id'] for t, _, _ in applied
+                       if t['status'] in SOLD_STATUSES or t['status'] in COMPLETED_STATUSES]
+            lines = fetch_order_lines(cursor, counted)
+            # Loyalty points are earned in the same transaction that completes the order
+            credited = credit_completed_orders(cursor, [current[t['order_id']][3] for t, _, _ in applied
+                                                        if t['status'] == 'Completed'])
+            connection.commit()
+
+    if applied:
+        for transition, old_status, total_price in applied:
+            order_id, new_status = transition['order_id'], transition['status']
+            dashboard_stats.record_transition(old_status, new_status, total_price, lines.get(order_id, []))
+        data_versions.bump('orders', *(loyalty_version(user_id) for user_id in credited))
+        for transition, _, _ in applied:
+            event = {'order_id': transition['order_id'], 'order_status': transition['status']}
+            if transition['status'] == 'In Progress':
+                event['chef_id'] = transition.get('chef_id')
+            order_events.publish(EVENTS[transition['status']], event)
+        order_watch.notify(*(current[t['order_id']][3] for t, _, _ in applied))
+    return results
+
+
+def plan_transitions(transitions, current):
+    """Check transitions against the orders' ``current`` (status, version, total_price, customer_id).
+
+    Returns (planned, results): ``planned`` holds (index, transition,
+    status, version, total_price) for each transition that may be applied,
+    and ``results`` the error result of every other one, None where planned.
+    """
+    results = [None] * len(transitions)
+    planned = []
+    for index, transition in enumerate(transitions):
+        order_id = transition['order_id']
+        if order_id not in current:
+            results[index] = {'ok': False, 'order_id': order_id, 'error': NOT_FOUND}
+            continue
+        status, version, total_price, _ = current[order_id]
+        expected = transition.get('version')
+        if expected is not None and expected != version:
+            error = CONFLICT
+        elif transition['status'] not in TRANSITIONS.get(status, ()):
+            error = INVALID_TRANSITION
+        else:
+            planned.append((index, transition, status, version, total_price))
+            continue
+        results[index] = {'ok': False, 'order_id': order_id, 'error': error,
+                          'current_status': status, 'version': version}
+    return planned, results
+
+
+def _compare_and_set(cursor, planned):
+    """One UPDATE for every planned transition; returns the order ids it changed."""
+    status_cases, chef_cases, guards = [], [], []
+    for _, transition, _, version, _ in planned:
+        status_cases += [transition['order_id'], transition['status']]
+        if transition.get('chef_id') is not None:
+            chef_cases += [transition['order_id'], transition['chef_id']]
+        guards += [transition['order_id'], version]
+
+    chef_clause = ''
+    if chef_cases:
+        chef_clause = f", chef_id = CASE order_id {' '.join(['WHEN %s THEN %s'] * (len(chef_cases) // 2))} ELSE chef_id END"
+    cursor.execute(f"""
+        UPDATE Orders
+        SET order_status = CASE order_id {' '.join(['WHEN %s THEN %s'] * len(planned))} END,
+            version = version + 1{chef_clause}
+        WHERE (order_id, version) IN ({', '.join(['(%s, %s)'] * len(planned))})
+    """, status_cases + chef_cases + guards)
+
+    order_ids = [transition['order_id'] for _, transition, _, _, _ in planned]
+    if cursor.rowcount == len(planned):
+        return set(order_ids)
+
+    # Some rows moved on since they were read. The snapshot still shows those at
+    # their old version, so only the rows this UPDATE changed read as version + 1.
+    cursor.execute(f"""
+        SELECT order_id, version FROM Orders WHERE order_id IN ({', '.join(['%s'] * len(order_ids))})
+    """, order_ids)
+    versions = dict(cursor.fetchall())
+    return {transition['order_id'] for _, transition, _, version, _ in planned
+            if versions.get(transition['order_id']) == version + 1}
@@ -0,0 +1,45 @@
+import threading
+
+
+class OrderWatch:
+    """Per-customer change signals for the long-polling order tracker.
+
+    A waiter takes the customer's current Event with ``watch`` *before*
+    reading their orders, then waits on it; ``notify`` sets that Event and
+    drops it, so the next ``watch`` starts a fresh one. Taking the Event
+    first means a change committed between the read and the wait still
+    wakes the waiter. Only writes in this process signal here; waiters
+    re-read on a timer to pick up changes made by other workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = {}  # customer_id -> Event set on that customer's next change
+        self._counters = {'notified': 0, 'woken': 0, 'timed_out': 0}
+
+    def watch(self, customer_id):
+        with self._lock:
+            return self._events.setdefault(int(customer_id), threading.Event())
+
+    def wait(self, event, timeout):
+        """True if a change was signalled within ``timeout`` seconds."""
+        changed = event.wait(timeout)
+        with self._lock:
+            self._counters['woken' if changed else 'timed_out'] += 1
+        return changed
+
+    def notify(self, *customer_ids):
+        with self._lock:
+            events = [self._events.pop(int(customer_id), None)
+                      for customer_id in set(customer_ids) if customer_id is not None]
+            self._counters['notified'] += len(events)
+        for event in events:
+            if event is not None:
+                event.set()
+
+    def stats(self):
+        with self._lock:
+            return {'watched_customers': len(self._events), **self._counters}
+
+
+order_watch = OrderWatch()
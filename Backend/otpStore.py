@@ -0,0 +1,195 @@
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+
+from database import get_db_connection
+
+# 'mysql' shares reset state between workers and hosts; 'memory' is for a single process
+OTP_STORE_BACKEND = os.environ.get('OTP_STORE', 'mysql')
+OTP_TTL = float(os.environ.get('OTP_TTL_SECONDS', 15 * 60))
+# Lifetime of the reset token handed out once the OTP checks out
+RESET_TOKEN_TTL = float(os.environ.get('RESET_TOKEN_TTL_SECONDS', 15 * 60))
+# Wrong guesses allowed before the OTP is thrown away and a new one must be requested
+OTP_MAX_ATTEMPTS = int(os.environ.get('OTP_MAX_ATTEMPTS', 5))
+# Memory backend: expired entries are swept once the store grows past this
+OTP_MEMORY_MAX_ENTRIES = 10000
+
+# verify() outcomes
+VERIFIED, INVALID, EXPIRED, MISSING, LOCKED = 'verified', 'invalid', 'expired', 'missing', 'locked'
+
+
+def _digest(email, secret):
+    # Codes and tokens are stored hashed, bound to the address they were issued for
+    return hashlib.sha256(f"{email.lower()}:{secret}".encode('utf-8')).hexdigest()
+
+
+def _token_digest(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def generate_otp(length=5):
+    return ''.join(str(secrets.randbelow(10)) for _ in range(length))
+
+
+class MemoryOTPStore:
+    """Password reset state for a single process, keyed by email and by reset token."""
+
+    def __init__(self, ttl=OTP_TTL, token_ttl=RESET_TOKEN_TTL, max_attempts=OTP_MAX_ATTEMPTS,
+                 max_entries=OTP_MEMORY_MAX_ENTRIES):
+        self.ttl = ttl
+        self.token_ttl = token_ttl
+        self.max_attempts = max_attempts
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}  # email -> {'otp_hash', 'attempts', 'expires_at', 'token_hash'}
+        self._tokens = {}  # token hash -> email
+
+    def issue(self, email, otp):
+        """Start a reset for ``email``; replaces any reset already in progress."""
+        now = time.time()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict_expired(now)
+            self._drop(email)
+            self._entries[email] = {
+                'otp_hash': _digest(email, otp),
+                'attempts': 0,
+                'expires_at': now + self.ttl,
+                'token_hash': None,
+            }
+
+    def verify(self, email, otp):
+        """(outcome, reset_token); the token is only set when the outcome is VERIFIED."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None or entry['otp_hash'] is None:
+                return MISSING, None
+            if entry['expires_at'] <= now:
+                self._drop(email)
+                return EXPIRED, None
+            if not hmac.compare_digest(entry['otp_hash'], _digest(email, otp)):
+                entry['attempts'] += 1
+                if entry['attempts'] >= self.max_attempts:
+                    self._drop(email)
+                    return LOCKED, None
+                return INVALID, None
+
+            token = secrets.token_urlsafe(32)
+            entry.update(otp_hash=None, expires_at=now + self.token_ttl, token_hash=_token_digest(token))
+            self._tokens[entry['token_hash']] = email
+            return VERIFIED, token
+
+    def consume_token(self, token):
+        """Email the reset token was issued for, or None; a token works only once."""
+        token_hash = _token_digest(token)
+        with self._lock:
+            email = self._tokens.get(token_hash)
+            if email is None:
+                return None
+            expired = self._entries[email]['expires_at'] <= time.time()
+            self._drop(email)
+            return None if expired else email
+
+    def _drop(self, email):
+        entry = self._entries.pop(email, None)
+        if entry and entry['token_hash']:
+            self._tokens.pop(entry['token_hash'], None)
+
+    def _evict_expired(self, now):
+        for email in [email for email, entry in self._entries.items() if entry['expires_at'] <= now]:
+            self._drop(email)
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'entries': len(self._entries), 'verified': len(self._tokens)}
+
+
+class MySQLOTPStore:
+    """Password reset state in the PasswordResets table, shared by every worker.
+
+    Each check runs in a transaction that locks the row (SELECT ... FOR
+    UPDATE), so concurrent guesses against one email are counted exactly.
+    Expired rows are purged whenever a new reset is issued. The table comes
+    from migrations/009_password_resets.sql.
+    """
+
+    def __init__(self, ttl=OTP_TTL, token_ttl=RESET_TOKEN_TTL, max_attempts=OTP_MAX_ATTEMPTS):
+        self.ttl = ttl
+        self.token_ttl = token_ttl
+        self.max_attempts = max_attempts
+
+    def issue(self, email, otp):
+        now = time.time()
+        with get_db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("DELETE FROM PasswordResets WHERE expires_at <= %s", (now,))
+            cursor.execute("""
+                INSERT INTO PasswordResets (email, otp_hash, attempts, expires_at, token_hash)
+                VALUES (%s, %s, 0, %s, NULL)
+                ON DUPLICATE KEY UPDATE otp_hash = VALUES(otp_hash), attempts = 0,
+                    expires_at = VALUES(expires_at), token_hash = NULL
+            """, (email, _digest(email, otp), now + self.ttl))
+            connection.commit()
+
+    def verify(self, email, otp):
+        now = time.time()
+        with get_db_connection() as connection, connection.cursor(buffered=True) as cursor:
+            cursor.execute(
+                "SELECT otp_hash, attempts, expires_at FROM PasswordResets WHERE email = %s FOR UPDATE",
+                (email,)
+            )
+            row = cursor.fetchone()
+            if row is None or row[0] is None:
+                connection.rollback()
+                return MISSING, None
+            otp_hash, attempts, expires_at = row
+
+            if expires_at <= now:
+                outcome, token = EXPIRED, None
+                cursor.execute("DELETE FROM PasswordResets WHERE email = %s", (email,))
+            elif not hmac.compare_digest(otp_hash, _digest(email, otp)):
+                token = None
+                if attempts + 1 >= self.max_attempts:
+                    outcome = LOCKED
+                    cursor.execute("DELETE FROM PasswordResets WHERE email = %s", (email,))
+                else:
+                    outcome = INVALID
+                    cursor.execute("UPDATE PasswordResets SET attempts = attempts + 1 WHERE email = %s", (email,))
+            else:
+                outcome, token = VERIFIED, secrets.token_urlsafe(32)
+                cursor.execute(
+                    "UPDATE PasswordResets SET otp_hash = NULL, expires_at = %s, token_hash = %s WHERE email = %s",
+                    (now + self.token_ttl, _token_digest(token), email)
+                )
+            connection.commit()
+            return outcome, token
+
+    def consume_token(self, token):
+        with get_db_connection() as connection, connection.cursor(buffered=True) as cursor:
+            cursor.execute(
+                "SELECT email, expires_at FROM PasswordResets WHERE token_hash = %s FOR UPDATE",
+                (_token_digest(token),)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                connection.rollback()
+                return None
+            email, expires_at = row
+            cursor.execute("DELETE FROM PasswordResets WHERE email = %s", (email,))
+            connection.commit()
+            return email if expires_at > time.time() else None
+
+    def stats(self):
+        with get_db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT COUNT(*), COALESCE(SUM(token_hash IS NOT NULL), 0)
+                FROM PasswordResets WHERE expires_at > %s
+            """, (time.time(),))
+            entries, verified = cursor.fetchone()
+        return {'backend': 'mysql', 'entries': entries, 'verified': int(verified)}
+
+
+otp_store = MemoryOTPStore() if OTP_STORE_BACKEND == 'memory' else MySQLOTPStore()
@@ -0,0 +1,14 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(sort_time, row_id):
+    """Opaque keyset cursor for lists ordered by (timestamp, id) descending."""
+    raw = json.dumps([sort_time.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(value):
+    sort_time, row_id = json.loads(base64.urlsafe_b64decode(value.encode('ascii')))
+    return datetime.fromisoformat(sort_time), int(row_id)
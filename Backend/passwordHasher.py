@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt
+
+# bcrypt work factor for new hashes; stored hashes with a lower cost are upgraded on login
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+# Worker processes for hashing; 0 hashes on the calling thread instead
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+# Longest a request waits for a hash before giving up
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+# Background threads that run login-triggered re-hashes and store the result
+REHASH_THREADS = 2
+
+
+def _to_bytes(value):
+    return value.encode('utf-8') if isinstance(value, str) else value
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(_to_bytes(password), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _checkpw(password, stored_hash):
+    try:
+        return bcrypt.checkpw(_to_bytes(password), _to_bytes(stored_hash))
+    except ValueError:
+        # Not a bcrypt hash (e.g. a row written by hand); treat as a mismatch
+        return False
+
+
+def hash_cost(stored_hash):
+    """Cost factor of a bcrypt hash ("$2b$12$..." -> 12), or None if it isn't one."""
+    parts = _to_bytes(stored_hash or b'').split(b'$')
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Runs bcrypt in a pool of worker processes.
+
+    bcrypt is deliberately slow CPU work; in worker processes it neither
+    holds the GIL nor ties up request threads while it runs, and
+    concurrent logins spread over every core. The pool starts on first use
+    in each process, so forked server workers each get their own.
+    """
+
+    def __init__(self, rounds=BCRYPT_ROUNDS, workers=PASSWORD_HASH_WORKERS, timeout=PASSWORD_HASH_TIMEOUT):
+        self.rounds = rounds
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = None
+        self._pid = None
+        self._rehash_threads = None
+        self._rehash_pid = None
+        self._lock = threading.Lock()
+        self._counters = {
+            'hashed': 0,
+            'verified': 0,
+            'rehashed': 0,
+            'failed': 0,
+            'in_flight': 0,
+            'max_in_flight': 0,
+            'latency_total': 0.0,
+            'latency_max': 0.0,
+        }
+
+    def hash_password(self, password):
+        """bcrypt hash of ``password`` at the configured cost, as a str."""
+        result = self._run(_hashpw, password, self.rounds)
+        self._count('hashed')
+        return result
+
+    def hash_passwords(self, passwords, timeout=None):
+        """Hashes for many passwords at once, spread across every worker process.
+
+        ``timeout`` bounds the whole call in seconds; None waits until all are done.
+        """
+        passwords = list(passwords)
+        if not passwords:
+            return []
+        started = time.monotonic()
+        executor = self._get_executor()
+        try:
+            if executor is None:
+                hashes = [_hashpw(password, self.rounds) for password in passwords]
+            else:
+                hashes = list(executor.map(_hashpw, passwords, [self.rounds] * len(passwords), timeout=timeout))
+        except Exception:
+            self._count('failed')
+            raise
+        with self._lock:
+            self._counters['hashed'] += len(passwords)
+            self._counters['latency_total'] += time.monotonic() - started
+        return hashes
+
+    def verify_password(self, stored_hash, password):
+        if not stored_hash or not password:
+            return False
+        result = self._run(_checkpw, password, stored_hash)
+        self._count('verified')
+        return result
+
+    def needs_rehash(self, stored_hash):
+        cost = hash_cost(stored_hash)
+        return cost is not None and cost < self.rounds
+
+    def rehash(self, password, on_hashed):
+        """Hash ``password`` at the current cost without waiting; ``on_hashed(new_hash)`` runs when done.
+
+        Fire-and-forget, for cost upgrades that must not delay the request
+        that triggered them. The hash and ``on_hashed`` both run on one of
+        the hasher's REHASH_THREADS background threads, so a slow callback
+        (e.g. a database write) never holds up other hash results.
+        ``on_hashed`` is not called if hashing fails.
+        """
+        return self._background().submit(self._rehash, password, on_hashed)
+
+    def _rehash(self, password, on_hashed):
+        try:
+            new_hash = self._run(_hashpw, password, self.rounds)
+        except Exception as e:
+            print(f"Error re-hashing password: {str(e)}")
+            return
+        self._count('rehashed')
+        on_hashed(new_hash)
+
+    def _background(self):
+        with self._lock:
+            if self._rehash_threads is None or self._rehash_pid != os.getpid():
+                self._rehash_threads = ThreadPoolExecutor(max_workers=REHASH_THREADS, thread_name_prefix='password-rehash')
+                self._rehash_pid = os.getpid()
+            return self._rehash_threads
+
+    def _run(self, fn, *args):
+        started = time.monotonic()
+        with self._lock:
+            counters = self._counters
+            counters['in_flight'] += 1
+            counters['max_in_flight'] = max(counters['max_in_flight'], counters['in_flight'])
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return fn(*args)
+            return executor.submit(fn, *args).result(self.timeout)
+        except Exception:
+            self._count('failed')
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                counters['in_flight'] -= 1
+                counters['latency_total'] += elapsed
+                counters['latency_max'] = max(counters['latency_max'], elapsed)
+
+    def _get_executor(self):
+        if self.workers <= 0:
+            return None
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def shutdown(self):
+        with self._lock:
+            rehash_threads, self._rehash_threads = self._rehash_threads, None
+            executor, self._executor = self._executor, None
+        if rehash_threads is not None:
+            rehash_threads.shutdown(wait=True)
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        calls = counters['hashed'] + counters['verified'] + counters['failed']
+        return {
+            'rounds': self.rounds,
+            'workers': self.workers,
+            # Calls submitted but not finished; above `workers` means requests are queueing
+            'in_flight': counters['in_flight'],
+            'queue_depth': max(0, counters['in_flight'] - max(self.workers, 1)),
+            'max_in_flight': counters['max_in_flight'],
+            'hashed': counters['hashed'],
+            'verified': counters['verified'],
+            'rehashed': counters['rehashed'],
+            'failed': counters['failed'],
+            'avg_latency_ms': round(counters['latency_total'] / calls * 1000, 3) if calls else 0.0,
+            'max_latency_ms': round(counters['latency_max'] * 1000, 3),
+        }
+
+
+password_hasher = PasswordHasher()
+
+
+def hash_password(password):
+    return password_hasher.hash_password(password)
+
+
+def verify_password(stored_hash, password):
+    return password_hasher.verify_password(stored_hash, password)
@@ -1,54 +1,197 @@
 from flask import Blueprint, request, jsonify
-from database import get_db_connection
+from mysql.connector import IntegrityError
+from database import get_db_connection, duplicate_key
+from httpCache import data_versions
+from idempotencyStore import idempotency_store, fingerprint, IdempotencyConflict, MAX_KEY_LENGTH
+from menuCache import menu_cache
+from orderBuffer import order_buffer, accepted_body, DuplicateOrderKey, ORDER_INGEST_MODE
+from orderEvents import order_events
+from orderWatch import order_watch
 
 order_bp = Blueprint('order', __name__)
 
+IDEMPOTENCY_SCOPE = 'place-order'
+# Claims tried when the key's row vanishes (expired or purged) between the conflict and the re-read
+CLAIM_ATTEMPTS = 2
+
+INSERT_ORDER = """
+INSERT INTO Orders (table_number, customer_id, order_status, total_price)
+VALUES (%s, %s, 'Pending', %s)
+"""
+
+UPDATE_REWARDS = """
+UPDATE UserRewards
+SET orders = orders + 1
+WHERE user_id = %s
+"""
+
+INSERT_ORDER_ITEM = """
+INSERT INTO OrderItems (order_id, menu_id, quantity, subtotal)
+VALUES (%s, %s, %s, %s)
+"""
+
+
+def price_cart(items):
+    """Price cart lines from the menu, ignoring any client-sent subtotal.
+
+    Returns ([(menu_id, name, quantity, subtotal), ...], total_price); raises
+    ValueError with a client-facing message for a malformed line or an item
+    that is not on the menu.
+    """
+    if not isinstance(items, list):
+        raise ValueError("cart_items must be a list")
+    order_items = []
+    for item in items:
+        try:
+            menu_id = int(item['menu_id'])
+            quantity = int(item['quantity'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Each cart item needs a numeric menu_id and quantity")
+        if quantity < 1:
+            raise ValueError(f"Invalid quantity for menu item {menu_id}")
+        menu_item = menu_cache.get(menu_id)
+        if menu_item is None:
+            raise ValueError(f"Menu item {menu_id} not found")
+        order_items.append((menu_id, menu_item['name'], quantity, menu_item['price'] * quantity))
+    return order_items, sum(subtotal for _, _, _, subtotal in order_items)
+
+
 @order_bp.route('/place-order', methods=['POST'])
 def place_order():
     data = request.json
     table_number = data.get('table_number')
     customer_id = data.get('customer_id')
-    items = data.get('cart_items')  # List of { menu_id, quantity, subtotal }
+    items = data.get('cart_items')  # List of { menu_id, quantity }; subtotals are priced server-side
     print(f"Received order data: {data}")
 
     if not table_number or not customer_id or not items:
         return jsonify({"error": "Missing table_number, customer_id, or items"}), 400
 
-    print(f"Received order data: {data}")
-    
+    # Retries carrying the same Idempotency-Key get the first response instead of a second order
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if not idempotency_key:
+        return create_order(table_number, customer_id, items)
+    if len(idempotency_key) > MAX_KEY_LENGTH:
+        return jsonify({"error": "Idempotency-Key is too long"}), 400
+
+    request_hash = fingerprint(data)
+    try:
+        with idempotency_store.hold(IDEMPOTENCY_SCOPE, idempotency_key):
+            replayed = idempotency_store.replay(IDEMPOTENCY_SCOPE, idempotency_key, request_hash)
+            if replayed:
+                return replay_response(*replayed)
+            return create_order(table_number, customer_id, items, (idempotency_key, request_hash))
+    except IdempotencyConflict:
+        return jsonify({"error": "Idempotency-Key was already used for a different order"}), 422
+    except Exception as e:
+        print(f"Error placing order: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def replay_response(status, body):
+    response = jsonify(body)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response, status
+
+
+def create_order(table_number, customer_id, items, idempotency=None):
+    """Write one order; ``idempotency`` is an optional (key, request_hash) recorded in the same transaction."""
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            # Calculate total price
-            total_price = sum(item['subtotal'] for item in items)
-
-            # Insert into Orders table
-            query = """
-            INSERT INTO Orders (table_number, customer_id, order_status, total_price)
-            VALUES (%s, %s, 'Pending', %s)
-            """
-            cursor.execute(query, (table_number, customer_id, total_price))
-            order_id = cursor.lastrowid  # Get the newly created order_id
-            
-            # Update UserRewards table by increasing the orders value for the user
-            update_query = """
-            UPDATE UserRewards
-            SET orders = orders + 1
-            WHERE user_id = %s
-            """
-            cursor.execute(update_query, (customer_id,))  # Assuming customer_id is the same as user_id
-
-            # Insert into OrderItems table
-            for item in items:
-                query = """
-                INSERT INTO OrderItems (order_id, menu_id, quantity, subtotal)
-                VALUES (%s, %s, %s, %s)
-                """
-                cursor.execute(query, (order_id, item['menu_id'], item['quantity'], item['subtotal']))
-
-            connection.commit()
-            return jsonify({"message": "Order placed successfully", "order_id": order_id}), 201
+        try:
+            order_items, total_price = price_cart(items)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
+        if ORDER_INGEST_MODE == 'buffered':
+            return buffer_order(table_number, customer_id, order_items, total_price, idempotency)
+
+        with get_db_connection() as connection, connection.cursor() as cursor:
+            # The order, its items and the reward counter commit together or not at all
+            try:
+                if idempotency:
+                    replayed = claim_key(connection, cursor, idempotency)
+                    if replayed is not None:
+                        return replayed
+
+                cursor.execute(INSERT_ORDER, (table_number, customer_id, total_price))
+                order_id = cursor.lastrowid  # Get the newly created order_id
+
+                # Update UserRewards table by increasing the orders value for the user
+                cursor.execute(UPDATE_REWARDS, (customer_id,))  # Assuming customer_id is the same as user_id
+
+                # All cart lines in one multi-row INSERT
+                cursor.executemany(INSERT_ORDER_ITEM, [
+                    (order_id, menu_id, quantity, subtotal) for menu_id, _, quantity, subtotal in order_items
+                ])
+
+                body = accepted_body(order_id)
+                if idempotency:
+                    idempotency_store.complete(cursor, IDEMPOTENCY_SCOPE, idempotency[0], 201, body)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+        if idempotency:
+            idempotency_store.committed(IDEMPOTENCY_SCOPE, *idempotency, 201, body)
+
+        announce_order(order_id, table_number, order_items)
+        order_watch.notify(customer_id)
+        return jsonify(body), 201
+
+    except IdempotencyConflict:
+        raise
     except Exception as e:
         print(f"Error placing order: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+def claim_key(connection, cursor, idempotency):
+    """Claim the key on the open transaction; returns None once claimed, else the response to send."""
+    for _ in range(CLAIM_ATTEMPTS):
+        try:
+            idempotency_store.claim(cursor, IDEMPOTENCY_SCOPE, *idempotency)
+            return None
+        except IntegrityError as e:
+            if duplicate_key(e) is None:
+                raise
+        # Another worker committed this key first; answer with its response
+        connection.rollback()
+        replayed = idempotency_store.replay(IDEMPOTENCY_SCOPE, *idempotency)
+        if replayed is not None:
+            return replay_response(*replayed)
+        # Its row expired or was purged before it could be read back; claim again
+    print(f"Error: Idempotency-Key {idempotency[0]} kept conflicting without a stored response")
+    return jsonify({"error": "Idempotency-Key is in use; retry the request"}), 409
+
+
+def buffer_order(table_number, customer_id, order_items, total_price, idempotency=None):
+    """Log the order for the background flusher (ORDER_INGEST_MODE=buffered) and acknowledge it at once."""
+    try:
+        order_id = order_buffer.append(table_number, customer_id, order_items, total_price, idempotency)
+    except DuplicateOrderKey as e:
+        # Another worker on this host already logged this key
+        if e.request_hash != idempotency[1]:
+            raise IdempotencyConflict(idempotency[0])
+        return replay_response(202, accepted_body(e.order_id))
+
+    body = accepted_body(order_id)
+    if idempotency:
+        idempotency_store.committed(IDEMPOTENCY_SCOPE, *idempotency, 202, body)
+    announce_order(order_id, table_number, order_items)
+    return jsonify(body), 202
+
+
+def announce_order(order_id, table_number, order_items):
+    # Kitchen screens get the new ticket pushed in the same shape as /pending-orders
+    new_order = {
+        'order_id': order_id,
+        'order_status': 'Pending',
+        'table_number': table_number,
+        'items': [
+            {'food_name': name, 'quantity': quantity, 'subtotal': float(subtotal)}
+            for _, name, quantity, subtotal in order_items
+        ]
+    }
+    data_versions.bump('orders')
+    order_events.publish('order_created', new_order)
@@ -1,17 +1,20 @@
+from concurrent.futures import TimeoutError as HashTimeout
 from flask import Blueprint, jsonify, request
+from mysql.connector import IntegrityError
+from dashboardStats import dashboard_stats
 from database import get_db_connection
-import bcrypt
+from httpCache import data_versions
+from passwordHasher import hash_password
+from roles import ALLOWED_ROLES, CUSTOMER_ROLE
+from userImport import (
+    BULK_IMPORT_HASH_TIMEOUT, BULK_IMPORT_MAX, INSERT_USER, duplicate_error, import_users,
+)
 
 register_bp = Blueprint('register', __name__)
 
-def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-
 # Register route
 @register_bp.route('/register', methods=['POST'])
 def register():
-    connection = None
-    cursor = None
     try:
         email = request.form.get('email')
         name = request.form.get('name')
@@ -26,50 +29,59 @@ def register():
         print(f"Role received: {role}")
         print(f"Received data: {email}")
 
-        allowed_roles = ['Admin', 'Chef', 'Customer']
-        if role not in allowed_roles:
+        if role not in ALLOWED_ROLES:
             print(f"Error: Invalid role '{role}' received")
             return jsonify({"error": "Invalid role. Choose from 'Admin', 'Chef', or 'Customer'."}), 400
 
-        connection = get_db_connection()
-        if connection:
-            # Use a buffered cursor to avoid "Unread result found" error
-            cursor = connection.cursor(buffered=True)
-            
-            # Check if email already exists
-            cursor.execute("SELECT * FROM Users WHERE email = %s", (email,))
-            existing_email = cursor.fetchone()
-            if existing_email:
-                print(f"Error: Email {email} already registered")
-                return jsonify({"error": "Email already registered"}), 409
+        # Hash before borrowing a connection so it isn't held while bcrypt runs
+        hashed_password = hash_password(password)
+
+        # Uniqueness of email and phone is enforced by the table's unique indexes
+        try:
+            with get_db_connection() as connection, connection.cursor() as cursor:
+                cursor.execute(INSERT_USER, (name, email, phone, hashed_password, role))
+                connection.commit()
+        except IntegrityError as e:
+            error = duplicate_error(e)
+            if error is None:
+                raise
+            print(f"Error: {error} ({email}, {phone})")
+            return jsonify({"error": error}), 409
 
-            # Check if phone number already exists
-            cursor.execute("SELECT * FROM Users WHERE phone = %s", (phone,))
-            existing_phone = cursor.fetchone()
-            if existing_phone:
-                print(f"Error: Phone number {phone} already registered")
-                return jsonify({"error": "Phone number already registered"}), 409
+        if role == CUSTOMER_ROLE:
+            dashboard_stats.record_customer()
+        data_versions.bump('users')
+        return jsonify({"message": "User registered successfully"}), 200
 
-            hashed_password = hash_password(password)
+    except Exception as e:
+        print(f"Error during registration: {str(e)}")
+        return jsonify({"error": "Internal Server Error"}), 500
 
-            insert_query = """
-            INSERT INTO Users (name, email, phone, password, role)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            cursor.execute(insert_query, (name, email, phone, hashed_password, role))
-            connection.commit()
 
-            return jsonify({"message": "User registered successfully"}), 200
-        else:
-            print("Error: Database connection failed")
-            return jsonify({"error": "Database connection failed"}), 500
+@register_bp.route('/register/bulk', methods=['POST'])
+def bulk_register():
+    """Import a staff or loyalty-member list: {"users": [{name, email, phone, role, password?}, ...]}.
+
+    Users without a password set their own through Forgot Password. Lists
+    longer than BULK_IMPORT_MAX go through ``python userImport.py`` instead.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        users = data.get('users')
+        if not isinstance(users, list) or not users:
+            return jsonify({"error": "A non-empty 'users' list is required"}), 400
+        if len(users) > BULK_IMPORT_MAX:
+            return jsonify({"error": f"At most {BULK_IMPORT_MAX} users per request; "
+                                     "import larger lists with userImport.py"}), 413
+
+        try:
+            created, skipped = import_users(users, hash_timeout=BULK_IMPORT_HASH_TIMEOUT)
+        except HashTimeout:
+            # Nothing was inserted yet: hashing runs before the first INSERT
+            print(f"Error: hashing {len(users)} imported passwords took over {BULK_IMPORT_HASH_TIMEOUT}s")
+            return jsonify({"error": "Import took too long; use userImport.py for this list"}), 503
+        return jsonify({"created": len(created), "skipped": skipped}), 200
 
     except Exception as e:
-        print(f"Error during registration: {str(e)}")
+        print(f"Error during bulk registration: {str(e)}")
         return jsonify({"error": "Internal Server Error"}), 500
-    finally:
-        # Ensure cursor and connection are closed properly
-        if cursor:
-            cursor.close()
-        if connection:
-            connection.close()
\ No newline at end of file
@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+
+from database import get_db_connection
+
+# Safety net for reviews written by other workers or backfillSentiment.py
+REVIEW_SUMMARY_TTL = float(os.environ.get('REVIEW_SUMMARY_TTL', 300))
+
+SENTIMENTS = ('positive', 'negative', 'neutral')
+RATINGS = (1, 2, 3, 4, 5)
+
+SUMMARY_COLUMNS = ('menu_id', 'review_count', 'rating_sum') \
+    + tuple(f'rating_{rating}' for rating in RATINGS) + SENTIMENTS
+
+# One statement adds (or, with negative deltas, removes) a review's contribution
+UPSERT_SUMMARY = f"""
+INSERT INTO ReviewSummary ({', '.join(SUMMARY_COLUMNS)})
+VALUES ({', '.join(['%s'] * len(SUMMARY_COLUMNS))})
+ON DUPLICATE KEY UPDATE
+    {', '.join(f'{column} = {column} + VALUES({column})' for column in SUMMARY_COLUMNS[1:])}
+"""
+
+UPDATE_SENTIMENT_COUNTS = f"""
+UPDATE ReviewSummary
+SET {', '.join(f'{sentiment} = {sentiment} + %s' for sentiment in SENTIMENTS)}
+WHERE menu_id = %s
+"""
+
+
+def record_review(cursor, menu_id, rating, sentiment, delta=1):
+    """Add (delta=1) or remove (delta=-1) one review from its menu item's summary, on the caller's transaction."""
+    sentiment = (sentiment or '').lower()
+    cursor.execute(UPSERT_SUMMARY, (menu_id, delta, delta * rating)
+                   + tuple(delta if rating == value else 0 for value in RATINGS)
+                   + tuple(delta if sentiment == value else 0 for value in SENTIMENTS))
+
+
+def record_sentiments(cursor, counts):
+    """Count newly scored reviews: ``counts`` maps (menu_id, sentiment) to how many were labelled so."""
+    by_menu = {}
+    for (menu_id, sentiment), count in counts.items():
+        sentiment = (sentiment or '').lower()
+        if sentiment in SENTIMENTS:
+            by_menu.setdefault(menu_id, dict.fromkeys(SENTIMENTS, 0))[sentiment] += count
+    if by_menu:
+        cursor.executemany(UPDATE_SENTIMENT_COUNTS, [
+            tuple(added[sentiment] for sentiment in SENTIMENTS) + (menu_id,)
+            for menu_id, added in by_menu.items()
+        ])
+
+
+def summary_from_row(row):
+    """API shape of a ReviewSummary row; ``row`` is a tuple in SUMMARY_COLUMNS order, or None."""
+    values = dict(zip(SUMMARY_COLUMNS, row)) if row else dict.fromkeys(SUMMARY_COLUMNS, 0)
+    count = int(values['review_count'])
+    sentiments = {sentiment: int(values[sentiment]) for sentiment in SENTIMENTS}
+    sentiments['unknown'] = count - sum(sentiments.values())
+    return {
+        'review_count': count,
+        'average_rating': round(float(values['rating_sum']) / count, 2) if count else None,
+        'rating_histogram': {str(rating): int(values[f'rating_{rating}']) for rating in RATINGS},
+        'sentiment': sentiments,
+    }
+
+
+def _load_summaries():
+    with get_db_connection() as connection, connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM ReviewSummary")
+        return cursor.fetchall()
+
+
+class ReviewSummaryCache:
+    """Process-level copy of ReviewSummary, one small row per menu item.
+
+    Loaded on first use; the review write handlers re-read the rows they
+    changed after committing, so listings and summary endpoints never hit
+    MySQL. Every change bumps ``version``. As in MenuCache, a re-read takes
+    a ticket before querying and is dropped if a later one was already
+    applied for the same item.
+    """
+
+    def __init__(self, loader=_load_summaries, ttl=REVIEW_SUMMARY_TTL):
+        self._loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._summaries = None  # menu_id -> summary dict
+        self._loaded_at = 0.0
+        self.version = 0
+        self._tickets = 0
+        self._applied = {}  # menu_id -> ticket of the last row applied
+        self._counters = {'loads': 0, 'refreshes': 0, 'stale_refreshes': 0}
+
+    def _snapshot(self):
+        with self._lock:
+            if self._summaries is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self._summaries = {row[0]: summary_from_row(row) for row in self._loader()}
+                self._loaded_at = time.monotonic()
+                self._counters['loads'] += 1
+                self.version += 1
+            return self._summaries
+
+    def current_version(self):
+        self._snapshot()
+        return self.version
+
+    def get(self, menu_id):
+        """Summary for a menu item; items without reviews get an empty one."""
+        return self._snapshot().get(menu_id) or summary_from_row(None)
+
+    def refresh(self, connection, menu_id):
+        """Re-read one item's row on the writer's connection after it commits."""
+        with self._lock:
+            self._tickets += 1
+            ticket = self._tickets
+        cursor = connection.cursor(buffered=True)
+        cursor.execute(f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM ReviewSummary WHERE menu_id = %s", (menu_id,))
+        row = cursor.fetchone()
+        cursor.close()
+        with self._lock:
+            if self._summaries is None:
+                return
+            if ticket < self._applied.get(menu_id, 0):
+                self._counters['stale_refreshes'] += 1
+                return  # A re-read that started later already applied a newer row
+            self._applied[menu_id] = ticket
+            # Writers swap in a new dict so readers holding the old one are unaffected
+            summaries = dict(self._summaries)
+            summaries[menu_id] = summary_from_row(row)
+            self._summaries = summaries
+            self._counters['refreshes'] += 1
+            self.version += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'items': len(self._summaries) if self._summaries is not None else 0,
+                'version': self.version,
+                **self._counters,
+            }
+
+
+review_summaries = ReviewSummaryCache()
@@ -0,0 +1,6 @@
+# Values of Users.role, as register.py stores them
+ADMIN_ROLE = 'Admin'
+CHEF_ROLE = 'Chef'
+CUSTOMER_ROLE = 'Customer'
+
+ALLOWED_ROLES = [ADMIN_ROLE, CHEF_ROLE, CUSTOMER_ROLE]
@@ -1,8 +1,14 @@
 from flask import Blueprint, jsonify, request
 import logging
 from database import get_db_connection
+from httpCache import conditional, data_versions
+from inferenceQueue import InferenceQueueFull, MicroBatcher
+from jsonStream import STREAM_CHUNK_ROWS, json_stream_response, wants_stream
+from menuCache import MENU_FIELDS, menu_cache
+from pagination import encode_cursor, decode_cursor
+from reviewSummary import record_review, review_summaries
+from sentimentModel import sentiment_models
 from datetime import datetime
-import joblib
 import os
 
 review_bp = Blueprint('review', __name__)
@@ -10,58 +16,129 @@ review_bp = Blueprint('review', __name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-MODEL_PATH = r"D:\fyp\fyp\Backend\model_nb.pkl"
-VECTORIZER_PATH = r"D:\fyp\fyp\Backend\vectorizer.pkl"
-sentiment_model = None
-
-try:
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError(f"Sentiment model file not found at {MODEL_PATH}")
-    
-    logger.info(f"Attempting to load sentiment model from {MODEL_PATH}")
-    with open(MODEL_PATH, 'rb') as file:
-        sentiment_model = joblib.load(file)
-    logger.info("Sentiment model loaded successfully")
-    
-except Exception as e:
-    logger.error(f"Failed to load sentiment model: {str(e)}", exc_info=True)
-    sentiment_model = None
-    logger.warning("Sentiment analysis will be disabled due to loading failure")
+# Upper bound on documents scored by one /predict/batch request
+MAX_PREDICT_BATCH = 1000
+
+REVIEWS_PAGE_SIZE = 20
+REVIEWS_MAX_PAGE_SIZE = 100
+
+
+def predict_sentiments(texts):
+    """Score many texts with one vectorized predict call; labels are lowercased."""
+    texts = [text if isinstance(text, str) else str(text) for text in texts]
+    if not texts:
+        return []
+    return [str(label).lower() for label in sentiment_models.predict(texts)]
+
+
+# Concurrent single-review predictions are coalesced into one predict call
+sentiment_batcher = MicroBatcher(
+    predict_sentiments,
+    window=float(os.environ.get('SENTIMENT_BATCH_WINDOW_MS', 3)) / 1000,
+    max_batch=int(os.environ.get('SENTIMENT_MAX_BATCH', 64)),
+    max_queue=int(os.environ.get('SENTIMENT_QUEUE_SIZE', 1024)),
+    result_timeout=float(os.environ.get('SENTIMENT_RESULT_TIMEOUT', 10)),
+)
+
+
+def lowercase_sentiment(review):
+    if review['sentiment']:
+        review['sentiment'] = review['sentiment'].lower()
+    return review
+
+
+def select_reviews(connection, menu_id, limit, after=None):
+    """Up to ``limit`` reviews of a menu item, newest first, after the (created_at, review_id) key ``after``."""
+    conditions, params = ["r.menu_id = %s"], [menu_id]
+    if after is not None:
+        created_at, review_id = after
+        conditions.append("r.created_at <= %s AND (r.created_at < %s OR r.review_id < %s)")
+        params.extend([created_at, created_at, review_id])
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute(f"""
+        SELECT r.review_id, r.rating, r.feedback, r.created_at, r.customer_name, r.sentiment,
+               m.name AS food_name
+        FROM Reviews r
+        JOIN Menu m ON r.menu_id = m.menu_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY r.created_at DESC, r.review_id DESC
+        LIMIT %s
+    """, params + [limit])
+    reviews = cursor.fetchall()
+    cursor.close()
+    return reviews
+
+
+def iter_reviews(menu_id, first_page, chunk_size=STREAM_CHUNK_ROWS):
+    """Every review of a menu item, one keyset page at a time after ``first_page``.
+
+    Each page borrows a connection only while it is read, so a slow client
+    never holds one between pages.
+    """
+    page = first_page
+    while True:
+        yield from page
+        if len(page) < chunk_size:
+            return
+        last = page[-1]
+        with get_db_connection() as connection:
+            page = select_reviews(connection, menu_id, chunk_size, (last['created_at'], last['review_id']))
+
 
 @review_bp.route('/reviews/<int:menu_id>', methods=['GET'])
+@conditional(lambda menu_id: ('reviews', data_versions.get(f'reviews:{menu_id}')))
 def get_reviews(menu_id):
+    """One page of a menu item's reviews, newest first, with the item's review summary.
+
+    Keyset-paginated on (created_at, review_id): pass the returned
+    ``next_cursor`` as ``cursor`` for the next page. With ``?stream=1`` the
+    whole list comes back instead, as a plain array streamed in
+    STREAM_CHUNK_ROWS pages as the client reads it.
+    """
     try:
-        connection = get_db_connection()
-        if not connection:
-            logger.error("Database connection failed")
-            return jsonify({"error": "Database connection failed"}), 500
-
-        cursor = connection.cursor(dictionary=True)
-        query = """
-            SELECT r.review_id, r.rating, r.feedback, r.created_at, r.customer_name, r.sentiment,
-                   m.name AS food_name
-            FROM Reviews r
-            JOIN Menu m ON r.menu_id = m.menu_id
-            WHERE r.menu_id = %s
-            ORDER BY r.created_at DESC
-        """
-        cursor.execute(query, (menu_id,))
-        reviews = cursor.fetchall()
-        
+        if wants_stream():
+            # The first page is read now, so a failing query still gets a 500
+            with get_db_connection() as connection:
+                first_page = select_reviews(connection, menu_id, STREAM_CHUNK_ROWS)
+            return json_stream_response(iter_reviews(menu_id, first_page), transform=lowercase_sentiment), 200
+
+        limit = min(max(request.args.get('limit', REVIEWS_PAGE_SIZE, type=int), 1), REVIEWS_MAX_PAGE_SIZE)
+        after = None
+        if request.args.get('cursor'):
+            try:
+                after = decode_cursor(request.args['cursor'])
+            except (ValueError, TypeError):
+                return jsonify({"error": "Invalid cursor parameter"}), 400
+
+        with get_db_connection() as connection:
+            # One extra row tells whether another page exists
+            reviews = select_reviews(connection, menu_id, limit + 1, after)
+
+        has_more = len(reviews) > limit
+        reviews = reviews[:limit]
+        next_cursor = encode_cursor(reviews[-1]['created_at'], reviews[-1]['review_id']) if has_more else None
+
         # Standardize sentiment to lowercase
         for review in reviews:
-            if review['sentiment']:
-                review['sentiment'] = review['sentiment'].lower()
+            lowercase_sentiment(review)
         
-        cursor.close()
-        connection.close()
         logger.info(f"Fetched {len(reviews)} reviews for menu_id {menu_id}")
-        return jsonify(reviews), 200
+        return jsonify({
+            "reviews": reviews,
+            "next_cursor": next_cursor,
+            "summary": review_summaries.get(menu_id)
+        }), 200
 
     except Exception as e:
         logger.error(f"Error fetching reviews: {str(e)}")
         return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
 
+@review_bp.route('/reviews/<int:menu_id>/summary', methods=['GET'])
+@conditional(lambda menu_id: ('review-summary', review_summaries.current_version()))
+def get_review_summary(menu_id):
+    """Review count, average rating, rating histogram and sentiment mix, maintained as reviews change."""
+    return jsonify({"menu_id": menu_id, **review_summaries.get(menu_id)}), 200
+
 @review_bp.route('/reviews', methods=['POST'])
 def submit_review():
     try:
@@ -91,58 +168,57 @@ def submit_review():
             return jsonify({"error": "Rating must be an integer between 1 and 5"}), 400
 
         sentiment = "unknown"
-        if sentiment_model:
+        if sentiment_models.get():
             try:
                 logger.info(f"Performing sentiment analysis on feedback: {feedback}")
                 if not isinstance(feedback, str):
                     logger.warning(f"Feedback is not a string: {type(feedback)}")
                     feedback = str(feedback)
-                sentiment_pred = sentiment_model.predict([feedback])[0]
-                logger.info(f"Predicted sentiment: {sentiment_pred}")
-                sentiment = str(sentiment_pred).lower()  # Standardize to lowercase
+                sentiment = sentiment_batcher.submit(feedback)  # Already lowercase
+                logger.info(f"Predicted sentiment: {sentiment}")
+            except InferenceQueueFull:
+                # Stored as 'unknown'; backfillSentiment.py scores it later
+                logger.warning("Sentiment queue full, storing review without sentiment")
+                sentiment = "unknown"
             except Exception as e:
                 logger.error(f"Sentiment analysis failed: {str(e)}", exc_info=True)
                 sentiment = "unknown"
         else:
             logger.warning("Sentiment model not available, defaulting to 'unknown'")
 
-        connection = get_db_connection()
-        if not connection:
-            logger.error("Database connection failed")
-            return jsonify({"error": "Database connection failed"}), 500
-
-        cursor = connection.cursor(dictionary=True)
-        query = "SELECT menu_id, name FROM Menu WHERE menu_id = %s"
-        cursor.execute(query, (menu_id,))
-        food_item = cursor.fetchone()
-
-        if not food_item:
+        with get_db_connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            query = "SELECT menu_id, name FROM Menu WHERE menu_id = %s"
+            cursor.execute(query, (menu_id,))
+            food_item = cursor.fetchone()
+
+            if not food_item:
+                cursor.close()
+                logger.warning(f"Food item with menu_id {menu_id} not found")
+                return jsonify({"error": f"Food item with menu_id {menu_id} not found"}), 404
+
+            query = """
+                INSERT INTO Reviews (menu_id, rating, feedback, customer_name, created_at, sentiment)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """
+            values = (menu_id, rating, feedback, customer_name or "Anonymous", datetime.utcnow(), sentiment)
+            cursor.execute(query, values)
+            review_id = cursor.lastrowid
+            # The item's summary counts the review in the same transaction
+            record_review(cursor, menu_id, rating, sentiment)
+            connection.commit()
+
+            query = """
+                SELECT review_id, menu_id, rating, feedback, customer_name, created_at, sentiment
+                FROM Reviews WHERE review_id = %s
+            """
+            cursor.execute(query, (review_id,))
+            new_review = cursor.fetchone()
+            new_review['sentiment'] = new_review['sentiment'].lower()  # Ensure lowercase
             cursor.close()
-            connection.close()
-            logger.warning(f"Food item with menu_id {menu_id} not found")
-            return jsonify({"error": f"Food item with menu_id {menu_id} not found"}), 404
-
-        query = """
-            INSERT INTO Reviews (menu_id, rating, feedback, customer_name, created_at, sentiment)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        values = (menu_id, rating, feedback, customer_name or "Anonymous", datetime.utcnow(), sentiment)
-        cursor.execute(query, values)
-        connection.commit()
-
-        cursor.execute("SELECT LAST_INSERT_ID() AS review_id")
-        review_id = cursor.fetchone()['review_id']
-
-        query = """
-            SELECT review_id, menu_id, rating, feedback, customer_name, created_at, sentiment
-            FROM Reviews WHERE review_id = %s
-        """
-        cursor.execute(query, (review_id,))
-        new_review = cursor.fetchone()
-        new_review['sentiment'] = new_review['sentiment'].lower()  # Ensure lowercase
-        cursor.close()
-        connection.close()
+            review_summaries.refresh(connection, menu_id)
 
+        data_versions.bump(f'reviews:{menu_id}')
         logger.info(f"Review submitted successfully with sentiment: {sentiment}")
         return jsonify({
             "message": "Review submitted successfully",
@@ -164,7 +240,7 @@ def predict_sentiment():
             logger.warning("Missing required field: review")
             return jsonify({"error": "Missing required field: review"}), 400
 
-        if not sentiment_model:
+        if not sentiment_models.get():
             logger.error("Sentiment model not loaded")
             return jsonify({"error": "Sentiment analysis unavailable"}), 503
 
@@ -172,9 +248,12 @@ def predict_sentiment():
             if not isinstance(review_text, str):
                 logger.warning(f"Review text is not a string: {type(review_text)}")
                 review_text = str(review_text)
-            sentiment = sentiment_model.predict([review_text])[0]
+            sentiment = sentiment_batcher.submit(review_text)
             logger.info(f"Predicted sentiment for '{review_text}': {sentiment}")
-            return jsonify({"sentiment": str(sentiment).lower()}), 200
+            return jsonify({"sentiment": sentiment}), 200
+        except InferenceQueueFull:
+            logger.warning("Sentiment queue full, rejecting prediction")
+            return jsonify({"error": "Sentiment analysis busy, retry shortly"}), 503
         except Exception as e:
             logger.error(f"Sentiment prediction failed: {str(e)}", exc_info=True)
             return jsonify({"error": "Sentiment prediction failed", "details": str(e)}), 500
@@ -183,27 +262,85 @@ def predict_sentiment():
         logger.error(f"Error in sentiment prediction endpoint: {str(e)}", exc_info=True)
         return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
 
-@review_bp.route('/reviews/<int:review_id>', methods=['DELETE'])
-def delete_review(review_id):
+@review_bp.route('/predict/batch', methods=['POST'])
+def predict_sentiment_batch():
     try:
-        connection = get_db_connection()
-        if not connection:
-            logger.error("Database connection failed")
-            return jsonify({"error": "Database connection failed"}), 500
+        data = request.get_json() or {}
+        reviews = data.get('reviews')
+
+        if not isinstance(reviews, list) or not reviews:
+            logger.warning("Missing required field: reviews")
+            return jsonify({"error": "Missing required field: reviews (non-empty list)"}), 400
+        if len(reviews) > MAX_PREDICT_BATCH:
+            logger.warning(f"Batch of {len(reviews)} reviews exceeds {MAX_PREDICT_BATCH}")
+            return jsonify({"error": f"At most {MAX_PREDICT_BATCH} reviews per request"}), 400
+
+        if not sentiment_models.get():
+            logger.error("Sentiment model not loaded")
+            return jsonify({"error": "Sentiment analysis unavailable"}), 503
+
+        try:
+            sentiments = predict_sentiments(reviews)
+            logger.info(f"Predicted sentiment for {len(sentiments)} reviews")
+            return jsonify({"sentiments": sentiments}), 200
+        except Exception as e:
+            logger.error(f"Batch sentiment prediction failed: {str(e)}", exc_info=True)
+            return jsonify({"error": "Sentiment prediction failed", "details": str(e)}), 500
+
+    except Exception as e:
+        logger.error(f"Error in batch sentiment prediction endpoint: {str(e)}", exc_info=True)
+        return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
 
-        cursor = connection.cursor()
-        query = "DELETE FROM Reviews WHERE review_id = %s"
-        cursor.execute(query, (review_id,))
-        connection.commit()
+@review_bp.route('/model', methods=['GET'])
+def get_model_info():
+    return jsonify(sentiment_models.info()), 200
 
-        if cursor.rowcount == 0:
+@review_bp.route('/model/reload', methods=['POST'])
+def reload_model():
+    try:
+        data = request.get_json(silent=True) or {}
+        model_name = data.get('model')
+        model_path = None
+        if model_name:
+            # Only files already deployed next to the current model can be loaded
+            if os.path.basename(model_name) != model_name or not model_name.endswith('.pkl'):
+                logger.warning(f"Rejected model name: {model_name}")
+                return jsonify({"error": "model must be a .pkl file name in the model directory"}), 400
+            model_path = os.path.join(os.path.dirname(sentiment_models.model_path), model_name)
+
+        info = sentiment_models.reload(model_path)
+        return jsonify({"message": "Sentiment model reloaded", "model": info}), 200
+
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error reloading sentiment model: {str(e)}", exc_info=True)
+        return jsonify({"error": "Model reload failed, previous model still active", "details": str(e)}), 500
+
+@review_bp.route('/reviews/<int:review_id>', methods=['DELETE'])
+def delete_review(review_id):
+    try:
+        with get_db_connection() as connection:
+            # Buffered so the lookup can be followed by the DELETE
+            cursor = connection.cursor(buffered=True)
+            cursor.execute("SELECT menu_id, rating, sentiment FROM Reviews WHERE review_id = %s FOR UPDATE", (review_id,))
+            review = cursor.fetchone()
+            query = "DELETE FROM Reviews WHERE review_id = %s"
+            cursor.execute(query, (review_id,))
+            deleted = cursor.rowcount
+            if deleted:
+                record_review(cursor, review[0], review[1], review[2], delta=-1)
+            connection.commit()
             cursor.close()
-            connection.close()
+            if deleted:
+                review_summaries.refresh(connection, review[0])
+
+        if deleted == 0:
             logger.warning(f"Review with review_id {review_id} not found")
             return jsonify({"error": f"Review with review_id {review_id} not found"}), 404
 
-        cursor.close()
-        connection.close()
+        data_versions.bump(f'reviews:{review[0]}')
+
         logger.info(f"Review with review_id {review_id} deleted successfully")
         return jsonify({"message": f"Review with review_id {review_id} deleted successfully"}), 200
 
@@ -212,19 +349,13 @@ def delete_review(review_id):
         return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
 
 @review_bp.route('/menu', methods=['GET'])
+@conditional(lambda: ('menu', menu_cache.current_version()))
 def get_menu():
     try:
-        connection = get_db_connection()
-        if not connection:
-            logger.error("Database connection failed")
-            return jsonify({"error": "Database connection failed"}), 500
-
-        cursor = connection.cursor(dictionary=True)
-        query = "SELECT menu_id, name, description, price, category, image_url FROM Menu"
-        cursor.execute(query)
-        menu_items = cursor.fetchall()
-        cursor.close()
-        connection.close()
+        menu_items = [
+            {key: item[key] for key in MENU_FIELDS}
+            for item in menu_cache.all()
+        ]
         logger.info(f"Fetched {len(menu_items)} menu items")
         return jsonify(menu_items), 200
 
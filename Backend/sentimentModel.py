@@ -0,0 +1,122 @@
+import logging
+import os
+import threading
+import time
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = os.environ.get('SENTIMENT_MODEL_DIR', os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.environ.get('SENTIMENT_MODEL_PATH', os.path.join(MODEL_DIR, 'model_nb.pkl'))
+VECTORIZER_PATH = os.environ.get('SENTIMENT_VECTORIZER_PATH', os.path.join(MODEL_DIR, 'vectorizer.pkl'))
+# 'lazy' loads on first prediction, 'eager' loads and warms up in a background thread at startup
+MODEL_LOAD_MODE = os.environ.get('SENTIMENT_MODEL_LOAD', 'lazy')
+# Memory-map the model's numpy arrays so forked workers share the pages
+MODEL_MMAP = os.environ.get('SENTIMENT_MODEL_MMAP', '0') == '1'
+
+WARM_UP_TEXTS = ['The food was great', 'The service was slow']
+
+
+class VectorizedModel:
+    """Bare classifier plus a separately pickled vectorizer, exposed as a text model."""
+
+    def __init__(self, classifier, vectorizer):
+        self.classifier = classifier
+        self.vectorizer = vectorizer
+
+    def predict(self, texts):
+        return self.classifier.predict(self.vectorizer.transform(texts))
+
+
+class ModelRegistry:
+    """Holds the active sentiment model and swaps in new versions atomically.
+
+    ``get`` returns the current model, loading it on first use. ``reload``
+    loads and warms up a new version while the old one keeps serving, then
+    replaces it in one assignment.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, vectorizer_path=VECTORIZER_PATH, mmap=MODEL_MMAP):
+        self.model_path = model_path
+        self.vectorizer_path = vectorizer_path
+        self.mmap = mmap
+        self._model = None
+        self._info = {'state': 'not_loaded', 'version': 0}
+        self._load_lock = threading.Lock()
+        self._attempted = False
+
+    def get(self):
+        model = self._model
+        if model is not None or self._attempted:
+            return model
+        with self._load_lock:
+            if self._model is None and not self._attempted:
+                self._install(self.model_path)
+            return self._model
+
+    def predict(self, texts):
+        model = self.get()
+        if model is None:
+            raise RuntimeError("Sentiment model not loaded")
+        return model.predict(texts)
+
+    def load_in_background(self):
+        thread = threading.Thread(target=self.get, name='sentiment-model-loader', daemon=True)
+        thread.start()
+        return thread
+
+    def reload(self, model_path=None):
+        """Load ``model_path`` (default: the current path) and make it active; raises on failure."""
+        with self._load_lock:
+            self._install(model_path or self.model_path, raise_errors=True)
+            return self.info()
+
+    def info(self):
+        return dict(self._info)
+
+    def _install(self, model_path, raise_errors=False):
+        try:
+            logger.info(f"Loading sentiment model from {model_path} (mmap={self.mmap})")
+            started = time.perf_counter()
+            model = self._load(model_path)
+            model.predict(WARM_UP_TEXTS)  # Warm-up: first predict pays one-off allocation costs
+            elapsed = time.perf_counter() - started
+        except Exception as e:
+            logger.error(f"Failed to load sentiment model: {str(e)}", exc_info=True)
+            if self._model is None:
+                logger.warning("Sentiment analysis will be disabled due to loading failure")
+                self._info = {**self._info, 'state': 'failed', 'error': str(e)}
+            if raise_errors:
+                raise
+            return
+        finally:
+            # Set last so concurrent first callers wait on the lock for this load
+            self._attempted = True
+
+        self._model = model
+        self.model_path = model_path
+        self._info = {
+            'state': 'loaded',
+            'version': self._info['version'] + 1,
+            'path': model_path,
+            'file_mtime': os.path.getmtime(model_path),
+            'loaded_at': time.time(),
+            'load_seconds': round(elapsed, 3),
+            'mmap': self.mmap,
+        }
+        logger.info(f"Sentiment model version {self._info['version']} loaded in {elapsed:.2f}s")
+
+    def _load(self, model_path):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Sentiment model file not found at {model_path}")
+        model = joblib.load(model_path, mmap_mode='r' if self.mmap else None)
+        if hasattr(model, 'steps') or not os.path.exists(self.vectorizer_path):
+            return model  # A Pipeline vectorizes raw text itself
+        vectorizer = joblib.load(self.vectorizer_path, mmap_mode='r' if self.mmap else None)
+        return VectorizedModel(model, vectorizer)
+
+
+sentiment_models = ModelRegistry()
+if MODEL_LOAD_MODE == 'eager':
+    sentiment_models.load_in_background()
@@ -0,0 +1,87 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from inferenceQueue import InferenceQueueFull, MicroBatcher
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def submit_all(batcher, items):
+    with ThreadPoolExecutor(max_workers=len(items)) as pool:
+        return list(pool.map(batcher.submit, items))
+
+
+def test_each_caller_gets_its_own_result():
+    batcher = MicroBatcher(lambda items: [item * 10 for item in items], window=0.02)
+    items = list(range(50))
+    assert submit_all(batcher, items) == [item * 10 for item in items]
+    stats = batcher.stats()
+    assert stats['submitted'] == 50
+    assert sum(size * count for size, count in stats['batch_size_histogram'].items()) == 50
+
+
+def test_concurrent_submits_share_a_batch():
+    sizes = []
+    release = threading.Event()
+
+    def predict(items):
+        sizes.append(len(items))
+        release.wait(1)  # Hold the first batch so the rest queue up behind it
+        return items
+
+    batcher = MicroBatcher(predict, window=0.05, max_batch=64)
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        futures = [pool.submit(batcher.submit, item) for item in range(20)]
+        wait_until(lambda: sizes and batcher.stats()['submitted'] == 20)
+        release.set()
+        assert [future.result() for future in futures] == list(range(20))
+    # Whatever queued behind the first batch goes out in at most one more call
+    assert sum(sizes) == 20 and len(sizes) <= 2
+
+
+def test_max_batch_caps_each_call():
+    sizes = []
+    batcher = MicroBatcher(lambda items: sizes.append(len(items)) or items, window=0.05, max_batch=4)
+    submit_all(batcher, list(range(16)))
+    assert max(sizes) <= 4
+
+
+def test_predict_errors_reach_every_caller():
+    def predict(items):
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(predict)
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        batcher.submit('great food')
+
+
+def test_short_result_list_fails_the_batch():
+    batcher = MicroBatcher(lambda items: items[:-1], window=0.05)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(batcher.submit, item) for item in range(4)]
+        errors = [future.exception() for future in futures]
+    # A batch that came back short fails as a whole rather than guessing which result is whose
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_full_queue_rejects_new_items():
+    release = threading.Event()
+    batcher = MicroBatcher(lambda items: release.wait(1) and items, max_batch=1, max_queue=1, enqueue_timeout=0.01)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(batcher.submit, 'a')  # Taken by the worker, which blocks in predict
+        wait_until(lambda: batcher.stats()['submitted'] == 1 and not batcher.stats()['queue_depth'])
+        second = pool.submit(batcher.submit, 'b')  # Fills the one queue slot
+        wait_until(lambda: batcher.stats()['queue_depth'] == 1)
+        with pytest.raises(InferenceQueueFull):
+            batcher.submit('c')
+        release.set()
+        assert first.result() == 'a' and second.result() == 'b'
+    assert batcher.stats()['rejected'] == 1
@@ -0,0 +1,60 @@
+import pytest
+
+from loyaltyTiers import DEFAULT_TIERS, TierRules, TierTable
+
+
+@pytest.fixture
+def table():
+    return TierTable(DEFAULT_TIERS)
+
+
+@pytest.mark.parametrize('points, tier', [
+    (0, ('Bronze', 0.0)),
+    (999, ('Bronze', 0.0)),
+    (1000, ('Silver', 15.0)),   # Thresholds are inclusive
+    (1999, ('Silver', 15.0)),
+    (2000, ('Gold', 25.0)),
+    (3000, ('Platinum', 50.0)),
+    (10 ** 9, ('Platinum', 50.0)),
+    (-50, ('Bronze', 0.0)),     # Below the lowest threshold falls back to the lowest tier
+])
+def test_tier_for(table, points, tier):
+    assert table.tier_for(points) == tier
+
+
+@pytest.mark.parametrize('points, remaining', [(0, 1000), (999, 1), (1000, 1000), (2500, 500), (3000, 0), (5000, 0)])
+def test_points_to_next(table, points, remaining):
+    assert table.points_to_next(points) == remaining
+
+
+def test_rows_are_sorted_and_normalized():
+    table = TierTable([('500', 'Gold', '10'), (0, 'Member', 0), (100, 'Silver', 5)])
+    assert table.tiers == ((0, 'Member', 0.0), (100, 'Silver', 5.0), (500, 'Gold', 10.0))
+    assert table.lowest == ('Member', 0.0)
+    assert table.tier_for(499) == ('Silver', 5.0)
+
+
+def test_discount_by_name(table):
+    assert table.discount('Gold') == 25.0
+    assert table.discount('Diamond') is None
+
+
+def test_empty_table_is_rejected():
+    with pytest.raises(ValueError):
+        TierTable([])
+
+
+def test_rules_reload_after_ttl_or_invalidate():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return DEFAULT_TIERS
+
+    rules = TierRules(loader=loader, ttl=3600)
+    assert rules.table() is rules.table()
+    assert len(loads) == 1
+    rules.invalidate()
+    rules.table()
+    assert len(loads) == 2
+    assert TierRules(loader=loader, ttl=0).table().tier_for(1500) == ('Silver', 15.0)
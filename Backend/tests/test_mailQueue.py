@@ -0,0 +1,137 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import mailQueue
+from mailQueue import MailQueue
+
+
+class FakeSession:
+    """Records sends; fails the first ``failures`` of them."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.sent = []
+        self.sent_event = threading.Event()
+
+    def send(self, to_addr, message):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("connection refused")
+        self.sent.append(to_addr)
+        self.sent_event.set()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(mailQueue, 'POLL_INTERVAL', 0.01)
+    monkeypatch.setattr(mailQueue, 'MAIL_RETRY_BASE', 0.05)
+    session = FakeSession()
+    queue = MailQueue(path=str(tmp_path / 'outbox.db'), workers=1, session_factory=lambda: session)
+    queue.session = session
+    yield queue
+    queue.stop()
+
+
+def insert(queue, status='pending', next_attempt_at=None, claimed_at=None, to_addr='guest@example.com'):
+    queue._init_db()
+    now = time.time()
+    connection = queue._db()
+    try:
+        return connection.execute(
+            "INSERT INTO outbox (to_addr, subject, body, status, next_attempt_at, created_at, claimed_at) "
+            "VALUES (?, 'OTP', 'Your code is 12345', ?, ?, ?, ?)",
+            (to_addr, status, now if next_attempt_at is None else next_attempt_at, now, claimed_at)
+        ).lastrowid
+    finally:
+        connection.close()
+
+
+def rows(queue):
+    connection = queue._db()
+    try:
+        return connection.execute("SELECT id, status, attempts, next_attempt_at FROM outbox").fetchall()
+    finally:
+        connection.close()
+
+
+def claim(queue):
+    connection = queue._db()
+    try:
+        return queue._claim(connection)
+    finally:
+        connection.close()
+
+
+def test_claim_takes_due_messages_once(queue):
+    message_id = insert(queue)
+    assert claim(queue)[0] == message_id
+    assert rows(queue)[0][1] == 'sending'
+    assert claim(queue) is None
+
+
+def test_claim_skips_messages_not_yet_due(queue):
+    insert(queue, next_attempt_at=time.time() + 60)
+    assert claim(queue) is None
+
+
+def test_claim_retakes_only_stale_claims(queue):
+    insert(queue, status='sending', claimed_at=time.time())
+    assert claim(queue) is None
+    stale = insert(queue, status='sending', claimed_at=time.time() - mailQueue.MAIL_CLAIM_TIMEOUT - 1)
+    assert claim(queue)[0] == stale
+
+
+def test_sent_messages_leave_the_outbox(queue):
+    queue.enqueue('guest@example.com', 'OTP', 'Your code is 12345')
+    assert queue.session.sent_event.wait(2)
+    deadline = time.monotonic() + 2
+    while rows(queue) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert queue.session.sent == ['guest@example.com']
+    assert rows(queue) == []
+
+
+def test_failed_sends_back_off_then_retry(queue):
+    queue.session.failures = 1
+    started = time.time()
+    queue.enqueue('guest@example.com', 'OTP', 'Your code is 12345')
+    assert queue.session.sent_event.wait(2)
+    # The first attempt failed and was rescheduled MAIL_RETRY_BASE (+-20%) later
+    assert time.time() - started >= 0.05 * 0.8
+
+
+def test_gives_up_after_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(mailQueue, 'MAIL_MAX_ATTEMPTS', 2)
+    monkeypatch.setattr(mailQueue, 'MAIL_RETRY_BASE', 0.01)
+    queue.session.failures = 10
+    queue.enqueue('guest@example.com', 'OTP', 'Your code is 12345')
+    deadline = time.monotonic() + 2
+    while queue.stats()['failed'] != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [row[1:3] for row in rows(queue)] == [('failed', 2)]
+    assert queue.session.sent == []
+
+
+def test_outbox_errors_back_off_without_killing_the_worker(queue, monkeypatch):
+    real_claim = MailQueue._claim
+    failures = []
+
+    def flaky_claim(self, connection):
+        if len(failures) < 3:
+            failures.append(time.monotonic())
+            raise sqlite3.OperationalError("database is locked")
+        return real_claim(self, connection)
+
+    monkeypatch.setattr(MailQueue, '_claim', flaky_claim)
+    insert(queue)  # Not enqueue(), whose wakeup would cut the first backoff short
+    queue.start()
+    assert queue.session.sent_event.wait(2)
+    # Each failed claim doubles the wait before the next one
+    gaps = [later - earlier for earlier, later in zip(failures, failures[1:])]
+    assert gaps[0] >= 0.01 * 2 * 0.9 and gaps[1] >= 0.01 * 4 * 0.9
@@ -0,0 +1,87 @@
+import pytest
+
+from menuSearch import MenuSearchIndex, _within_one_edit, tokenize
+
+MENU = [
+    {'menu_id': 1, 'name': 'Chicken Momo', 'category': 'Starters', 'description': 'Steamed dumplings'},
+    {'menu_id': 2, 'name': 'Veg Momo', 'category': 'Starters', 'description': 'Cabbage and carrot dumplings'},
+    {'menu_id': 3, 'name': 'Paneer Butter Masala', 'category': 'Mains', 'description': 'Cottage cheese in tomato gravy'},
+    {'menu_id': 4, 'name': 'Butter Naan', 'category': 'Breads', 'description': 'Served with momo chutney'},
+    {'menu_id': 5, 'name': 'Mango Lassi', 'category': 'Drinks', 'description': 'Sweet yoghurt drink'},
+]
+
+
+@pytest.fixture
+def index():
+    index = MenuSearchIndex()
+    index.rebuild(MENU)
+    return index
+
+
+def ids(rows):
+    return [row['menu_id'] for row in rows]
+
+
+def test_tokenize_lowercases_and_drops_punctuation():
+    assert tokenize("Paneer-Butter, MASALA!") == ['paneer', 'butter', 'masala']
+    assert tokenize(None) == []
+
+
+@pytest.mark.parametrize('a, b', [
+    ('momo', 'momo'),
+    ('momo', 'mommo'),   # insert
+    ('masala', 'masla'),  # delete
+    ('lassi', 'lasso'),   # substitution
+    ('naan', 'anan'),     # adjacent swap
+])
+def test_within_one_edit(a, b):
+    assert _within_one_edit(a, b)
+    assert _within_one_edit(b, a)
+
+
+@pytest.mark.parametrize('a, b', [('momo', 'mango'), ('naan', 'nnaa'), ('butter', 'buttery!!'), ('masala', 'salama')])
+def test_more_than_one_edit(a, b):
+    assert not _within_one_edit(a, b)
+
+
+def test_name_hits_outrank_description_hits(index):
+    # "momo" is in the names of 1 and 2 but only the description of 4
+    assert ids(index.search('momo')) == [1, 2, 4]
+
+
+def test_names_starting_with_the_query_rank_first(index):
+    assert ids(index.search('butter')) == [4, 3]
+
+
+def test_every_query_token_must_match(index):
+    assert ids(index.search('veg momo')) == [2]
+    assert index.search('veg lassi') == []
+
+
+def test_prefix_matches_as_you_type(index):
+    assert ids(index.search('pan')) == [3]
+    assert ids(index.search('mom')) == [1, 2, 4]
+
+
+def test_one_typo_is_forgiven_on_longer_tokens(index):
+    assert ids(index.search('panner')) == [3]
+    assert ids(index.search('lasis')) == [5]
+
+
+def test_short_tokens_need_an_exact_or_prefix_match(index):
+    # "nan" is below FUZZY_MIN_LENGTH, so it does not reach "naan"
+    assert index.search('nan') == []
+
+
+def test_limit_keeps_the_best_rows(index):
+    assert ids(index.search('momo', limit=2)) == [1, 2]
+
+
+def test_upsert_and_remove_update_results(index):
+    assert ids(index.search('momo')) == [1, 2, 4]
+    index.upsert({'menu_id': 2, 'name': 'Veg Thukpa', 'category': 'Soups', 'description': 'Noodle soup'})
+    assert ids(index.search('momo')) == [1, 4]
+    assert ids(index.search('thukpa')) == [2]
+    index.remove(1)
+    assert ids(index.search('momo')) == [4]
+    assert ids(index.search('chicken')) == []
@@ -0,0 +1,71 @@
+import pytest
+
+from orderTransitions import CONFLICT, INVALID_TRANSITION, NOT_FOUND, TRANSITIONS, plan_transitions
+
+# order_id -> (status, version, total_price, customer_id), as apply_transitions reads it
+CURRENT = {
+    1: ('Pending', 0, 450.0, 7),
+    2: ('In Progress', 3, 120.0, 8),
+    3: ('Ready', 5, 990.0, 7),
+    4: ('Completed', 6, 300.0, 9),
+}
+
+
+@pytest.mark.parametrize('order_id, status', [
+    (order_id, target)
+    for order_id, (current, _, _, _) in CURRENT.items()
+    for target in TRANSITIONS.get(current, ())
+])
+def test_allowed_transitions_are_planned(order_id, status):
+    planned, results = plan_transitions([{'order_id': order_id, 'status': status}], CURRENT)
+    current_status, version, total_price, _ = CURRENT[order_id]
+    assert [(index, status_, version_, total_) for index, _, status_, version_, total_ in planned] == [
+        (0, current_status, version, total_price)]
+    assert results == [None]
+
+
+@pytest.mark.parametrize('order_id, status', [
+    (1, 'Completed'),    # Pending has to be accepted first
+    (1, 'Ready'),
+    (3, 'In Progress'),  # No moving backwards
+    (4, 'Pending'),      # Completed is final
+    (2, 'Bogus'),
+])
+def test_disallowed_transitions_are_rejected(order_id, status):
+    planned, results = plan_transitions([{'order_id': order_id, 'status': status}], CURRENT)
+    assert planned == []
+    assert results == [{'ok': False, 'order_id': order_id, 'error': INVALID_TRANSITION,
+                        'current_status': CURRENT[order_id][0], 'version': CURRENT[order_id][1]}]
+
+
+def test_unknown_orders_are_not_found():
+    planned, results = plan_transitions([{'order_id': 99, 'status': 'Rejected'}], CURRENT)
+    assert planned == []
+    assert results == [{'ok': False, 'order_id': 99, 'error': NOT_FOUND}]
+
+
+def test_stale_version_is_a_conflict():
+    planned, results = plan_transitions([{'order_id': 2, 'status': 'Ready', 'version': 2}], CURRENT)
+    assert planned == []
+    assert results == [{'ok': False, 'order_id': 2, 'error': CONFLICT,
+                        'current_status': 'In Progress', 'version': 3}]
+
+
+def test_matching_version_is_planned():
+    planned, _ = plan_transitions([{'order_id': 2, 'status': 'Ready', 'version': 3}], CURRENT)
+    assert len(planned) == 1
+
+
+def test_mixed_batch_keeps_request_order():
+    transitions = [
+        {'order_id': 1, 'status': 'In Progress', 'chef_id': 4},
+        {'order_id': 99, 'status': 'Rejected'},
+        {'order_id': 3, 'status': 'Completed'},
+        {'order_id': 4, 'status': 'Ready'},
+    ]
+    planned, results = plan_transitions(transitions, CURRENT)
+    assert [(index, transition) for index, transition, _, _, _ in planned] == [
+        (0, transitions[0]), (2, transitions[2])]
+    assert results[0] is None and results[2] is None
+    assert results[1]['error'] == NOT_FOUND
+    assert results[3]['error'] == INVALID_TRANSITION
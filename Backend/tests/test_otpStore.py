@@ -0,0 +1,96 @@
+import pytest
+
+import otpStore
+from otpStore import EXPIRED, INVALID, LOCKED, MISSING, VERIFIED, MemoryOTPStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(otpStore.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def store(clock):
+    return MemoryOTPStore(ttl=60, token_ttl=120, max_attempts=3)
+
+
+def test_correct_otp_yields_a_single_use_token(store):
+    store.issue('guest@example.com', '12345')
+    outcome, token = store.verify('guest@example.com', '12345')
+    assert outcome == VERIFIED and token
+    assert store.consume_token(token) == 'guest@example.com'
+    assert store.consume_token(token) is None
+
+
+def test_verified_otp_cannot_be_reused(store):
+    store.issue('guest@example.com', '12345')
+    store.verify('guest@example.com', '12345')
+    assert store.verify('guest@example.com', '12345') == (MISSING, None)
+
+
+def test_unknown_email_is_missing(store):
+    assert store.verify('nobody@example.com', '12345') == (MISSING, None)
+
+
+def test_otp_expires(store, clock):
+    store.issue('guest@example.com', '12345')
+    clock.now += 60
+    assert store.verify('guest@example.com', '12345') == (EXPIRED, None)
+    assert store.verify('guest@example.com', '12345') == (MISSING, None)
+
+
+def test_token_expires(store, clock):
+    store.issue('guest@example.com', '12345')
+    _, token = store.verify('guest@example.com', '12345')
+    clock.now += 120
+    assert store.consume_token(token) is None
+
+
+def test_wrong_guesses_lock_the_otp(store):
+    store.issue('guest@example.com', '12345')
+    assert store.verify('guest@example.com', '00000') == (INVALID, None)
+    assert store.verify('guest@example.com', '11111') == (INVALID, None)
+    assert store.verify('guest@example.com', '22222') == (LOCKED, None)
+    # Locked out: even the right code no longer works until a new one is issued
+    assert store.verify('guest@example.com', '12345') == (MISSING, None)
+
+
+def test_reissue_resets_attempts_and_replaces_the_code(store):
+    store.issue('guest@example.com', '12345')
+    store.verify('guest@example.com', '00000')
+    store.verify('guest@example.com', '11111')
+    store.issue('guest@example.com', '54321')
+    assert store.verify('guest@example.com', '12345') == (INVALID, None)
+    assert store.verify('guest@example.com', '54321')[0] == VERIFIED
+
+
+def test_reissue_revokes_an_outstanding_token(store):
+    store.issue('guest@example.com', '12345')
+    _, token = store.verify('guest@example.com', '12345')
+    store.issue('guest@example.com', '54321')
+    assert store.consume_token(token) is None
+
+
+def test_codes_are_bound_to_their_email(store):
+    store.issue('a@example.com', '12345')
+    store.issue('b@example.com', '67890')
+    assert store.verify('a@example.com', '67890') == (INVALID, None)
+
+
+def test_full_store_sweeps_expired_entries(clock):
+    store = MemoryOTPStore(ttl=60, max_entries=2)
+    store.issue('a@example.com', '1')
+    store.issue('b@example.com', '2')
+    clock.now += 60
+    store.issue('c@example.com', '3')
+    assert store.stats()['entries'] == 1
@@ -0,0 +1,33 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize('sort_time, row_id', [
+    (datetime(2024, 5, 1, 12, 30), 42),
+    (datetime(2024, 5, 1, 12, 30, 5, 123456), 1),  # Microseconds survive
+    (datetime(1999, 12, 31, 23, 59, 59), 10 ** 12),
+])
+def test_round_trip(sort_time, row_id):
+    assert decode_cursor(encode_cursor(sort_time, row_id)) == (sort_time, row_id)
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime(2024, 5, 1), 2 ** 40)
+    assert set(cursor) <= set('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_=')
+
+
+@pytest.mark.parametrize('value', [
+    'not a cursor!',
+    'é',
+    base64.urlsafe_b64encode(b'{"a": 1}').decode('ascii'),
+    base64.urlsafe_b64encode(b'["yesterday", 5]').decode('ascii'),
+    base64.urlsafe_b64encode(b'["2024-05-01T12:30:00", "five"]').decode('ascii'),
+])
+def test_malformed_cursors_raise_what_the_endpoints_catch(value):
+    # The paginated endpoints answer 400 for ValueError and TypeError
+    with pytest.raises((ValueError, TypeError)):
+        decode_cursor(value)
@@ -0,0 +1,182 @@
+"""Importing staff and loyalty-member lists into Users.
+
+Rows without a password are stored with NO_PASSWORD, a value no password
+ever matches; those users set their own through Forgot Password, so none
+of them costs a bcrypt round. Rows that are invalid, repeated within the
+list, or already registered are skipped and reported back by index.
+
+POST /register/bulk takes lists of up to BULK_IMPORT_MAX users; larger
+ones go through the command line, which has no hashing deadline:
+
+    python userImport.py users.json [--chunk-size 500]
+
+where users.json holds ``[{name, email, phone, role, password?}, ...]``.
+"""
+import argparse
+import json
+import os
+import time
+
+from mysql.connector import IntegrityError
+
+from dashboardStats import dashboard_stats
+from database import get_db_connection, duplicate_key
+from httpCache import data_versions
+from passwordHasher import password_hasher
+from roles import ALLOWED_ROLES, CUSTOMER_ROLE
+
+# Rows per multi-row INSERT when importing user lists
+BULK_IMPORT_CHUNK = int(os.environ.get('BULK_IMPORT_CHUNK', 500))
+# Largest list POST /register/bulk accepts; bigger imports use the CLI
+BULK_IMPORT_MAX = int(os.environ.get('BULK_IMPORT_MAX', 500))
+# Longest POST /register/bulk spends hashing the passwords it was given, in total
+BULK_IMPORT_HASH_TIMEOUT = float(os.environ.get('BULK_IMPORT_HASH_TIMEOUT', 30))
+
+# Stored for users imported without a password: not a bcrypt hash, so no login matches it
+NO_PASSWORD = '!'
+
+INSERT_USER = """
+INSERT INTO Users (name, email, phone, password, role)
+VALUES (%s, %s, %s, %s, %s)
+"""
+
+# Unique indexes on Users (migrations/001_users_unique_email_phone.sql) -> error message
+DUPLICATE_ERRORS = {
+    'uq_users_email': "Email already registered",
+    'uq_users_phone': "Phone number already registered",
+}
+
+
+def duplicate_error(error):
+    """409 message for a duplicate-key IntegrityError, or None if it was something else."""
+    key = duplicate_key(error)
+    if key is None:
+        return None
+    return DUPLICATE_ERRORS.get(key, "Email or phone number already registered")
+
+
+def validate_users(users):
+    """Split raw entries into (accepted, skipped); accepted rows are (index, name, email, phone, password, role)."""
+    accepted, skipped = [], []
+    seen_emails, seen_phones = set(), set()
+    for index, user in enumerate(users):
+        if not isinstance(user, dict):
+            skipped.append({"index": index, "error": "Invalid entry"})
+            continue
+        name, email, phone, role = (user.get(field) for field in ('name', 'email', 'phone', 'role'))
+        if not name or not email or not phone or not role:
+            error = "Missing required fields"
+        elif role not in ALLOWED_ROLES:
+            error = "Invalid role. Choose from 'Admin', 'Chef', or 'Customer'."
+        elif email in seen_emails:
+            error = "Email repeated in import"
+        elif phone in seen_phones:
+            error = "Phone number repeated in import"
+        else:
+            error = None
+        if error:
+            skipped.append({"index": index, "email": email, "error": error})
+            continue
+        seen_emails.add(email)
+        seen_phones.add(phone)
+        accepted.append((index, name, email, phone, user.get('password') or None, role))
+    return accepted, skipped
+
+
+def import_users(users, hash_timeout=None, chunk_size=BULK_IMPORT_CHUNK):
+    """Validate, hash and insert ``users``; returns (created rows, skipped entries sorted by index).
+
+    Only rows that came with a password are hashed, across the hasher's
+    worker processes, within ``hash_timeout`` seconds in total (None waits
+    as long as it takes).
+    """
+    accepted, skipped = validate_users(users)
+
+    with_password = [row for row in accepted if row[4] is not None]
+    hashes = dict(zip(
+        (row[0] for row in with_password),
+        password_hasher.hash_passwords((row[4] for row in with_password), timeout=hash_timeout)
+    ))
+    accepted = [row[:4] + (hashes.get(row[0], NO_PASSWORD), row[5]) for row in accepted]
+
+    created = []
+    with get_db_connection() as connection, connection.cursor() as cursor:
+        for start in range(0, len(accepted), chunk_size):
+            inserted, duplicates = insert_users(connection, cursor, accepted[start:start + chunk_size])
+            created.extend(inserted)
+            skipped.extend(duplicates)
+
+    customers = sum(1 for row in created if row[5] == CUSTOMER_ROLE)
+    if customers:
+        dashboard_stats.record_customer(customers)
+    if created:
+        data_versions.bump('users')
+    skipped.sort(key=lambda entry: entry['index'])
+    return created, skipped
+
+
+def insert_users(connection, cursor, chunk):
+    """Insert one chunk of (index, name, email, phone, hash, role) rows; returns (inserted, skipped)."""
+    emails = [row[2] for row in chunk]
+    phones = [row[3] for row in chunk]
+    cursor.execute(f"""
+        SELECT email, phone FROM Users
+        WHERE email IN ({', '.join(['%s'] * len(emails))}) OR phone IN ({', '.join(['%s'] * len(phones))})
+    """, emails + phones)
+    existing = cursor.fetchall()
+    taken_emails = {row[0] for row in existing}
+    taken_phones = {row[1] for row in existing}
+
+    rows, skipped = [], []
+    for row in chunk:
+        if row[2] in taken_emails:
+            skipped.append({"index": row[0], "email": row[2], "error": DUPLICATE_ERRORS['uq_users_email']})
+        elif row[3] in taken_phones:
+            skipped.append({"index": row[0], "email": row[2], "error": DUPLICATE_ERRORS['uq_users_phone']})
+        else:
+            rows.append(row)
+    if not rows:
+        return [], skipped
+
+    try:
+        # One multi-row INSERT for the whole chunk
+        cursor.executemany(INSERT_USER, [row[1:] for row in rows])
+        connection.commit()
+        return rows, skipped
+    except IntegrityError as e:
+        connection.rollback()
+        if duplicate_key(e) is None:
+            raise
+
+    # A concurrent signup took one of these addresses; find it row by row
+    inserted = []
+    for row in rows:
+        try:
+            cursor.execute(INSERT_USER, row[1:])
+            inserted.append(row)
+        except IntegrityError as e:
+            error = duplicate_error(e)
+            if error is None:
+                raise
+            skipped.append({"index": row[0], "email": row[2], "error": error})
+    connection.commit()
+    return inserted, skipped
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import a JSON list of users into Users")
+    parser.add_argument('path', help="JSON file holding a list of {name, email, phone, role, password?}")
+    parser.add_argument('--chunk-size', type=int, default=BULK_IMPORT_CHUNK)
+    args = parser.parse_args()
+
+    with open(args.path, encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise SystemExit("The file must hold a JSON list of users")
+    started = time.perf_counter()
+    created_rows, skipped_entries = import_users(entries, chunk_size=args.chunk_size)
+    for entry in skipped_entries:
+        print(f"Skipped #{entry['index']} ({entry.get('email')}): {entry['error']}")
+    print(f"Done: {len(created_rows)} created, {len(skipped_entries)} skipped "
+          f"in {time.perf_counter() - started:.1f}s")
+    password_hasher.shutdown()
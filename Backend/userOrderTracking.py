@@ -1,9 +1,65 @@
 from flask import Blueprint, jsonify, request
 from database import get_db_connection
-from datetime import datetime
+from orderHydration import hydrate_orders
+from orderWatch import order_watch
+from pagination import encode_cursor, decode_cursor
+from datetime import datetime, timedelta
+import base64
+import json
+import os
+import time
 
 userorder_bp_app = Blueprint('AcceptandRejectOrders', __name__)
 
+# A customer sees their orders in the first of these statuses that has any; Completed only from today
+CURRENT_STATUS_PRIORITY = ('Pending', 'In Progress', 'Ready', 'Completed')
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+# Long-poll: how long /pendingorders/watch holds a request open, and how often a held
+# request re-reads anyway to catch changes written by another worker
+WATCH_TIMEOUT = float(os.environ.get('ORDER_WATCH_TIMEOUT_SECONDS', 25))
+WATCH_MAX_TIMEOUT = 60
+WATCH_RECHECK = float(os.environ.get('ORDER_WATCH_RECHECK_SECONDS', 10))
+
+
+def fetch_current_orders(cursor, customer_id):
+    """(order_id, table_number, order_status, version) rows of the customer's highest-priority status group.
+
+    One query over the (customer_id, order_status, order_time) index
+    replaces the old one-query-per-status fallback chain.
+    """
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    cursor.execute("""
+        SELECT order_id, table_number, order_status, version
+        FROM Orders
+        WHERE customer_id = %s
+        AND (order_status IN ('Pending', 'In Progress', 'Ready')
+             OR (order_status = 'Completed' AND order_time >= %s AND order_time < %s))
+        ORDER BY FIELD(order_status, 'Pending', 'In Progress', 'Ready', 'Completed'), order_id
+    """, (customer_id, today, today + timedelta(days=1)))
+    orders = cursor.fetchall()
+    return [order for order in orders if order[2] == orders[0][2]] if orders else []
+
+
+def encode_state(orders):
+    """Opaque token for what the client was sent: the (order_id, version) pairs of its current orders."""
+    raw = json.dumps(sorted([order[0], order[3]] for order in orders))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_state(value):
+    return {int(order_id): int(version) for order_id, version in json.loads(base64.urlsafe_b64decode(value.encode('ascii')))}
+
+
+def parse_date(value, end=False):
+    """ISO date or datetime; a bare ``to`` date covers that whole day."""
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
 @userorder_bp_app.route('/pendingorders', methods=['post'])
 def get_pending_orders():
     try:
@@ -12,80 +68,138 @@ def get_pending_orders():
         if not customer_id:
             return jsonify({"error": "customer_id is required"}), 400
 
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            # First, query for Pending orders
-            pending_query = """
-            SELECT order_id, table_number, order_status
-            FROM Orders
-            WHERE order_status = 'Pending'
-            AND customer_id = %s
-            """
-            cursor.execute(pending_query, (customer_id,))
-            orders = cursor.fetchall()
-
-            # If no Pending orders, query for In Progress orders
-            if not orders:
-                in_progress_query = """
-                SELECT order_id, table_number, order_status
-                FROM Orders
-                WHERE order_status = 'In Progress'
-                AND customer_id = %s
-                """
-                cursor.execute(in_progress_query, (customer_id,))
-                orders = cursor.fetchall()
-                
-            if not orders:
-                today = datetime.now().strftime('%Y-%m-%d')
-                completed_query = """
-                SELECT order_id, table_number, order_status
-                FROM Orders
-                WHERE order_status = 'Completed'
-                AND customer_id = %s
-                AND DATE(order_time) = %s
-                """
-                cursor.execute(completed_query, (customer_id, today))
-                orders = cursor.fetchall()
+        with get_db_connection() as connection, connection.cursor() as cursor:
+            orders = fetch_current_orders(cursor, customer_id)
 
             # If still no orders, return empty array
             if not orders:
                 print(f"No Pending or In Progress orders found for customer_id: {customer_id}")
                 return jsonify([]), 200
             
-            pending_orders = []
-            for order in orders:
-                order_id = order[0]
-                table_number = order[1]
-                order_status = order[2]
-
-                # Fetch order items
-                items_query = """
-                SELECT m.name AS food_name, oi.quantity, oi.subtotal
-                FROM OrderItems oi
-                JOIN Menu m ON oi.menu_id = m.menu_id
-                WHERE oi.order_id = %s
-                """
-                cursor.execute(items_query, (order_id,))
-                items = cursor.fetchall()
-                
-                order_data = {
-                    'order_id': order_id,
-                    'table_number': table_number,
-                    'status': order_status,
-                    'items': [
-                        {
-                            'food_name': item[0],
-                            'quantity': item[1],
-                            'subtotal': float(item[2])
-                        }
-                        for item in items
-                    ]
-                }
-                pending_orders.append(order_data)
+            # Fetch the items of every order in one batched query
+            pending_orders = hydrate_orders(cursor, [order[:3] for order in orders], status_key='status')
         print(pending_orders)       
 
         return jsonify(pending_orders), 200
 
     except Exception as e:
         print(f"Error fetching pending orders: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+@userorder_bp_app.route('/pendingorders/watch', methods=['post'])
+def watch_pending_orders():
+    """Long-poll variant of /pendingorders that answers only when something changed.
+
+    Form fields: ``user_id``, ``since`` (the ``version`` token from the last
+    response; omit it on the first call) and optional ``timeout`` seconds.
+    Returns ``{"version", "changed", "removed", "timed_out"}``: ``changed``
+    holds full entries for orders that are new or moved on since ``since``,
+    ``removed`` the ids of orders no longer current. Between checks the
+    request sleeps on an in-process change signal without holding a
+    connection, so a waiting customer costs one small indexed query per
+    change or per WATCH_RECHECK seconds instead of a full poll every tick.
+    """
+    try:
+        customer_id = request.form.get('user_id', type=int)
+        if customer_id is None:
+            return jsonify({"error": "customer_id is required"}), 400
+        since = request.form.get('since')
+        try:
+            known = decode_state(since) if since else None
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid since token"}), 400
+        timeout = min(max(request.form.get('timeout', WATCH_TIMEOUT, type=float), 0), WATCH_MAX_TIMEOUT)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            # Taken before the read so a change committed after it still wakes us
+            change = order_watch.watch(customer_id)
+            with get_db_connection() as connection, connection.cursor() as cursor:
+                orders = fetch_current_orders(cursor, customer_id)
+                version = encode_state(orders)
+                if known is None or version != since:
+                    known = known or {}
+                    changed = [order for order in orders if known.get(order[0]) != order[3]]
+                    entries = hydrate_orders(cursor, [order[:3] for order in changed], status_key='status') if changed else []
+                    break
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return jsonify({"version": since, "changed": [], "removed": [], "timed_out": True}), 200
+            order_watch.wait(change, min(remaining, WATCH_RECHECK))
+
+        for entry, order in zip(entries, changed):
+            entry['version'] = order[3]
+        current = {order[0] for order in orders}
+        removed = [order_id for order_id in known if order_id not in current]
+        return jsonify({"version": version, "changed": entries, "removed": removed, "timed_out": False}), 200
+
+    except Exception as e:
+        print(f"Error watching pending orders: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@userorder_bp_app.route('/orders/history', methods=['GET'])
+def get_order_history():
+    """Orders newest first, one page at a time.
+
+    Filters: customer_id, status (repeatable), from / to (ISO dates, ``to``
+    inclusive), table_number, chef_id. Pages are keyset-paginated on
+    (order_time, order_id): pass the returned ``next_cursor`` as ``cursor``
+    to continue, so a deep page costs the same as the first.
+    """
+    try:
+        limit = min(max(request.args.get('limit', HISTORY_PAGE_SIZE, type=int), 1), HISTORY_MAX_PAGE_SIZE)
+        conditions, params = [], []
+        for column in ('customer_id', 'table_number', 'chef_id'):
+            value = request.args.get(column, type=int)
+            if value is not None:
+                conditions.append(f"{column} = %s")
+                params.append(value)
+        statuses = request.args.getlist('status')
+        if statuses:
+            conditions.append(f"order_status IN ({', '.join(['%s'] * len(statuses))})")
+            params.extend(statuses)
+        try:
+            if request.args.get('from'):
+                conditions.append("order_time >= %s")
+                params.append(parse_date(request.args['from']))
+            if request.args.get('to'):
+                conditions.append("order_time < %s")
+                params.append(parse_date(request.args['to'], end=True))
+            if request.args.get('cursor'):
+                order_time, order_id = decode_cursor(request.args['cursor'])
+                # The bare upper bound is what lets the index range scan start at the cursor
+                conditions.append("order_time <= %s AND (order_time < %s OR order_id < %s)")
+                params.extend([order_time, order_time, order_id])
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid from, to or cursor parameter"}), 400
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with get_db_connection() as connection, connection.cursor() as cursor:
+            # One extra row tells whether another page exists
+            cursor.execute(f"""
+                SELECT order_id, table_number, order_status, order_time, total_price, customer_id, chef_id
+                FROM Orders
+                {where}
+                ORDER BY order_time DESC, order_id DESC
+                LIMIT %s
+            """, params + [limit + 1])
+            rows = cursor.fetchall()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            orders = hydrate_orders(cursor, [row[:3] for row in rows], status_key='order_status') if rows else []
+
+        for order, row in zip(orders, rows):
+            order['order_time'] = row[3].isoformat() if row[3] else None
+            order['total_price'] = float(row[4]) if row[4] is not None else None
+            order['customer_id'] = row[5]
+            order['chef_id'] = row[6]
+
+        next_cursor = encode_cursor(rows[-1][3], rows[-1][0]) if has_more else None
+        return jsonify({"orders": orders, "next_cursor": next_cursor}), 200
+
+    except Exception as e:
+        print(f"Error fetching order history: {str(e)}")
+        return jsonify({"error": str(e)}), 500
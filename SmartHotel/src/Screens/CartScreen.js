@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { SafeAreaView, StyleSheet, View, Text, Image, FlatList, Alert, TextInput, Modal, Button, TouchableOpacity } from 'react-native';
 import Icon from 'react-native-vector-icons/MaterialIcons';
 import COLORS from '../constant/colors';
@@ -15,6 +15,8 @@ const CartScreen = ({ route, navigation }) => {
   const [selectedMenuId, setSelectedMenuId] = useState(null);
   const [rating, setRating] = useState('');
   const [feedback, setFeedback] = useState('');
+  // Retrying the same order reuses its Idempotency-Key so the server won't create it twice
+  const pendingOrder = useRef(null);
 
   useEffect(() => {
     setCart(cartItems);
@@ -83,14 +85,21 @@ const CartScreen = ({ route, navigation }) => {
         })),
       };
 
+      const body = JSON.stringify(orderData);
+      if (!pendingOrder.current || pendingOrder.current.body !== body) {
+        const key = `${userId}-${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        pendingOrder.current = { body, key };
+      }
+
       const response = await fetch('http://192.168.18.50:8082/place-order', {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(orderData),
+        headers: { 'Content-Type': 'application/json', 'Idempotency-Key': pendingOrder.current.key },
+        body,
       });
 
       const data = await response.json();
       if (response.ok) {
+        pendingOrder.current = null;
         Alert.alert('✅ Order Placed', `Your order (ID: ${data.order_id}) has been placed successfully!`);
         setCartItems([]);
         setTableNumber('');
@@ -16,6 +16,7 @@ const CheckEmailScreen = ({ navigation, route }) => {
   const handelOTP = async () => {
     setIsLoading(true);
     const formData = new FormData();
+    formData.append('email', email);
     formData.append('value', value);
     console.log(value);
     try {
@@ -32,7 +33,7 @@ const CheckEmailScreen = ({ navigation, route }) => {
         return;
       }
 
-      navigation.navigate('SetNewPasswordScreen');
+      navigation.navigate('SetNewPasswordScreen', { resetToken: data.reset_token });
     } catch (error) {
       Alert.alert('Error', error.message || 'Failed to send OTP. Please try again.');
     } finally {
@@ -15,6 +15,8 @@ const DetailsScreen = ({ navigation, route }) => {
   console.log("Item extracted:", JSON.stringify(item, null, 2));
 
   const [reviews, setReviews] = useState([]);
+  const [summary, setSummary] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const [sentiments, setSentiments] = useState({});
   const [rating, setRating] = useState(0);
   const [feedback, setFeedback] = useState('');
@@ -33,7 +35,8 @@ const DetailsScreen = ({ navigation, route }) => {
     }
   };
 
-  const fetchReviews = async () => {
+  // Loads the first page, or the page after `cursor` when one is given
+  const fetchReviews = async (cursor = null) => {
     if (!userName || userName === "Anonymous") {
       setError("Please log in to view reviews");
       setLoading(false);
@@ -46,8 +49,10 @@ const DetailsScreen = ({ navigation, route }) => {
     }
 
     try {
-      const response = await axios.get(`${BASE_URL}/reviews/${item.id}`);
-      const fetchedReviews = response.data;
+      const response = await axios.get(`${BASE_URL}/reviews/${item.id}`, {
+        params: cursor ? { cursor } : {},
+      });
+      const fetchedReviews = response.data.reviews;
       console.log("Fetched reviews:", JSON.stringify(fetchedReviews, null, 2));
 
       // Create sentiments object, ensuring sentiment is lowercase
@@ -63,8 +68,10 @@ const DetailsScreen = ({ navigation, route }) => {
 
       console.log("Sentiments object:", JSON.stringify(sentimentsObj, null, 2));
 
-      setReviews(fetchedReviews);
-      setSentiments(sentimentsObj);
+      setReviews((prev) => (cursor ? [...prev, ...fetchedReviews] : fetchedReviews));
+      setSentiments((prev) => (cursor ? { ...prev, ...sentimentsObj } : sentimentsObj));
+      setSummary(response.data.summary);
+      setNextCursor(response.data.next_cursor);
       setError(null);
     } catch (err) {
       setError("Error fetching reviews: " + err.message);
@@ -199,6 +206,12 @@ const DetailsScreen = ({ navigation, route }) => {
 
         <View style={style.reviewsSection}>
           <Text style={style.reviewsTitle}>User Reviews</Text>
+          {summary && summary.review_count > 0 && (
+            <Text style={style.summaryText}>
+              {summary.average_rating} / 5 from {summary.review_count} reviews
+              {" · "}{Math.round((summary.sentiment.positive / summary.review_count) * 100)}% positive
+            </Text>
+          )}
           {error && <Text style={style.errorText}>{error}</Text>}
 
           {userName === "Anonymous" ? (
@@ -279,6 +292,11 @@ const DetailsScreen = ({ navigation, route }) => {
                   scrollEnabled={false}
                 />
               )}
+              {nextCursor && !loading && (
+                <TouchableOpacity style={style.submitButton} onPress={() => fetchReviews(nextCursor)}>
+                  <Text style={style.submitButtonText}>Load More Reviews</Text>
+                </TouchableOpacity>
+              )}
             </>
           )}
         </View>
@@ -320,6 +338,11 @@ const style = StyleSheet.create({
     padding: 20,
     backgroundColor: COLORS.white,
   },
+  summaryText: {
+    fontSize: 14,
+    color: COLORS.grey,
+    marginBottom: 10,
+  },
   reviewsTitle: {
     fontSize: 20,
     fontWeight: 'bold',
@@ -31,6 +31,13 @@ const LoyaltyScreen = () => {
     recent_activities: [],
   });
   const [loading, setLoading] = useState(true);
+  // Tier ladder as configured on the server
+  const [tierTable, setTierTable] = useState([
+    { tier: "Bronze", min_points: 0, discount_percentage: 0 },
+    { tier: "Silver", min_points: 1000, discount_percentage: 15 },
+    { tier: "Gold", min_points: 2000, discount_percentage: 25 },
+    { tier: "Platinum", min_points: 3000, discount_percentage: 50 },
+  ]);
 
   // Customer details
   const [customerId, setCustomerId] = useState("");
@@ -49,6 +56,9 @@ const LoyaltyScreen = () => {
           headers: { Authorization: `Bearer ${token}` },
         });
         setUser(response.data.user);
+        if (response.data.tiers) {
+          setTierTable(response.data.tiers);
+        }
       } catch (error) {
         console.error("Error fetching loyalty data:", error.response?.data || error.message);
         Alert.alert("Error", "Failed to load loyalty data. Please try again.");
@@ -86,8 +96,8 @@ const LoyaltyScreen = () => {
 
   // Handle Silver discount redemption
   const handleRedeemSilverDiscount = async () => {
-    if (user.tier !== "Silver" || user.discount_percentage !== 15 || user.redeemed_discount) {
-      Alert.alert("Not Eligible", "You need to be in the Silver tier with an available 15% discount.");
+    if (user.tier !== "Silver" || user.redeemed_discount) {
+      Alert.alert("Not Eligible", "You need to be in the Silver tier with an available discount.");
       return;
     }
     try {
@@ -111,8 +121,8 @@ const LoyaltyScreen = () => {
 
   // Handle Platinum discount redemption
   const handleRedeemPlatinumDiscount = async () => {
-    if (user.tier !== "Platinum" || user.discount_percentage !== 50) {
-      Alert.alert("Not Eligible", "You need to be in the Platinum tier to redeem a 50% discount.");
+    if (user.tier !== "Platinum") {
+      Alert.alert("Not Eligible", "You need to be in the Platinum tier to redeem its discount.");
       return;
     }
     try {
@@ -135,12 +145,19 @@ const LoyaltyScreen = () => {
   };
 
   // Tier data with updated discounts
-  const tiers = [
-    { name: "Bronze", points: 0, discount: 0, icon: "medal", color: "#CD7F32" },
-    { name: "Silver", points: 1000, discount: 15, icon: "medal", color: "#C0C0C0" },
-    { name: "Gold", points: 2000, discount: 25, icon: "medal", color: "#FFD700" },
-    { name: "Platinum", points: 3000, discount: 50, icon: "medal", color: "#E5E4E2" },
-  ];
+  const tierColors = {
+    Bronze: "#CD7F32",
+    Silver: "#C0C0C0",
+    Gold: "#FFD700",
+    Platinum: "#E5E4E2",
+  };
+  const tiers = tierTable.map((entry) => ({
+    name: entry.tier,
+    points: entry.min_points,
+    discount: entry.discount_percentage,
+    icon: "medal",
+    color: tierColors[entry.tier] || "#CD7F32",
+  }));
 
   // Calculate progress for the progress bar
   const totalPointsForReward = user.points_to_next_reward + user.loyalty_points;
@@ -192,12 +209,12 @@ const LoyaltyScreen = () => {
           </Text>
           {user.tier === "Silver" && !user.redeemed_discount && (
             <TouchableOpacity style={styles.redeemButton} onPress={handleRedeemSilverDiscount}>
-              <Text style={styles.redeemButtonText}>Redeem 15% Discount</Text>
+              <Text style={styles.redeemButtonText}>Redeem {user.discount_percentage}% Discount</Text>
             </TouchableOpacity>
           )}
           {user.tier === "Platinum" && (
             <TouchableOpacity style={styles.redeemButton} onPress={handleRedeemPlatinumDiscount}>
-              <Text style={styles.redeemButtonText}>Redeem 50% Discount</Text>
+              <Text style={styles.redeemButtonText}>Redeem {user.discount_percentage}% Discount</Text>
             </TouchableOpacity>
           )}
         </View>
@@ -7,7 +7,6 @@ import {
   SafeAreaView,
   ActivityIndicator,
   TouchableOpacity,
-  Alert,
 } from "react-native";
 import axios from "axios";
 import Icon from "react-native-vector-icons/MaterialIcons";
@@ -39,57 +38,63 @@ const OrderItemScreen = () => {
     }
   };
 
-  const API_URL = "http://192.168.18.50:8082/pendingorders";
+  const API_URL = "http://192.168.18.50:8082/pendingorders/watch";
 
-  // Fetch orders with customer_id
-  const fetchOrders = async () => {
-    if (!customerId) {
-      return;
-    }
-    setLoading(true);
-    setError(null); // Reset error state before fetching
+  // Apply a watch response: drop removed orders, replace or add changed ones
+  const applyDelta = (previous, data) => {
+    const changedIds = data.changed.map((order) => order.order_id);
+    const kept = previous.filter(
+      (order) =>
+        !data.removed.includes(order.order_id) &&
+        !changedIds.includes(order.order_id)
+    );
+    return [...kept, ...data.changed].sort((a, b) => a.order_id - b.order_id);
+  };
 
-    const formData = new FormData();
-    formData.append("user_id", customerId);
-    console.log("FormData:", formData); // Debug FormData
+  // Long-poll for order changes; the server holds each request until something changes
+  const watchOrders = async (isCancelled) => {
+    let since = null;
+    while (!isCancelled()) {
+      const formData = new FormData();
+      formData.append("user_id", customerId);
+      if (since) {
+        formData.append("since", since);
+      }
 
-    try {
-      const response = await fetch(API_URL, {
-        method: "POST",
-        body: formData,
-        headers: {},
-      });
-      if (response.ok) {
+      try {
+        const response = await fetch(API_URL, {
+          method: "POST",
+          body: formData,
+          headers: {},
+        });
+        if (!response.ok) {
+          throw new Error(`Watch failed with status ${response.status}`);
+        }
         const data = await response.json();
-        // Ensure response is an array
-        const fetchedOrders = Array.isArray(data) ? data : [];
-        setOrders(fetchedOrders);
-        console.log("Fetched Orders:", fetchedOrders); // Debug fetched orders
+        if (isCancelled()) {
+          return;
+        }
+        since = data.version;
+        if (!data.timed_out) {
+          setOrders((previous) => {
+            const fetchedOrders = applyDelta(previous, data);
+            console.log("Fetched Orders:", fetchedOrders); // Debug fetched orders
 
-        // Set activeTab based on the status of the first order
-        if (fetchedOrders.length > 0) {
-            const status = fetchedOrders[0].status;
-            if (status === "Pending") {
-              setActiveTab("Pending");
-            } else if (status === "In Progress") {
-              setActiveTab("In Progress");
-            }
-            else if (status === "Completed") {
-              setActiveTab("Completed");    
+            // Set activeTab based on the status of the first order
+            if (fetchedOrders.length > 0) {
+              setActiveTab(fetchedOrders[0].status);
             }
-            console.log("Set activeTab to:", status); // Debug tab change
-          }
-        //setActiveTab("Pending");
+            return fetchedOrders;
+          });
+        }
         setError(null);
-      } else {
-        const errorData = await response.json();
-        Alert.alert("Error", errorData.message || "Failed to fetching menu.");
+      } catch (error) {
+        console.error("Error fetching orders:", error);
+        setError("Error fetching orders. Please try again.");
+        await new Promise((resolve) => setTimeout(resolve, 5000)); // Back off before reconnecting
+      } finally {
+        setLoading(false);
       }
-    } catch (error) {
-      console.error("Error fetching orders:", error);
-      setError("Error fetching orders. Please try again.");
-    } finally {
-      setLoading(false);
     }
   };
 
@@ -98,12 +103,14 @@ const OrderItemScreen = () => {
     fetchCustomerId();
   }, []);
 
-  // Fetch orders when customerId changes and set up polling
+  // Watch orders once the customer is known
   useEffect(() => {
     if (customerId) {
-      fetchOrders(); // Initial fetch
-      const interval = setInterval(fetchOrders, 10000); // Poll every 2 seconds
-      return () => clearInterval(interval); // Cleanup interval
+      let cancelled = false;
+      watchOrders(() => cancelled);
+      return () => {
+        cancelled = true; // Stop the loop when leaving the screen
+      };
     }
   }, [customerId]);
 
@@ -114,6 +121,7 @@ const OrderItemScreen = () => {
     const statusStyles = {
       Pending: { color: "#FFA500", icon: "hourglass-empty" },
       "In Progress": { color: "#1E90FF", icon: "autorenew" },
+      Ready: { color: "#8A2BE2", icon: "room-service" },
       Completed: { color: "#008000", icon: "check-circle" },
     };
 
@@ -145,7 +153,7 @@ const OrderItemScreen = () => {
 
       {/* Status Tabs */}
       <View style={styles.tabsContainer}>
-        {["Pending", "In Progress", "Completed"].map((tab) => (
+        {["Pending", "In Progress", "Ready", "Completed"].map((tab) => (
           <TouchableOpacity
             key={tab}
             style={[styles.tab, activeTab === tab && styles.activeTab]}
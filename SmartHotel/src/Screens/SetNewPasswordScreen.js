@@ -7,6 +7,8 @@ const SetNewPasswordScreen = ({ navigation, route }) => {
   const [confirmPassword, setConfirmPassword] = useState('');
   const [isLoading, setIsLoading] = useState(false);
 
+  const { resetToken } = route.params;
+
   const handleUpdatePassword = async () => {
 
     // Validate passwords
@@ -27,6 +29,7 @@ const SetNewPasswordScreen = ({ navigation, route }) => {
 
     setIsLoading(true);
     const formData = new FormData();
+    formData.append('reset_token', resetToken);
     formData.append('password', password);
 
     try {